@@ -0,0 +1,194 @@
+"""Array-native normalization (activation) functions.
+Every function takes (x, out=None) like a numpy ufunc, works on arrays of any shape
+(softmax normalizes along the last axis) and never overflows.
+"""
+import numpy as np
+import defaultFuncs
+
+# 0.5 as 0-d arrays of each float type: numpy converts a Python float operand on every call,
+# which costs more than the operation itself on a layer of a few dozen values
+HALVES = {np.dtype(dtype): np.array(0.5, dtype=dtype) for dtype in (np.float32, np.float64)}
+
+def sigmoid(x, out=None):
+    # same as 1 / (1 + exp(-x)), but tanh saturates instead of overflowing
+    if out is None:
+        out = np.multiply(x, 0.5)
+        half = HALVES.get(out.dtype, 0.5)
+    else:
+        half = HALVES.get(out.dtype, 0.5)
+        np.multiply(x, half, out)
+    np.tanh(out, out)
+    np.multiply(out, half, out)
+    np.add(out, half, out)
+    return out
+
+
+def tanh(x, out=None):
+    return np.tanh(x, out=out)
+
+
+def relu(x, out=None):
+    return np.maximum(x, 0, out=out)
+
+
+def leakyRelu(x, out=None, slope=0.01):
+    return np.maximum(x, np.multiply(x, slope), out=out)
+
+
+def softmax(x, out=None):
+    out = np.subtract(x, np.max(x, axis=-1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= out.sum(axis=-1, keepdims=True)
+    return out
+
+
+def fastSigmoid(x, out=None):
+    """Rational approximation of sigmoid: 0.5 * x / (1 + |x|) + 0.5
+    Same range, ordering and value at 0, without any exponentials.
+    """
+    denominator = np.abs(x)
+    denominator += 1
+    out = np.divide(x, denominator, out=out)
+    out *= 0.5
+    out += 0.5
+    return out
+
+
+# sigmoid sampled over [-LUT_RANGE, LUT_RANGE]; it is within 3.4e-4 of 0/1 outside
+LUT_RANGE = 8
+LUT_SIZE = 4096
+LUT_SCALE = (LUT_SIZE - 1) / (2 * LUT_RANGE)
+LUT = sigmoid(np.linspace(-LUT_RANGE, LUT_RANGE, LUT_SIZE))
+
+def lutSigmoid(x, out=None):
+    """Lookup-table sigmoid (nearest of LUT_SIZE samples, error below 5e-4)
+    """
+    index = np.add(x, LUT_RANGE)
+    index *= LUT_SCALE
+    np.clip(index, 0, LUT_SIZE - 1, out=index)
+    return np.take(LUT, np.rint(index).astype(np.intp), out=out)
+
+
+ACTIVATIONS = {
+    "sigmoid": sigmoid,
+    "tanh": tanh,
+    "relu": relu,
+    "leakyRelu": leakyRelu,
+    "softmax": softmax,
+    "fastSigmoid": fastSigmoid,
+    "lutSigmoid": lutSigmoid,
+}
+
+# scalar normalization functions with a known array equivalent
+SCALAR_FUNCTIONS = {
+    defaultFuncs.sigmoid: sigmoid,
+}
+
+def get(activation):
+    """Get an array normalization function.
+    Unknown scalar functions (taking a single float) are wrapped with numpy.vectorize,
+     which works but is slow. A new wrapper is returned on every call.
+
+    Args:
+        activation (string/function): Name in ACTIVATIONS, array function, or scalar function
+
+    Returns:
+        function: Function taking (x, out=None) and returning an array
+    """
+    # known scalar functions first, the default normalization function is one of them
+    if activation in SCALAR_FUNCTIONS:
+        return SCALAR_FUNCTIONS[activation]
+
+    if isinstance(activation, str):
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unknown activation {activation!r}, expected one of {', '.join(ACTIVATIONS)}")
+        return ACTIVATIONS[activation]
+
+    if activation in ACTIVATIONS.values():
+        return activation
+
+    # not cached: a module-level cache would keep every function passed in (e.g. a new lambda
+    # per call) alive forever, and building the wrapper costs little next to calling it
+    vectorized = np.vectorize(activation, otypes=[float])
+
+    def wrapped(x, out=None):
+        if out is None:
+            return vectorized(x)
+        out[...] = vectorized(x)
+        return out
+
+    return wrapped
+
+
+def sigmoidGradient(x, y, gradient):
+    return gradient * y * (1 - y)
+
+
+def tanhGradient(x, y, gradient):
+    return gradient * (1 - y * y)
+
+
+def reluGradient(x, y, gradient):
+    return gradient * (x > 0)
+
+
+def leakyReluGradient(x, y, gradient, slope=0.01):
+    return gradient * np.where(x > 0, 1, slope)
+
+
+def softmaxGradient(x, y, gradient):
+    # Jacobian-vector product of softmax along the last axis
+    return y * (gradient - np.sum(gradient * y, axis=-1, keepdims=True))
+
+
+def fastSigmoidGradient(x, y, gradient):
+    denominator = np.abs(x)
+    denominator += 1
+    return gradient * 0.5 / (denominator * denominator)
+
+
+# backward pass of each activation: (x, y, gradient of y) -> gradient of x, where y = activation(x)
+GRADIENTS = {
+    sigmoid: sigmoidGradient,
+    tanh: tanhGradient,
+    relu: reluGradient,
+    leakyRelu: leakyReluGradient,
+    softmax: softmaxGradient,
+    fastSigmoid: fastSigmoidGradient,
+    # the lookup table follows sigmoid closely enough to share its gradient
+    lutSigmoid: sigmoidGradient,
+}
+
+def gradient(activation):
+    """Get the backward pass of an activation (for training)
+
+    Args:
+        activation (string/function): Name in ACTIVATIONS, array function, or known scalar function
+
+    Returns:
+        function: Function taking (x, y, gradient of y) and returning the gradient of x
+    """
+    function = get(activation)
+    if function not in GRADIENTS:
+        raise ValueError(f"No gradient for activation {activation!r}, use one of {', '.join(ACTIVATIONS)}")
+    return GRADIENTS[function]
+
+
+def nameOf(activation):
+    """Name of an activation in ACTIVATIONS (for serializing)
+
+    Args:
+        activation (string/function): Name or function
+
+    Returns:
+        string: Name, or None if the function is not in ACTIVATIONS
+    """
+    if activation is None or isinstance(activation, str):
+        return activation
+
+    function = get(activation)
+    for name, registered in ACTIVATIONS.items():
+        if registered is function:
+            return name
+
+    return None
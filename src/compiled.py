@@ -0,0 +1,258 @@
+import time
+import numpy as np
+import activations
+from defaultFuncs import sigmoid
+
+def layerSlices(shape):
+    """Locate each layer's weights and biases inside a flat parameter buffer.
+    Every layer (skipping the input layer) stores its weights row by row
+    (one row per neuron, one column per neuron of the previous layer),
+    followed by its biases.
+
+    Args:
+        shape (tuple[int]): Number of neurons in each layer
+
+    Returns:
+        list[tuple[slice, slice]]: (weights, biases) slices for each layer after the input layer
+    """
+    slices = []
+    offset = 0
+    for inputs, outputs in zip(shape[:-1], shape[1:]):
+        weights = slice(offset, offset + inputs * outputs)
+        offset = weights.stop
+        biases = slice(offset, offset + outputs)
+        offset = biases.stop
+        slices.append((weights, biases))
+
+    return slices
+
+
+def genomeLength(shape):
+    """Number of parameters (weights and biases) of a network shape
+
+    Args:
+        shape (tuple[int]): Number of neurons in each layer
+
+    Returns:
+        int: Length of the flat parameter buffer
+    """
+    return sum(i * o + o for i, o in zip(shape[:-1], shape[1:]))
+
+
+class CompiledNetwork:
+    """Frozen dense-matrix form of a Network.
+    All weights and biases live in one contiguous parameter buffer,
+     with each layer exposed as a (outputs, inputs) weight matrix
+     and an (outputs,) bias vector viewing into it.
+    A forward pass is a chain of matrix-vector products plus a
+     vectorized normalization function.
+    The buffers can be float32 (half the memory) instead of float64,
+     the parameters are then a converted copy rather than the network's own.
+    """
+    # name of the forward pass implementation, one of jit.BACKENDS
+    backend = "numpy"
+
+    def __init__(self, shape, inputNames, outputNames, params=None, activations=None, dtype=None):
+        """Construct a compiled network of a given shape.
+
+        Args:
+            shape (tuple[int]): Number of neurons in each layer
+            inputNames (list[string]): Names of the input neurons
+            outputNames (list[string]): Names of the output neurons
+            params (numpy.ndarray, optional): Flat parameter buffer. Defaults to zeros.
+            activations (list, optional): Activation of each layer after the input layer,
+                None to use the one given to forward(). Defaults to None for every layer.
+            dtype (numpy.dtype, optional): Floating point type of the buffers, params are converted
+                (copied) if needed. Defaults to the type of params, or float64.
+        """
+        self.shape = tuple(shape)
+        self.inputNames = list(inputNames)
+        self.outputNames = list(outputNames)
+        self.set_activations(activations)
+
+        if params is None:
+            params = np.zeros(genomeLength(self.shape), dtype=dtype or np.float64)
+        self.params = params if dtype is None else params.astype(dtype, copy=False)
+        self.__view()
+
+        # preallocated buffers so a forward pass does not allocate
+        self.inputs = np.zeros(self.shape[0], dtype=self.params.dtype)
+        self.values = [np.zeros(n, dtype=self.params.dtype) for n in self.shape[1:]]
+        self.outputs = self.values[-1]
+
+    def __view(self):
+        self.weights = []
+        self.biases = []
+        for (weights, biases), inputs, outputs in zip(
+            layerSlices(self.shape), self.shape[:-1], self.shape[1:]
+        ):
+            self.weights.append(self.params[weights].reshape(outputs, inputs))
+            self.biases.append(self.params[biases])
+
+    def __getstate__(self):
+        # views would be copied as separate arrays, rebuild them from the buffer instead
+        state = self.__dict__.copy()
+        del state["weights"], state["biases"], state["outputs"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__view()
+        self.outputs = self.values[-1]
+
+    @classmethod
+    def from_network(cls, network, dtype=None):
+        """Compile the layers of a network
+
+        Args:
+            network (Network): Network with connections built
+            dtype (numpy.dtype, optional): Floating point type, other than the network's
+                makes a converted copy. Defaults to None (the network's own type).
+
+        Returns:
+            CompiledNetwork: Compiled network sharing (or copying) the network's parameter buffer
+        """
+        layers = network.layers
+        compiled = cls(
+            [len(layer.neurons) for layer in layers],
+            [neuron.name for neuron in layers[0].neurons],
+            [neuron.name for neuron in layers[-1].neurons],
+            params=network.params,
+            activations=[layer.activation for layer in layers[1:]],
+            dtype=dtype,
+        )
+
+        compiled.inputs[:] = [neuron.value for neuron in layers[0].neurons]
+        return compiled
+
+    def clone(self, params=None):
+        """Copy with its own input and value buffers
+
+        Args:
+            params (numpy.ndarray, optional): Parameter buffer to view (e.g. a cloned network's).
+                Defaults to None (a copy of this one's).
+
+        Returns:
+            CompiledNetwork: Copy sharing the shape, names and activations
+        """
+        compiled = object.__new__(type(self))
+        compiled.__dict__.update(self.__dict__)
+        compiled.params = self.params.copy() if params is None else params
+        compiled.__view()
+
+        compiled.inputs = self.inputs.copy()
+        compiled.values = [values.copy() for values in self.values]
+        compiled.outputs = compiled.values[-1]
+        return compiled
+
+    @property
+    def precision(self):
+        """Name of the parameters' type, one of quantize.PRECISIONS"""
+        return self.params.dtype.name
+
+    def gather(self, params):
+        """Refresh a copied parameter buffer from the network's
+
+        Args:
+            params (numpy.ndarray): Flat parameter buffer
+        """
+        self.params[:] = params
+
+    def set_activations(self, layerActivations=None):
+        """Set the activation of each layer after the input layer
+
+        Args:
+            layerActivations (list, optional): Name or function per layer, None to use the one
+                given to forward(). Defaults to None for every layer.
+        """
+        if layerActivations is None:
+            layerActivations = [None] * (len(self.shape) - 1)
+        if len(layerActivations) != len(self.shape) - 1:
+            raise ValueError(f"Expected {len(self.shape) - 1} activations, got {len(layerActivations)}")
+
+        self.activations = list(layerActivations)
+        self.functions = [
+            None if activation is None else activations.get(activation)
+            for activation in self.activations
+        ]
+
+    def layer_functions(self, normalizationFunction=sigmoid):
+        """Array normalization function of each layer after the input layer
+
+        Args:
+            normalizationFunction (function, optional): Function for layers without their own. Defaults to sigmoid.
+
+        Returns:
+            list[function]: One function per layer
+        """
+        default = activations.get(normalizationFunction)
+        return [function or default for function in self.functions]
+
+    def forward(self, normalizationFunction=sigmoid, profiler=None):
+        """Run the compiled network on its input buffer
+
+        Args:
+            normalizationFunction (function, optional): Function to normalize outputs of layers
+                without their own activation. Defaults to sigmoid.
+            profiler (profiling.Profiler, optional): Profiler to time every layer with. Defaults to None.
+
+        Returns:
+            numpy.ndarray: Output buffer
+        """
+        default = activations.get(normalizationFunction)
+        if profiler is not None:
+            return self.__forward_profiled(default, profiler)
+
+        x = self.inputs
+
+        # every operation writes into the layer's buffer, and the method forms skip the
+        # dispatch of np.dot, which costs as much as the product at these sizes
+        for weights, biases, values, function in zip(self.weights, self.biases, self.values, self.functions):
+            weights.dot(x, values)
+            np.add(values, biases, values)
+            x = (function or default)(values, out=values)
+
+        return self.outputs
+
+    def __forward_profiled(self, default, profiler):
+        start = time.perf_counter()
+        x = self.inputs
+
+        for layerIndex, (weights, biases, values, function) in enumerate(
+            zip(self.weights, self.biases, self.values, self.functions), 1
+        ):
+            profiler.before_layer(self, layerIndex, x)
+            layerStart = time.perf_counter()
+
+            weights.dot(x, values)
+            np.add(values, biases, values)
+            x = (function or default)(values, out=values)
+
+            profiler.add_time(f"layer{layerIndex}", time.perf_counter() - layerStart)
+            profiler.after_layer(self, layerIndex, x)
+
+        profiler.add_time("forward", time.perf_counter() - start)
+        return self.outputs
+
+    def forward_batch(self, X, normalizationFunction=sigmoid):
+        """Run the compiled network on many input vectors at once.
+        The input and output buffers are left untouched.
+
+        Args:
+            X (array-like): (N, inputs) array, one input vector per row
+            normalizationFunction (function, optional): Function to normalize outputs of layers
+                without their own activation. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (N, outputs) array, one output vector per row
+        """
+        X = np.asarray(X, dtype=self.params.dtype)
+        if X.ndim != 2 or X.shape[1] != self.shape[0]:
+            raise ValueError(f"Expected an (N, {self.shape[0]}) array, got {X.shape}")
+
+        for weights, biases, function in zip(self.weights, self.biases, self.layer_functions(normalizationFunction)):
+            X = X @ weights.T
+            X += biases
+            X = function(X, out=X)
+
+        return X
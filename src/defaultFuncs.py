@@ -5,8 +5,12 @@ import math
 charset = list(string.ascii_letters)
 
 def sigmoid(x):
-    sig = 1 / (1 + math.exp(-x))
-    return sig
+    # split on the sign so math.exp never overflows
+    if x >= 0:
+        return 1 / (1 + math.exp(-x))
+
+    z = math.exp(x)
+    return z / (1 + z)
 
 def randomStrength():
     return random.uniform(-1, 1)
@@ -0,0 +1,340 @@
+import os
+import copy
+import time
+import hashlib
+import collections
+import concurrent.futures
+import numpy as np
+
+# state of a pool worker process, set up by _initWorker
+# (a runner evaluating in its own process keeps its state on the runner instead)
+_worker = {}
+
+def _workerState(template, evaluate, backend="numpy"):
+    network = copy.deepcopy(template)
+    network.compile(backend=backend)
+    return {"network": network, "evaluate": evaluate}
+
+
+def _initWorker(template, evaluate, backend="numpy"):
+    _worker.update(_workerState(template, evaluate, backend))
+
+
+def _evaluateChunk(genomes, seeds, state=None):
+    state = _worker if state is None else state
+    network = state["network"]
+    evaluate = state["evaluate"]
+
+    results = []
+    for genome, seed in zip(genomes, seeds):
+        network.set_parameters(genome)
+        results.append(evaluate(network, seed))
+
+    return results
+
+
+class FitnessCache:
+    """Bounded least-recently-used cache of fitness results.
+    Keys are a content hash of the flat genome plus the evaluation seed, so a genome
+     carried over unchanged (an elite, or a child no mutation touched) is not re-run
+     with the same seed. Only valid for evaluations that are deterministic given the seed.
+    """
+    def __init__(self, size=10000):
+        """Construct an empty cache
+
+        Args:
+            size (int, optional): Most results kept, the least recently used are evicted. Defaults to 10000.
+        """
+        self.size = size
+        self.results = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(genome, seed):
+        """Cache key of a genome and seed
+
+        Args:
+            genome (numpy.ndarray): (genomeLength,) flat genome
+            seed (int): Evaluation seed
+
+        Returns:
+            tuple[bytes, int]: Key
+        """
+        genome = np.ascontiguousarray(genome)
+        digest = hashlib.blake2b(genome, digest_size=16)
+        digest.update(genome.dtype.str.encode())
+        return digest.digest(), int(seed)
+
+    def get(self, key):
+        """Cached fitness, marked as recently used
+
+        Returns:
+            float: Fitness, or None if not cached
+        """
+        fitness = self.results.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.results.move_to_end(key)
+        return fitness
+
+    def put(self, key, fitness):
+        self.results[key] = fitness
+        self.results.move_to_end(key)
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def clear(self):
+        self.results.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class GenerationRunner:
+    """Evaluates the fitness of a whole generation across a pool of processes.
+    Each worker keeps its own compiled copy of a template network, and only
+     receives flat genome arrays, so no Neuron/Connection graphs are pickled per task.
+    Every genome gets a seed derived from (seed, generation, index), so results
+     do not depend on the number of workers or how the genomes are chunked.
+    With fixedSeed, every genome of every generation gets the same seed instead, so
+     fitness depends on the genome alone and a FitnessCache can skip repeated genomes.
+    """
+    def __init__(self, template, evaluate, workers=None, chunkSize=None, seed=0, fixedSeed=False, cache=None,
+                 backend="numpy"):
+        """Construct a runner
+
+        Args:
+            template (Network): Network giving the shape of every genome
+            evaluate (function): Module-level function (network, seed) -> fitness
+            workers (int, optional): Number of processes, 1 evaluates in this process. Defaults to the CPU count.
+            chunkSize (int, optional): Genomes per task. Defaults to an even split into 4 tasks per worker.
+            seed (int, optional): Base seed for the evaluation seeds. Defaults to 0.
+            fixedSeed (bool, optional): Evaluate every genome with the same seed. Defaults to False.
+            cache (FitnessCache, optional): Cache consulted before every evaluation. Defaults to None.
+            backend (string, optional): Forward pass backend of the workers' networks (see Network.compile).
+                Defaults to "numpy".
+        """
+        self.template = template
+        self.fitnessFunction = evaluate
+        self.chunkSize = chunkSize
+        self.seed = seed
+        self.fixedSeed = fixedSeed
+        self.cache = cache
+        self.generation = 0
+
+        self.executor = None
+        # compiled network and evaluate function when evaluating in this process
+        self.state = None
+        self.workers = workers or os.cpu_count()
+        if self.workers > 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_initWorker,
+                initargs=(template, evaluate, backend),
+            )
+        else:
+            self.state = _workerState(template, evaluate, backend)
+
+    def seeds(self, size, generation=None):
+        """Evaluation seeds for one generation
+
+        Args:
+            size (int): Number of genomes
+            generation (int, optional): Generation number. Defaults to the current generation.
+
+        Returns:
+            numpy.ndarray: (size,) array of seeds
+        """
+        if self.fixedSeed:
+            return np.full(size, np.random.SeedSequence(self.seed).generate_state(1)[0])
+        if generation is None:
+            generation = self.generation
+
+        sequence = np.random.SeedSequence((self.seed, generation))
+        return sequence.generate_state(size)
+
+    def evaluate(self, genomes):
+        """Evaluate every genome of a generation, then move on to the next generation
+
+        Args:
+            genomes (numpy.ndarray): (P, genomeLength) array of flat genomes
+
+        Returns:
+            numpy.ndarray: (P,) array of fitness
+        """
+        seeds = self.seeds(len(genomes)).tolist()
+        self.generation += 1
+
+        if self.cache is None:
+            return self.__run(genomes, seeds)
+
+        fitness = np.empty(len(genomes))
+        # key -> indices of the genomes not cached, so duplicates within a generation run once
+        missing = {}
+        for i, (genome, seed) in enumerate(zip(genomes, seeds)):
+            key = self.cache.key(genome, seed)
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                fitness[i] = cached
+
+        first = [indices[0] for indices in missing.values()]
+        results = self.__run(genomes[first], [seeds[i] for i in first])
+        for (key, indices), result in zip(missing.items(), results):
+            fitness[indices] = result
+            self.cache.put(key, float(result))
+
+        return fitness
+
+    def __run(self, genomes, seeds):
+        if len(genomes) == 0:
+            return np.zeros(0)
+        if self.executor is None:
+            return np.array(_evaluateChunk(genomes, seeds, self.state), dtype=float)
+
+        chunkSize = self.chunkSize or max(1, -(-len(genomes) // (self.workers * 4)))
+        chunks = [
+            (genomes[i:i + chunkSize], seeds[i:i + chunkSize])
+            for i in range(0, len(genomes), chunkSize)
+        ]
+
+        results = self.executor.map(_evaluateChunk, *zip(*chunks))
+        return np.array([fitness for chunk in results for fitness in chunk], dtype=float)
+
+    def submit(self, genomes, seeds):
+        """Start evaluating some genomes without waiting for them
+
+        Args:
+            genomes (numpy.ndarray): (N, genomeLength) array of flat genomes
+            seeds (list[int]): Evaluation seed of each genome
+
+        Returns:
+            concurrent.futures.Future: Future list of fitness (already done without worker processes)
+        """
+        if self.executor is not None:
+            return self.executor.submit(_evaluateChunk, genomes, seeds)
+
+        future = concurrent.futures.Future()
+        future.set_result(_evaluateChunk(genomes, seeds, self.state))
+        return future
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SteadyStateRunner:
+    """Steady-state evolution: instead of waiting for a whole generation, a new child is
+     submitted as soon as any evaluation finishes, so no worker waits for the slowest game.
+    A finished child replaces the least fit member of the population if it is at least as fit.
+    Fitness means the same as with GenerationRunner.evaluate: the same evaluate function, cache,
+     and seeds, with every P evaluations using one generation's seeds in turn.
+    """
+    def __init__(self, runner, algorithm, inFlight=None, mask=None):
+        """Construct a steady-state scheduler
+
+        Args:
+            runner (GenerationRunner): Runner whose workers, seeds and cache are used
+            algorithm (genetic.GeneticAlgorithm): Breeds every child (its elitism is not used,
+                the fittest members are never replaced anyway)
+            inFlight (int, optional): Children being evaluated at once. Defaults to twice the workers.
+            mask (numpy.ndarray, optional): (genomeLength,) bool array of genes that exist. Defaults to None.
+        """
+        self.runner = runner
+        self.algorithm = algorithm
+        self.inFlight = inFlight or 2 * runner.workers
+        self.mask = mask
+
+        self.evaluations = 0
+        self.replacements = 0
+        self.seconds = 0.0
+        self.__seeds = []
+
+    @property
+    def throughput(self):
+        """Evaluations per second so far"""
+        return self.evaluations / self.seconds if self.seconds else 0.0
+
+    def __seed(self, size):
+        # one generation's worth of seeds at a time, as GenerationRunner.evaluate uses them
+        if not self.__seeds:
+            self.__seeds = self.runner.seeds(size).tolist()[::-1]
+            self.runner.generation += 1
+        return self.__seeds.pop()
+
+    def __replace(self, genomes, fitness, child, childFitness):
+        worst = np.argmin(fitness)
+        if childFitness >= fitness[worst]:
+            genomes[worst] = child
+            fitness[worst] = childFitness
+            self.replacements += 1
+
+    def run(self, genomes, fitness, evaluations, callback=None):
+        """Evolve a population for some evaluations
+
+        Args:
+            genomes (numpy.ndarray): (P, genomeLength) evaluated genomes, updated in place
+            fitness (numpy.ndarray): (P,) fitness of each genome, updated in place
+            evaluations (int): Number of children to evaluate
+            callback (function, optional): Called with (evaluations, genomes, fitness) after every
+                P evaluations, e.g. to checkpoint. Defaults to None.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The evolved genomes and their fitness
+        """
+        size = len(genomes)
+        cache = self.runner.cache
+        pending = {}
+        submitted = 0
+        start = time.perf_counter() - self.seconds
+
+        while submitted < evaluations or pending:
+            while submitted < evaluations and len(pending) < self.inFlight:
+                child = self.algorithm.offspring(genomes, fitness, 1, self.mask)
+                seed = self.__seed(size)
+                submitted += 1
+
+                key = None
+                if cache is not None:
+                    key = cache.key(child[0], seed)
+                    cached = cache.get(key)
+                    if cached is not None:
+                        future = concurrent.futures.Future()
+                        future.set_result([cached])
+                        pending[future] = (child[0], None)
+                        continue
+
+                pending[self.runner.submit(child, [seed])] = (child[0], key)
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                child, key = pending.pop(future)
+                childFitness = float(future.result()[0])
+                if key is not None:
+                    cache.put(key, childFitness)
+
+                self.__replace(genomes, fitness, child, childFitness)
+                self.evaluations += 1
+                self.seconds = time.perf_counter() - start
+                if callback is not None and self.evaluations % size == 0:
+                    callback(self.evaluations, genomes, fitness)
+
+        return genomes, fitness
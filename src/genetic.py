@@ -0,0 +1,259 @@
+"""Selection and crossover on stacked flat genomes.
+Every operation works on a (P, genomeLength) array at once, so breeding a generation
+is a handful of array operations regardless of the population size.
+
+Selections take (fitness, count, rng) and return the indices of `count` parents.
+Crossovers take (a, b, shape, rng) with (N, genomeLength) parent arrays, and write the
+children into `a`.
+"""
+import numpy as np
+from mutation import layerBlocks, gaussianMutation
+from population import Population
+
+def elite(fitness, count):
+    """Indices of the fittest genomes, fittest first
+
+    Args:
+        fitness (numpy.ndarray): (P,) fitness
+        count (int): Number of genomes
+
+    Returns:
+        numpy.ndarray: (count,) indices
+    """
+    if count <= 0:
+        return np.zeros(0, dtype=np.intp)
+    count = min(count, len(fitness))
+    top = np.argpartition(fitness, len(fitness) - count)[len(fitness) - count:]
+    return top[np.argsort(fitness[top])[::-1]]
+
+
+def tournamentSelection(fitness, count, rng, size=3):
+    """Each parent is the fittest of `size` genomes picked at random
+
+    Args:
+        fitness (numpy.ndarray): (P,) fitness
+        count (int): Number of parents
+        rng (numpy.random.Generator): Generator
+        size (int, optional): Genomes per tournament. Defaults to 3.
+
+    Returns:
+        numpy.ndarray: (count,) indices
+    """
+    candidates = rng.integers(0, len(fitness), (count, size))
+    return candidates[np.arange(count), fitness[candidates].argmax(axis=1)]
+
+
+def rankSelection(fitness, count, rng, pressure=1.5):
+    """Parents are picked with a probability rising linearly with their rank
+
+    Args:
+        fitness (numpy.ndarray): (P,) fitness
+        count (int): Number of parents
+        rng (numpy.random.Generator): Generator
+        pressure (float, optional): Expected picks of the fittest genome, from 1 (uniform) to 2. Defaults to 1.5.
+
+    Returns:
+        numpy.ndarray: (count,) indices
+    """
+    size = len(fitness)
+    if size == 1:
+        return np.zeros(count, dtype=np.intp)
+
+    ranks = np.empty(size)
+    ranks[np.argsort(fitness, kind="stable")] = np.arange(size)
+    probabilities = (2 - pressure) / size + 2 * ranks * (pressure - 1) / (size * (size - 1))
+    return rng.choice(size, count, p=probabilities / probabilities.sum())
+
+
+def truncationSelection(fitness, count, rng, fraction=0.1):
+    """Parents are the top `fraction` of genomes, taken in turn
+
+    Args:
+        fitness (numpy.ndarray): (P,) fitness
+        count (int): Number of parents
+        rng (numpy.random.Generator): Generator (unused)
+        fraction (float, optional): Fraction of genomes that become parents. Defaults to 0.1.
+
+    Returns:
+        numpy.ndarray: (count,) indices
+    """
+    top = np.argsort(fitness, kind="stable")[-max(1, int(len(fitness) * fraction)):]
+    return top[np.arange(count) % len(top)]
+
+
+SELECTIONS = {
+    "tournament": tournamentSelection,
+    "rank": rankSelection,
+    "truncation": truncationSelection,
+}
+
+
+# genes per block of rows in uniformCrossover
+CROSSOVER_BLOCK = 1 << 15
+
+def uniformCrossover(a, b, shape, rng):
+    """Every gene comes from either parent with equal chance
+
+    Args:
+        a (numpy.ndarray): (N, genomeLength) first parents, overwritten by the children
+        b (numpy.ndarray): (N, genomeLength) second parents
+        shape (tuple[int]): Number of neurons in each layer
+        rng (numpy.random.Generator): Generator
+    """
+    # one random bit per gene, drawn a byte at a time
+    length = a.shape[1]
+    bits = rng.integers(0, 256, (len(a), -(-length // 8)), dtype=np.uint8)
+
+    if not (a.flags.c_contiguous and b.flags.c_contiguous):
+        np.copyto(a, b, where=np.unpackbits(bits, axis=1, count=length).view(bool))
+        return
+
+    # a ^= (a ^ b) & mask on the genes' bits, with mask all ones where b is picked, a block
+    # of rows at a time so the temporaries stay in cache (copyto with where= tests gene by gene)
+    unsigned = np.dtype(f"u{a.itemsize}")
+    aBits, bBits = a.view(unsigned), b.view(unsigned)
+    rows = max(1, CROSSOVER_BLOCK // length)
+    mask = np.empty((rows, length), dtype=unsigned)
+    difference = np.empty((rows, length), dtype=unsigned)
+    for start in range(0, len(a), rows):
+        stop = min(start + rows, len(a))
+        block = slice(0, stop - start)
+        # 0 - 1 wraps around to all ones
+        np.negative(np.unpackbits(bits[start:stop], axis=1, count=length), out=mask[block], dtype=unsigned, casting="unsafe")
+        np.bitwise_xor(aBits[start:stop], bBits[start:stop], out=difference[block])
+        difference[block] &= mask[block]
+        aBits[start:stop] ^= difference[block]
+
+
+def layerCrossover(a, b, shape, rng):
+    """Every layer's weights and biases come together from either parent
+
+    Args:
+        a (numpy.ndarray): (N, genomeLength) first parents, overwritten by the children
+        b (numpy.ndarray): (N, genomeLength) second parents
+        shape (tuple[int]): Number of neurons in each layer
+        rng (numpy.random.Generator): Generator
+    """
+    blocks = layerBlocks(shape)
+    fromB = rng.random((len(a), len(blocks))) < 0.5
+
+    for index, block in enumerate(blocks):
+        rows = fromB[:, index]
+        a[rows, block] = b[rows, block]
+
+
+CROSSOVERS = {
+    "uniform": uniformCrossover,
+    "layer": layerCrossover,
+}
+
+
+class GeneticAlgorithm:
+    """Breeds the next generation of stacked flat genomes:
+     the fittest `elitism` genomes are kept unchanged, and every other child
+     is the crossover of two selected parents, then mutated.
+    """
+    def __init__(self, shape, elitism=1, selection="tournament", crossover="uniform",
+                 crossoverRate=0.9, mutationRate=0.1, mutationStrength=0.5, rng=None):
+        """Construct a genetic algorithm
+
+        Args:
+            shape (tuple[int]): Number of neurons in each layer
+            elitism (int, optional): Fittest genomes copied unchanged. Defaults to 1.
+            selection (string/function, optional): Name in SELECTIONS or function (fitness, count, rng) -> indices
+                (e.g. functools.partial(tournamentSelection, size=5)). Defaults to "tournament".
+            crossover (string/function, optional): Name in CROSSOVERS, function (a, b, shape, rng),
+                or None to only mutate. Defaults to "uniform".
+            crossoverRate (float, optional): Chance of a child being a crossover instead of a copy of
+                its first parent. Defaults to 0.9.
+            mutationRate (float, optional): Chance of each gene of a child being mutated. Defaults to 0.1.
+            mutationStrength (float/list[float], optional): Standard deviation of mutations, or one per layer.
+                Defaults to 0.5.
+            rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+        """
+        if isinstance(selection, str):
+            if selection not in SELECTIONS:
+                raise ValueError(f"Unknown selection {selection!r}, expected one of {', '.join(SELECTIONS)}")
+            selection = SELECTIONS[selection]
+        if isinstance(crossover, str):
+            if crossover not in CROSSOVERS:
+                raise ValueError(f"Unknown crossover {crossover!r}, expected one of {', '.join(CROSSOVERS)}")
+            crossover = CROSSOVERS[crossover]
+
+        self.shape = tuple(shape)
+        self.elitism = elitism
+        self.selection = selection
+        self.crossover = crossover
+        self.crossoverRate = crossoverRate
+        self.mutationRate = mutationRate
+        self.mutationStrength = mutationStrength
+        self.rng = np.random.default_rng(rng)
+
+    def next_generation(self, genomes, fitness, mask=None):
+        """Breed a new generation of the same size
+
+        Args:
+            genomes (numpy.ndarray): (P, genomeLength) evaluated genomes
+            fitness (array-like): (P,) fitness of each genome
+            mask (numpy.ndarray, optional): (genomeLength,) bool array of genes that exist
+                (see sparse.parameterMask), others are never mutated. Defaults to None.
+
+        Returns:
+            numpy.ndarray: (P, genomeLength) new genomes, elites first
+        """
+        fitness = np.asarray(fitness, dtype=float)
+        size = len(genomes)
+        elites = elite(fitness, min(self.elitism, size))
+
+        children = np.empty_like(genomes)
+        children[:len(elites)] = genomes[elites]
+        self.offspring(genomes, fitness, size - len(elites), mask, out=children[len(elites):])
+        return children
+
+    def offspring(self, genomes, fitness, count, mask=None, out=None):
+        """Breed children without elites, e.g. one at a time for steady-state evolution
+
+        Args:
+            genomes (numpy.ndarray): (P, genomeLength) evaluated genomes
+            fitness (array-like): (P,) fitness of each genome
+            count (int): Number of children
+            mask (numpy.ndarray, optional): (genomeLength,) bool array of genes that exist. Defaults to None.
+            out (numpy.ndarray, optional): (count, genomeLength) array to write the children to. Defaults to None.
+
+        Returns:
+            numpy.ndarray: (count, genomeLength) children
+        """
+        fitness = np.asarray(fitness, dtype=float)
+        if out is None:
+            out = np.empty((count, genomes.shape[1]), dtype=genomes.dtype)
+
+        # mode="raise" would buffer the whole output
+        np.take(genomes, self.selection(fitness, count, self.rng), axis=0, out=out, mode="clip")
+        if self.crossover is not None and count:
+            # children are interchangeable, so the crossed ones are the first rows, crossed in place
+            crossing = self.rng.binomial(count, self.crossoverRate)
+            second = np.take(genomes, self.selection(fitness, crossing, self.rng), axis=0, mode="clip")
+            self.crossover(out[:crossing], second, self.shape, self.rng)
+
+        gaussianMutation(out, self.shape, self.mutationRate, self.mutationStrength, self.rng, mask)
+        return out
+
+    def breed(self, population, fitness):
+        """Breed the next population
+
+        Args:
+            population (Population): Evaluated population
+            fitness (array-like): (P,) fitness of each network
+
+        Returns:
+            Population: Next population, with the same template, storage type and profiler
+        """
+        if population.profiler is None:
+            genomes = self.next_generation(population.genomes, fitness, population.mask)
+        else:
+            with population.profiler.timer("breed"):
+                genomes = self.next_generation(population.genomes, fitness, population.mask)
+
+        newPopulation = Population(population.template, genomes)
+        newPopulation.profiler = population.profiler
+        return newPopulation
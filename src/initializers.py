@@ -0,0 +1,107 @@
+"""Array weight initializers.
+Every initializer takes (shape, rng) and returns a new array of that shape, where
+shape ends in (outputs, inputs) like a layer's weight matrix. Any leading axes
+(e.g. a population axis) are filled with independent draws.
+"""
+import numpy as np
+
+def uniform(shape, rng, low=-1, high=1):
+    # same distribution as defaultFuncs.randomStrength
+    return rng.uniform(low, high, shape)
+
+
+def xavier(shape, rng):
+    """Xavier/Glorot uniform: U(-a, a) with a = sqrt(6 / (inputs + outputs))
+    """
+    outputs, inputs = shape[-2:]
+    limit = np.sqrt(6 / (inputs + outputs))
+    return rng.uniform(-limit, limit, shape)
+
+
+def he(shape, rng):
+    """He/Kaiming normal: N(0, 2 / inputs), for relu layers
+    """
+    return rng.normal(0, np.sqrt(2 / shape[-1]), shape)
+
+
+def orthogonal(shape, rng, gain=1):
+    """Orthogonal rows (or columns, whichever there are fewer of), scaled by gain
+    """
+    outputs, inputs = shape[-2:]
+    flipped = outputs < inputs
+
+    # QR of a tall gaussian matrix, with the signs fixed so the result is uniformly distributed
+    matrix = rng.normal(size=(*shape[:-2], max(outputs, inputs), min(outputs, inputs)))
+    q, r = np.linalg.qr(matrix)
+    q *= np.sign(np.diagonal(r, axis1=-2, axis2=-1))[..., None, :]
+
+    if flipped:
+        q = np.swapaxes(q, -1, -2)
+    return gain * q
+
+
+def constant(value):
+    """Initializer filling every weight with value
+
+    Args:
+        value (float): Weight
+
+    Returns:
+        function: Initializer
+    """
+    def initializer(shape, rng):
+        return np.full(shape, value, dtype=float)
+
+    return initializer
+
+
+def fromArray(array):
+    """Initializer copying existing weights
+
+    Args:
+        array (array-like): Weights, broadcastable to the shape asked for
+
+    Returns:
+        function: Initializer
+    """
+    array = np.asarray(array, dtype=float)
+
+    def initializer(shape, rng):
+        try:
+            return np.broadcast_to(array, shape).copy()
+        except ValueError:
+            raise ValueError(f"Cannot initialize {tuple(shape)} weights from a {array.shape} array") from None
+
+    return initializer
+
+
+INITIALIZERS = {
+    "uniform": uniform,
+    "xavier": xavier,
+    "glorot": xavier,
+    "he": he,
+    "orthogonal": orthogonal,
+}
+
+def get(initializer):
+    """Get an initializer function.
+
+    Args:
+        initializer (string/float/array-like/function): Name in INITIALIZERS, constant weight,
+            existing weights, or function taking (shape, rng)
+
+    Returns:
+        function: Function taking (shape, rng) and returning an array
+    """
+    if isinstance(initializer, str):
+        if initializer not in INITIALIZERS:
+            raise ValueError(f"Unknown initializer {initializer!r}, expected one of {', '.join(INITIALIZERS)}")
+        return INITIALIZERS[initializer]
+
+    if callable(initializer):
+        return initializer
+
+    if np.ndim(initializer) == 0:
+        return constant(float(initializer))
+
+    return fromArray(initializer)
@@ -0,0 +1,176 @@
+"""Optional JIT-compiled kernels, for when numba is installed.
+Kernels are plain loops over flat arrays, decorated with `jit`: numba compiles them to
+native code, and without numba they stay ordinary (slow) Python functions, so the
+NumPy paths are used instead (see AVAILABLE) and the kernels can still be checked against them.
+"""
+import math
+import numpy as np
+import activations
+from defaultFuncs import sigmoid
+from compiled import CompiledNetwork
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# whether kernels are compiled
+AVAILABLE = numba is not None
+
+BACKENDS = ("numpy", "numba")
+
+def jit(function):
+    """Compile a function with numba (nopython mode), or leave it unchanged without numba
+
+    Args:
+        function (function): Kernel using only loops, math and NumPy arrays
+
+    Returns:
+        function: Compiled kernel, or the function itself
+    """
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+# activation functions the kernels implement, by kernel code
+ACTIVATION_CODES = {
+    activations.sigmoid: 0,
+    activations.tanh: 1,
+    activations.relu: 2,
+    activations.leakyRelu: 3,
+    activations.softmax: 4,
+    activations.fastSigmoid: 5,
+}
+
+@jit
+def activate(values, start, stop, code):
+    """Apply the activation with a kernel code to values[start:stop] in place,
+    with the same formulas as the functions in activations
+    """
+    if code == 4:
+        highest = values[start]
+        for i in range(start + 1, stop):
+            highest = max(highest, values[i])
+        total = 0.0
+        for i in range(start, stop):
+            values[i] = math.exp(values[i] - highest)
+            total += values[i]
+        for i in range(start, stop):
+            values[i] /= total
+        return
+
+    for i in range(start, stop):
+        x = values[i]
+        if code == 0:
+            values[i] = math.tanh(x * 0.5) * 0.5 + 0.5
+        elif code == 1:
+            values[i] = math.tanh(x)
+        elif code == 2:
+            values[i] = max(x, 0.0)
+        elif code == 3:
+            values[i] = max(x, x * 0.01)
+        else:
+            values[i] = x / (abs(x) + 1) * 0.5 + 0.5
+
+
+@jit
+def denseForward(params, shape, codes, inputs, values):
+    """Forward pass of a whole dense network in one call
+
+    Args:
+        params (numpy.ndarray): Flat parameter buffer (layout of compiled.layerSlices)
+        shape (numpy.ndarray): Number of neurons in each layer
+        codes (numpy.ndarray): Activation code of each layer after the input layer
+        inputs (numpy.ndarray): Input values
+        values (numpy.ndarray): Flat buffer for the values of every layer after the input layer, in order
+    """
+    offset = 0
+    previous = 0
+    start = 0
+    for layer in range(len(shape) - 1):
+        size = shape[layer]
+        outputs = shape[layer + 1]
+        biases = offset + size * outputs
+
+        for row in range(outputs):
+            total = 0.0
+            weights = offset + row * size
+            if layer == 0:
+                for column in range(size):
+                    total += params[weights + column] * inputs[column]
+            else:
+                for column in range(size):
+                    total += params[weights + column] * values[previous + column]
+            values[start + row] = total + params[biases + row]
+
+        activate(values, start, start + outputs, codes[layer])
+        offset = biases + outputs
+        previous = start
+        start += outputs
+
+
+class JitCompiledNetwork(CompiledNetwork):
+    """Dense compiled form whose forward pass is a single numba kernel call, instead of
+     one NumPy call per operation per layer (which dominates for small networks).
+    Layer values live in one flat buffer for the kernel, `values` are views into it.
+    Layers with activations the kernel does not implement, and profiled passes, use
+     the NumPy forward pass; forward_batch is always NumPy (already one BLAS call per layer).
+    """
+    backend = "numba"
+
+    def __init__(self, shape, inputNames, outputNames, params=None, activations=None, dtype=None):
+        super().__init__(shape, inputNames, outputNames, params, activations, dtype)
+        self.shapeArray = np.array(self.shape, dtype=np.int64)
+        self.flatValues = np.zeros(sum(self.shape[1:]), dtype=self.params.dtype)
+        self.__view()
+        self.__codes = (None, None)
+
+    def __view(self):
+        self.values = np.split(self.flatValues, np.cumsum(self.shape[1:-1]))
+        self.outputs = self.values[-1]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state["values"], state["_JitCompiledNetwork__codes"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__view()
+        self.__codes = (None, None)
+        super().__setstate__({})
+
+    def clone(self, params=None):
+        compiled = super().clone(params)
+        compiled.flatValues = self.flatValues.copy()
+        compiled.__view()
+        return compiled
+
+    def set_activations(self, layerActivations=None):
+        super().set_activations(layerActivations)
+        self.__codes = (None, None)
+
+    def codes(self, normalizationFunction=sigmoid):
+        """Kernel activation code of each layer
+
+        Args:
+            normalizationFunction (function, optional): Function for layers without their own. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: Codes, or None if a layer's activation has no kernel
+        """
+        default, codes = self.__codes
+        if default is not normalizationFunction:
+            codes = [ACTIVATION_CODES.get(function) for function in self.layer_functions(normalizationFunction)]
+            codes = None if None in codes else np.array(codes, dtype=np.int64)
+            self.__codes = (normalizationFunction, codes)
+        return codes
+
+    def forward(self, normalizationFunction=sigmoid, profiler=None):
+        codes = self.codes(normalizationFunction)
+        if codes is None or profiler is not None:
+            return super().forward(normalizationFunction, profiler)
+
+        denseForward(self.params, self.shapeArray, codes, self.inputs, self.flatValues)
+        return self.outputs
@@ -1,14 +1,143 @@
+import copy
+import time
 import random
-from neuron import Neuron, Connection, IONeuron
-from defaultFuncs import randomStrength, sigmoid, doProbability
+import numpy as np
+import activations
+import initializers
+from neuron import Neuron, IONeuron
+from defaultFuncs import randomStrength, sigmoid
+from compiled import CompiledNetwork, layerSlices, genomeLength
+from sparse import SparseCompiledNetwork, randomMask, magnitudeMask, parameterMask
+from quantize import QuantizedNetwork, PRECISIONS
+import jit
+from jit import JitCompiledNetwork, BACKENDS
+from storage import packNetwork, unpackNetwork
+from mutation import gaussianMutation
 
 class Layer:
-    def __init__(self, neurons):
+    """A layer of neurons.
+    The layer owns its neurons' biases (one array) and, once the network's
+     connections are built, its weight matrix (one row per neuron, one column
+     per neuron of the previous layer). Both are views into the network's
+     flat parameter buffer, which the compiled form shares.
+    A sparse layer also has a mask of its present connections (see sparse),
+     absent connections keep a weight of 0.
+    """
+    def __init__(self, neurons, activation=None, density=None):
+        """Construct a layer of neurons
+
+        Args:
+            neurons (list[Neuron]): Neurons in the layer
+            activation (string/function, optional): Normalization function for this layer
+                (a name in activations.ACTIVATIONS or a function). Defaults to the one given to Network.start.
+            density (float, optional): Fraction of connections from the previous layer that build_connections
+                creates, picked at random. Defaults to None (fully connected).
+        """
         self.nextLayer = None
-        self.neurons = neurons
+        self.previousLayer = None
+        self.__neurons = neurons
+        # layer a clone's neurons are copied from when first needed,
+        # and their values when cloned (see clone)
+        self.__source = None
+        self.__values = None
+        self.activation = activation
+        self.density = density
+        # (outputs, inputs) bool array of present connections, None when fully connected
+        self.mask = None
+
+        self.biases = np.array([neuron.bias for neuron in neurons], dtype=float)
+        self.weights = None
+        # flat parameter buffer and (weights, biases) slices, once connections are built
+        self.params = None
+        self.slices = None
+
+        for index, neuron in enumerate(neurons):
+            neuron.layer = self
+            neuron.index = index
     
+    @property
+    def neurons(self):
+        if self.__neurons is None:
+            self.__neurons = []
+            for index, (neuron, value) in enumerate(zip(self.__source.neurons, self.__values)):
+                name = neuron.name
+                neuron = copy.copy(neuron)
+                neuron.name = name
+                neuron.value = value
+                neuron.layer = self
+                neuron.index = index
+                self.__neurons.append(neuron)
+            self.__source = self.__values = None
+        return self.__neurons
+
+    @neurons.setter
+    def neurons(self, neurons):
+        self.__neurons = neurons
+        self.__source = self.__values = None
+
+    def clone(self, params=None):
+        """Copy of the layer viewing another parameter buffer.
+        The activation and mask are shared, and its neurons are only copied when first used,
+         with the values they had when the layer was cloned.
+
+        Args:
+            params (numpy.ndarray, optional): Flat parameter buffer to view, at the same slices.
+                Defaults to None (for layers without connections, the biases are copied).
+
+        Returns:
+            Layer: Unlinked copy of the layer
+        """
+        layer = Layer.__new__(type(self))
+        layer.__dict__.update(self.__dict__)
+        layer.nextLayer = layer.previousLayer = None
+        layer.__neurons = None
+        if self.__neurons is None:
+            # not copied yet either, so nothing has changed its values
+            layer.__source, layer.__values = self.__source, self.__values
+        else:
+            layer.__source = self
+            layer.__values = [neuron.value for neuron in self.__neurons]
+
+        if params is None:
+            layer.biases = self.biases.copy()
+        else:
+            layer.bind(params, *self.slices)
+        return layer
+
     def set_next_layer(self, nextLayer):
         self.nextLayer = nextLayer
+        nextLayer.previousLayer = self
+    
+    def bind(self, params, weights, biases):
+        """View the layer's weights and biases from a flat parameter buffer
+
+        Args:
+            params (numpy.ndarray): Flat parameter buffer of the network
+            weights (slice): Location of the weights in the buffer
+            biases (slice): Location of the biases in the buffer
+        """
+        self.params = params
+        self.slices = (weights, biases)
+        self.__view()
+    
+    def __view(self):
+        weights, biases = self.slices
+        self.biases = self.params[biases]
+        self.weights = self.params[weights].reshape(len(self.biases), -1)
+    
+    def __getstate__(self):
+        # views would be copied as separate arrays, rebuild them from the buffer instead
+        state = self.__dict__.copy()
+        state["_Layer__neurons"] = self.neurons
+        state["_Layer__source"] = state["_Layer__values"] = None
+        if self.params is not None:
+            del state["weights"], state["biases"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.params is not None:
+            self.__view()
 
 
 class Network:
@@ -19,6 +148,10 @@ class Network:
     3. Add a final output layer
     4. Set inputs
     5. Run
+
+    All weights and biases live in one flat parameter buffer (params),
+    viewed per layer by the layers, neurons and connections.
+    Once built, a network can be compiled for a much faster forward pass (see Network.compile).
     """
     def __init__(self, inputNeurons):
         """Construct a neural network from a given list of input
@@ -27,6 +160,97 @@ class Network:
             inputNeurons (list[IONeuron]): List of input neurons
         """
         self.layers = [Layer(inputNeurons),]
+        self.compiled = None
+        self.params = None
+        # profiling.Profiler collecting timings and layer stats, None to skip profiling
+        self.profiler = None
+
+        # name -> slot of each input neuron, for O(1) lookups by name
+        self.inputIndex = {neuron.name: index for index, neuron in enumerate(self.layers[0].neurons)}
+        self.__outputIndex = None
+    
+    @property
+    def outputIndex(self):
+        """name -> slot of each output neuron, for O(1) lookups by name"""
+        if self.__outputIndex is None or self.__outputIndex[0] is not self.layers[-1]:
+            layer = self.layers[-1]
+            self.__outputIndex = (layer, {neuron.name: index for index, neuron in enumerate(layer.neurons)})
+        return self.__outputIndex[1]
+    
+    @classmethod
+    def from_compiled(cls, compiled):
+        """Construct a compiled network around an existing compiled form.
+        The layers view the compiled parameter buffer, nothing is copied.
+
+        Args:
+            compiled (CompiledNetwork): Compiled form to use (not copied)
+
+        Returns:
+            Network: Compiled network
+        """
+        network = cls([IONeuron(name) for name in compiled.inputNames])
+
+        for size, activation in zip(compiled.shape[1:-1], compiled.activations):
+            network.add_layer(Layer([Neuron(0) for i in range(size)], activation))
+        network.add_layer(Layer([IONeuron(name) for name in compiled.outputNames], compiled.activations[-1]))
+
+        network.params = compiled.params
+        for layer, (weights, biases) in zip(network.layers[1:], layerSlices(compiled.shape)):
+            layer.bind(compiled.params, weights, biases)
+
+        network.compiled = compiled
+        return network
+    
+    def clone(self):
+        """Copy of the network with its own parameter buffer.
+        Only the flat buffer (and compiled buffers) are copied, the topology is shared,
+        and neurons are built only when first used, so cloning is much cheaper than copy.deepcopy.
+
+        Returns:
+            Network: Copy of the network, compiled in the same form if this one is
+        """
+        network = Network.__new__(type(self))
+        network.__dict__.update(self.__dict__)
+
+        network.params = None if self.params is None else self.params.copy()
+        network.layers = [self.layers[0].clone()] + [layer.clone(network.params) for layer in self.layers[1:]]
+        for layer, nextLayer in zip(network.layers, network.layers[1:]):
+            layer.set_next_layer(nextLayer)
+        network.__outputIndex = (network.layers[-1], self.outputIndex)
+
+        if self.compiled is not None:
+            shared = self.compiled.params is self.params
+            network.compiled = self.compiled.clone(network.params if shared else None)
+        return network
+    
+    def clone_from(self, other):
+        """Make this network a copy of another of the same shape, reusing its buffers (see clone)
+
+        Args:
+            other (Network): Network to copy the parameters and connection masks of
+        """
+        if self.params is None or other.params is None:
+            raise ValueError("Can only clone from a network of the same shape with connections built")
+        # sized by the biases, so neurons are not built; equal genome lengths can still be other shapes
+        shape = [len(layer.biases) for layer in self.layers]
+        otherShape = [len(layer.biases) for layer in other.layers]
+        if shape != otherShape:
+            raise ValueError(f"Cannot clone a network of shape {otherShape} into one of shape {shape}")
+
+        np.copyto(self.params, other.params)
+
+        masksChanged = False
+        for layer, otherLayer in zip(self.layers[1:], other.layers[1:]):
+            if layer.mask is not otherLayer.mask:
+                layer.mask = otherLayer.mask
+                masksChanged = True
+
+        if masksChanged and isinstance(self.compiled, SparseCompiledNetwork):
+            compiled = self.compiled
+            self.compile(True, compiled.precision)
+            self.compiled.inputs[:] = compiled.inputs
+        else:
+            self.update_compiled()
     
     def add_layer(self, layer):
         """Add a layer to the neural network
@@ -34,28 +258,218 @@ class Network:
         Args:
             layer (Layer): Layer to add
         """
+        self.decompile()
+        self.layers[-1].set_next_layer(layer)
         self.layers.append(layer)
     
-    def build_connections(self, strengthFunction=randomStrength):
+    def build_connections(self, strengthFunction=randomStrength, initializer=None, rng=None):
         """Construct the connections for the neural network
         This should be completed once all layers are added.
+        Allocates the flat parameter buffer, keeping the neurons' biases.
+        Each layer's weight matrix is filled in one call by an initializer,
+        or, without one, by calling strengthFunction once per weight.
 
         Args:
             strengthFunction (function, optional): Function to generate weights for connections. Defaults to randomStrength.
+            initializer (string/float/array-like/function/list, optional): Weight initializer (see initializers.get),
+                or a list with one per layer after the input layer. Defaults to None (use strengthFunction).
+            rng (numpy.random.Generator/int, optional): Generator or seed for the initializer
+                and the masks of sparse layers. Defaults to None.
         """
+        self.decompile()
+
+        shape = [len(layer.neurons) for layer in self.layers]
+        params = np.empty(genomeLength(shape))
+
+        if initializer is not None:
+            if not isinstance(initializer, list):
+                initializer = [initializer] * (len(shape) - 1)
+            if len(initializer) != len(shape) - 1:
+                raise ValueError(f"Expected {len(shape) - 1} initializers, got {len(initializer)}")
+        rng = np.random.default_rng(rng)
+
         # for each layer (skipping input layer)
-        for layerIndex, layer in enumerate(self.layers[1:]):
-            # accomodate for skipping first layer
-            layerIndex += 1
-
-            # for each output neuron in current layer
-            for outputNeuron in layer.neurons:
-                # print(f"\nLayer {layerIndex} {outputNeuron.name}")
-                # iterate through all input neurons (previous layer)
-                for inputNeuron in self.layers[layerIndex - 1].neurons:
-                    # create a new connection with a base strength
-                    connection = Connection(inputNeuron, strengthFunction(), layerIndex)
-                    outputNeuron.connections.append(connection)
+        for layerIndex, (layer, (weights, biases)) in enumerate(zip(self.layers[1:], layerSlices(shape))):
+            params[biases] = layer.biases
+            matrixShape = (shape[layerIndex + 1], shape[layerIndex])
+
+            # one weight per (output neuron, input neuron), row by row
+            if initializer is not None:
+                params[weights] = initializers.get(initializer[layerIndex])(matrixShape, rng).ravel()
+            else:
+                count = weights.stop - weights.start
+                params[weights] = np.fromiter((strengthFunction() for i in range(count)), dtype=float, count=count)
+            layer.bind(params, weights, biases)
+
+            layer.mask = None if layer.density is None else randomMask(matrixShape, layer.density, rng)
+            if layer.mask is not None:
+                layer.weights[~layer.mask] = 0
+        
+        self.params = params
+    
+    def compile(self, sparse=False, precision="float64", backend="numpy"):
+        """Run the network as per-layer weight matrices and bias vectors.
+        The compiled form shares the network's parameter buffer, so weights and biases
+        stay in sync both ways. While compiled, start() runs as a chain of matrix products
+        and set_inputs/get_outputs/get_highest_output work against the compiled form.
+        Changing the layers (add_layer, build_connections) drops the compiled form,
+        so compile again afterwards.
+
+        The sparse compiled form (see sparse.SparseCompiledNetwork) only stores and multiplies
+        the connections present in the layers' masks. Reduced precisions (float32, or int8 with
+        per-layer scales, see quantize) store the parameters in 4 or 1 bytes instead of 8.
+        These forms hold a copy of the parameters, refreshed by set_parameters, mutate and prune;
+        after writing weights any other way, call update_compiled.
+
+        The numba backend (see jit.JitCompiledNetwork) runs the whole forward pass as one
+        compiled kernel. It is dense float only, and without numba installed the NumPy form is used.
+
+        Args:
+            sparse (bool, optional): Compile into the sparse form. Defaults to False.
+            precision (string, optional): One of quantize.PRECISIONS, int8 is dense only. Defaults to "float64".
+            backend (string, optional): One of jit.BACKENDS. Defaults to "numpy".
+
+        Returns:
+            Network: The network itself
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {', '.join(PRECISIONS)}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+        if backend == "numba" and (sparse or precision == "int8"):
+            raise ValueError("The numba backend only supports the dense float64/float32 form")
+
+        if precision == "int8":
+            if sparse:
+                raise ValueError("The sparse compiled form does not support int8")
+            self.compiled = QuantizedNetwork.from_network(self)
+        elif sparse:
+            self.compiled = SparseCompiledNetwork.from_network(self, np.dtype(precision))
+        elif backend == "numba" and jit.AVAILABLE:
+            self.compiled = JitCompiledNetwork.from_network(self, np.dtype(precision))
+        else:
+            self.compiled = CompiledNetwork.from_network(self, np.dtype(precision))
+        return self
+    
+    def update_compiled(self):
+        """Refresh a sparse or reduced-precision compiled form from the parameter buffer
+        (a dense float64 compiled form shares the buffer, so there is nothing to do).
+        """
+        if self.compiled is not None and self.compiled.params is not self.params:
+            self.compiled.gather(self.params)
+    
+    def masks(self):
+        """Connection mask of each layer after the input layer
+
+        Returns:
+            list[numpy.ndarray]: (outputs, inputs) bool array per layer, None for fully connected layers
+        """
+        return [layer.mask for layer in self.layers[1:]]
+    
+    def parameter_mask(self):
+        """Flat mask of the parameters that exist (see sparse.parameterMask)
+
+        Returns:
+            numpy.ndarray: (genomeLength,) bool array, or None if every layer is fully connected
+        """
+        # sized by the biases, so a clone's neurons are not built
+        return parameterMask([len(layer.biases) for layer in self.layers], self.masks())
+    
+    def prune(self, fraction=None, threshold=None):
+        """Remove the smallest connections of every layer by magnitude.
+        Removed connections get a weight of 0 and are skipped by mutation and the sparse compiled form.
+        A compiled form that holds a copy of the parameters is rebuilt.
+
+        Args:
+            fraction (float, optional): Fraction of each layer's present connections to remove. Defaults to None.
+            threshold (float, optional): Remove connections with |weight| <= threshold. Defaults to None.
+        """
+        for layer in self.layers[1:]:
+            layer.mask = magnitudeMask(layer.weights, fraction, threshold, layer.mask)
+            layer.weights[~layer.mask] = 0
+
+        if self.compiled is not None and self.compiled.params is not self.params:
+            compiled = self.compiled
+            self.compile(isinstance(compiled, SparseCompiledNetwork), compiled.precision, compiled.backend)
+            self.compiled.inputs[:] = compiled.inputs
+    
+    def decompile(self):
+        """Drop the compiled form, going back to running neuron by neuron.
+        Input values are copied back into the input neurons.
+        """
+        if self.compiled is None:
+            return
+
+        for inputNeuron, value in zip(self.layers[0].neurons, self.compiled.inputs.tolist()):
+            inputNeuron.value = value
+        self.compiled = None
+    
+    def get_parameters(self):
+        """Get every weight and bias as one flat array.
+        Layout matches CompiledNetwork: for each layer after the input layer,
+        the weights row by row (one row per neuron) followed by the biases.
+
+        Returns:
+            numpy.ndarray: Flat parameter array
+        """
+        return self.params.copy()
+    
+    def set_parameters(self, params):
+        """Set every weight and bias from one flat array (see get_parameters)
+
+        Args:
+            params (array-like): Flat parameter array
+        """
+        self.params[:] = params
+        self.update_compiled()
+    
+    def to_bytes(self, dtype=np.float64):
+        """Serialize the network: a topology header followed by one contiguous block of weights and biases
+
+        Args:
+            dtype (numpy.dtype, optional): Storage precision, float32 or float64. Defaults to np.float64.
+
+        Returns:
+            bytes: Serialized network
+        """
+        return packNetwork(self.get_compiled(), dtype)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a network serialized by to_bytes. The network comes back compiled.
+
+        Args:
+            data (bytes/bytearray): Serialized network (a bytearray is used without copying)
+
+        Returns:
+            Network: Loaded network
+        """
+        shape, inputNames, outputNames, params, layerActivations = unpackNetwork(data)
+        return cls.from_compiled(CompiledNetwork(shape, inputNames, outputNames, params, layerActivations))
+    
+    def save(self, path, dtype=np.float64):
+        """Save the network to a file (see to_bytes)
+
+        Args:
+            path (string): File to write
+            dtype (numpy.dtype, optional): Storage precision, float32 or float64. Defaults to np.float64.
+        """
+        with open(path, "wb") as f:
+            f.write(self.to_bytes(dtype))
+    
+    @classmethod
+    def load(cls, path):
+        """Load a network saved with save(), in a single read
+
+        Args:
+            path (string): File to read
+
+        Returns:
+            Network: Loaded, compiled network
+        """
+        with open(path, "rb") as f:
+            data = bytearray(f.read())
+        return cls.from_bytes(data)
     
     def set_inputs(self, values):
         """Set the inputs for the neural network
@@ -63,6 +477,12 @@ class Network:
         Args:
             values (list[float/int]): List of inputs
         """
+        if self.compiled is not None:
+            inputs = self.compiled.inputs
+            n = min(len(values), len(inputs))
+            inputs[:n] = values[:n]
+            return
+
         for inputNeuron, value in zip(self.layers[0].neurons, values):
             inputNeuron.value = value
     
@@ -73,30 +493,157 @@ class Network:
             name (string): Name of input neuron
             value (float): Value to set it to
         """
-        for inputNeuron in self.layers[0].neurons:
-            if inputNeuron.name == name:
-                inputNeuron.value = value
-                return
+        index = self.inputIndex.get(name)
+        if index is None:
+            return
+
+        self.layers[0].neurons[index].value = value
+        if self.compiled is not None:
+            self.compiled.inputs[index] = value
+    
+    def set_inputs_from(self, values):
+        """Set inputs by name
+
+        Args:
+            values (dict[string, float]): Value for each input neuron name
+        """
+        plan = self.input_plan(values.keys())
+        self.set_planned_inputs(plan, list(values.values()))
+    
+    def input_plan(self, names):
+        """Resolve input names to slots once, for use with set_planned_inputs
+
+        Args:
+            names (iterable[string]): Input neuron names, in the order values will be given
+
+        Returns:
+            numpy.ndarray: Slot index of each name
+        """
+        try:
+            return np.array([self.inputIndex[name] for name in names], dtype=np.intp)
+        except KeyError as e:
+            raise KeyError(f"No input neuron named {e.args[0]!r}") from None
+    
+    def set_planned_inputs(self, plan, values):
+        """Set inputs using slots from input_plan.
+        When compiled this is a single write into the input buffer.
+
+        Args:
+            plan (numpy.ndarray): Slot indices from input_plan
+            values (array-like): One value per slot
+        """
+        if self.compiled is not None:
+            self.compiled.inputs[plan] = values
+            return
+
+        neurons = self.layers[0].neurons
+        for index, value in zip(plan.tolist(), np.asarray(values, dtype=float).tolist()):
+            neurons[index].value = value
+    
+    def input_buffer(self):
+        """Contiguous input buffer of the compiled network, to write inputs into directly
+
+        Returns:
+            numpy.ndarray: Input buffer, one slot per input neuron (see inputIndex)
+        """
+        if self.compiled is None:
+            raise RuntimeError("Network must be compiled to use its input buffer")
+        return self.compiled.inputs
     
     def start(self, normalizationFunction=sigmoid):
         """Run the neural network.
         For each layer it will iterate through every neuron.
         For every neuron, it will have given connections from the previous layer.
         The output is derived from calculating the weighted sum of the previous neurons * their respective weight
-        + the current neuron's bias, all of which is passed through a given normalization function.
+        + the current neuron's bias, all of which is passed through a given normalization function
+        (or the layer's own activation, if it has one).
+        With a profiler attached, every layer is timed and its values recorded.
 
         Args:
             normalizationFunction (function, optional): Function to normalize outputs. Defaults to sigmoid.
         """
+        profiler = self.profiler
+        if self.compiled is not None:
+            self.compiled.forward(normalizationFunction, profiler)
+            return
+
+        values = np.array([neuron.value for neuron in self.layers[0].neurons], dtype=float)
+
         # for each layer (skipping input layer)
-        for layerIndex, layer in enumerate(self.layers[1:]):
-            # accomodate for skipping first layer
-            layerIndex += 1
+        for layerIndex, layer in enumerate(self.layers[1:], 1):
+            if profiler is not None:
+                profiler.before_layer(self, layerIndex, values)
+                start = time.perf_counter()
+
+            # weighted sums of the whole layer at once
+            values = layer.weights @ values + layer.biases
 
-            # for each output neuron in the current layer
-            for outputNeuron in layer.neurons:
-                # calculate an output passed through a normalizing function
-                outputNeuron.activate(normalizationFunction)
+            if layer.activation is not None:
+                # normalize the whole layer at once with its own activation
+                values = activations.get(layer.activation)(values)
+            else:
+                # normalize each output neuron in the current layer
+                values = np.array([normalizationFunction(value) for value in values.tolist()], dtype=float)
+
+            for outputNeuron, value in zip(layer.neurons, values.tolist()):
+                outputNeuron.value = value
+
+            if profiler is not None:
+                profiler.add_time(f"layer{layerIndex}", time.perf_counter() - start)
+                profiler.after_layer(self, layerIndex, values)
+    
+    def forward_batch(self, X, normalizationFunction=sigmoid):
+        """Run the network on many input vectors in one call.
+        Neuron values are not touched. Uses the compiled form if there is one,
+        otherwise a temporary one is built (so compile first when calling repeatedly).
+
+        Args:
+            X (array-like): (N, inputs) array, one input vector per row
+            normalizationFunction (function, optional): Function to normalize outputs. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (N, outputs) array, one output vector per row
+        """
+        return self.get_compiled().forward_batch(X, normalizationFunction)
+    
+    def highest_output_indices(self, X, normalizationFunction=sigmoid):
+        """Index of the highest output for each input vector
+
+        Args:
+            X (array-like): (N, inputs) array, one input vector per row
+            normalizationFunction (function, optional): Function to normalize outputs. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (N,) array of output neuron indices
+        """
+        return self.forward_batch(X, normalizationFunction).argmax(axis=1)
+    
+    def get_highest_outputs(self, X, normalizationFunction=sigmoid):
+        """Batched get_highest_output
+
+        Args:
+            X (array-like): (N, inputs) array, one input vector per row
+            normalizationFunction (function, optional): Function to normalize outputs. Defaults to sigmoid.
+
+        Returns:
+            list[list]: [name, value] of the highest output neuron for each input vector
+        """
+        outputs = self.forward_batch(X, normalizationFunction)
+        indices = outputs.argmax(axis=1)
+        names = self.get_compiled().outputNames
+        values = outputs[np.arange(len(outputs)), indices]
+
+        return [[names[i], v] for i, v in zip(indices.tolist(), values.tolist())]
+    
+    def get_compiled(self):
+        """Get the dense compiled form, building a temporary one if the network is not compiled densely
+
+        Returns:
+            CompiledNetwork: Compiled form of the network, sharing its parameter buffer
+        """
+        if self.compiled is not None and self.compiled.params is self.params:
+            return self.compiled
+        return CompiledNetwork.from_network(self)
     
     def get_outputs(self):
         """Receive an iterator of all output neurons
@@ -104,9 +651,38 @@ class Network:
         Returns:
             iterator: Iterator containing output neurons
         """
+        if self.compiled is not None:
+            # only the output neurons are kept up to date
+            for outputNeuron, value in zip(self.layers[-1].neurons, self.compiled.outputs.tolist()):
+                outputNeuron.value = value
+
         return iter(self.layers[-1].neurons)
     
+    def get_output(self, name):
+        """Value of a single output neuron
+
+        Args:
+            name (string): Name of output neuron
+
+        Returns:
+            float: Value of the output neuron
+        """
+        index = self.outputIndex[name]
+        if self.compiled is not None:
+            return float(self.compiled.outputs[index])
+        return self.layers[-1].neurons[index].value
+    
     def get_highest_output(self):
+        """Find the output neuron with the highest value
+
+        Returns:
+            list: [name, value] of the highest output neuron
+        """
+        if self.compiled is not None:
+            outputs = self.compiled.outputs
+            index = int(outputs.argmax())
+            return [self.compiled.outputNames[index], float(outputs[index])]
+
         highest = [None, float('-inf')]
 
         for outputNeuron in self.get_outputs():
@@ -115,26 +691,35 @@ class Network:
         
         return highest
     
-    def mutate(self, chance, standardDeviation):
-        """Mutate each neuron biases and weights
+    def mutate(self, chance, standardDeviation, rng=None):
+        """Mutate each neuron biases and weights.
+        The flat parameter buffer is mutated with one mask and
+        one gaussian draw per layer (see mutation.gaussianMutation).
 
         Args:
             chance (float): Mutation rate (0.0 to 1.0)
-            standardDeviation (float): Standard deviation for gaussian number
+            standardDeviation (float/list[float]): Standard deviation for gaussian number, or one per layer
+            rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None
+                (seeded from the random module, so random.seed still makes mutation repeatable).
         """
-        # for each layer (skipping input layer)
-        for layer in self.layers[1:]:
-            # for each neuron, have a chance to modify:
-            # - bias
-            # - each connection
+        if self.profiler is not None:
+            with self.profiler.timer("mutate"):
+                self.__mutate(chance, standardDeviation, rng)
+            return
 
-            for neuron in layer.neurons:
-                if doProbability(chance):
-                    neuron.bias += random.gauss(0, standardDeviation)
-            
-                for connection in neuron.connections:
-                    if doProbability(chance):
-                        connection.weight += random.gauss(0, standardDeviation)
+        self.__mutate(chance, standardDeviation, rng)
+    
+    def __mutate(self, chance, standardDeviation, rng):
+        if self.params is None:
+            raise ValueError("Connections must be built before mutating")
+
+        if rng is None:
+            rng = random.getrandbits(64)
+
+        # sized by the biases, like parameter_mask
+        shape = [len(layer.biases) for layer in self.layers]
+        gaussianMutation(self.params, shape, chance, standardDeviation, rng, self.parameter_mask())
+        self.update_compiled()
     
     def __str__(self):
         s = ""
@@ -0,0 +1,150 @@
+import numpy as np
+from compiled import layerSlices
+
+def layerBlocks(shape):
+    """Slices covering each layer's weights and biases together
+
+    Args:
+        shape (tuple[int]): Number of neurons in each layer
+
+    Returns:
+        list[slice]: One slice per layer after the input layer
+    """
+    return [slice(weights.start, biases.stop) for weights, biases in layerSlices(shape)]
+
+
+# below this chance, the mutated genes are drawn directly instead of drawing a number for every gene
+SPARSE_CHANCE = 0.25
+
+def bernoulliIndices(count, chance, rng):
+    """Indices of the successes of `count` independent trials that each succeed with `chance`.
+    The gaps between successes are geometric, drawn from exponential numbers, so the cost
+     is proportional to the number of successes instead of the number of trials.
+
+    Args:
+        count (int): Number of trials
+        chance (float): Chance of each trial succeeding (0.0 to 1.0)
+        rng (numpy.random.Generator): Generator
+
+    Returns:
+        numpy.ndarray: Sorted int64 indices
+    """
+    if count == 0 or chance <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if chance >= 1:
+        return np.arange(count, dtype=np.int64)
+
+    # gaps of floor(E / -log(1 - chance)) + 1 are geometric with success chance `chance`
+    scale = -1 / np.log1p(-chance)
+    expected = count * chance
+    # enough gaps to reach the end almost always, more are drawn if they fall short
+    draws = int(expected + 5 * np.sqrt(expected) + 16)
+
+    def gaps():
+        return (rng.standard_exponential(draws) * scale).astype(np.int64) + 1
+
+    indices = np.cumsum(gaps()) - 1
+    while indices[-1] < count:
+        indices = np.concatenate((indices, np.cumsum(gaps()) + indices[-1]))
+
+    return indices[:np.searchsorted(indices, count)]
+
+
+def mutationIndices(params, shape, chance, rng, mask=None, layers=True):
+    """Flat indices of the genes to mutate, and the layer of each
+
+    Args:
+        params (numpy.ndarray): (genomeLength,) or (P, genomeLength) parameter buffer
+        shape (tuple[int]): Number of neurons in each layer
+        chance (float): Mutation rate (0.0 to 1.0)
+        rng (numpy.random.Generator): Generator
+        mask (numpy.ndarray, optional): (genomeLength,) bool array of genes that can mutate. Defaults to None.
+        layers (bool, optional): Find the layer of each gene. Defaults to True.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Indices into params.ravel(), and the layer index
+            of each (None without layers)
+    """
+    indices = bernoulliIndices(params.size, chance, rng)
+    if mask is None and not layers:
+        return indices, None
+
+    genes = indices % params.shape[-1]
+    if mask is not None:
+        keep = mask[genes]
+        indices, genes = indices[keep], genes[keep]
+    if not layers:
+        return indices, None
+
+    blocks = layerBlocks(shape)
+    layerOf = np.repeat(np.arange(len(blocks)), [block.stop - block.start for block in blocks])
+    return indices, layerOf[genes]
+
+
+def gaussianMutation(params, shape, chance, standardDeviation, rng=None, mask=None):
+    """Mutate a flat parameter buffer in place.
+    Every weight and bias has a `chance` of getting a gaussian number added to it,
+     like Network.mutate, but using array operations over every layer at once.
+    At low chances, only the mutated genes are drawn (see bernoulliIndices),
+     otherwise one mask and one gaussian draw per layer are used.
+
+    Args:
+        params (numpy.ndarray): (genomeLength,) or (P, genomeLength) parameter buffer
+        shape (tuple[int]): Number of neurons in each layer
+        chance (float): Mutation rate (0.0 to 1.0)
+        standardDeviation (float/list[float]): Standard deviation for gaussian number, or one per layer
+        rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+        mask (numpy.ndarray, optional): (genomeLength,) bool array, only True parameters are mutated
+            (see sparse.parameterMask). Defaults to None (every parameter).
+    """
+    rng = np.random.default_rng(rng)
+    blocks = layerBlocks(shape)
+
+    if np.ndim(standardDeviation) == 0:
+        standardDeviation = [standardDeviation] * len(blocks)
+    elif len(standardDeviation) != len(blocks):
+        raise ValueError(f"Expected {len(blocks)} standard deviations, got {len(standardDeviation)}")
+
+    if chance < SPARSE_CHANCE and params.flags.c_contiguous:
+        single = len(set(standardDeviation)) == 1
+        indices, layers = mutationIndices(params, shape, chance, rng, mask, layers=not single)
+        noise = rng.standard_normal(len(indices), dtype=np.float32 if params.dtype == np.float32 else np.float64)
+        noise *= standardDeviation[0] if single else np.asarray(standardDeviation, dtype=noise.dtype)[layers]
+        # indices are unique, so this is params.ravel()[indices] += noise without the gather
+        np.add.at(params.reshape(-1), indices, noise)
+        return
+
+    for block, deviation in zip(blocks, standardDeviation):
+        layer = params[..., block]
+        mutated = rng.random(layer.shape) < chance
+        if mask is not None:
+            mutated &= mask[block]
+        layer[mutated] += rng.normal(0, deviation, np.count_nonzero(mutated))
+
+
+def resetMutation(params, shape, chance, rng=None, low=-1, high=1, mask=None):
+    """Replace parameters in place with fresh uniform numbers.
+    Every weight and bias has a `chance` of being redrawn, which matches randomStrength by default.
+
+    Args:
+        params (numpy.ndarray): (genomeLength,) or (P, genomeLength) parameter buffer
+        shape (tuple[int]): Number of neurons in each layer
+        chance (float): Reset rate (0.0 to 1.0)
+        rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+        low (float, optional): Lowest new value. Defaults to -1.
+        high (float, optional): Highest new value. Defaults to 1.
+        mask (numpy.ndarray, optional): (genomeLength,) bool array, only True parameters are reset. Defaults to None.
+    """
+    rng = np.random.default_rng(rng)
+
+    if chance < SPARSE_CHANCE and params.flags.c_contiguous:
+        indices, _ = mutationIndices(params, shape, chance, rng, mask, layers=False)
+        params.reshape(-1)[indices] = rng.uniform(low, high, len(indices))
+        return
+
+    for block in layerBlocks(shape):
+        layer = params[..., block]
+        reset = rng.random(layer.shape) < chance
+        if mask is not None:
+            reset &= mask[block]
+        layer[reset] = rng.uniform(low, high, np.count_nonzero(reset))
@@ -1,11 +1,17 @@
+import numpy as np
 from defaultFuncs import randomName
 
 class Neuron:
     """A singular neuron.
     Contains a value and a bias, and should be in a layer.
     It can optionally be given a name, but all non-named neurons
-     will have randomly generated names.
+     will have randomly generated names (generated the first time the name is read).
+
+    Once in a layer, the bias is stored in the layer's bias array
+     and the neuron's connections are views into the layer's weight matrix.
     """
+    __slots__ = ("value", "layer", "index", "_bias", "_name")
+
     def __init__(self, bias, value=0, name=None):
         """Construct a singular neuron.
 
@@ -15,30 +21,63 @@ class Neuron:
             name (string, optional): Unique name of the neuron. Defaults to None.
         """
         self.value = value
-        self.bias = bias
-        
-        # connections *to* this neuron
-        self.connections = []
-        
-        if name:
-            self.name = name
+        self._bias = bias
+        self._name = name or None
+
+        # set when added to a layer
+        self.layer = None
+        self.index = None
+
+    @property
+    def name(self):
+        if self._name is None:
+            self._name = "Neuron-" + randomName(n=4)
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @property
+    def bias(self):
+        if self.layer is None:
+            return self._bias
+        return float(self.layer.biases[self.index])
+
+    @bias.setter
+    def bias(self, bias):
+        if self.layer is None:
+            self._bias = bias
         else:
-            self.name = "Neuron-" + randomName(n=4)
-    
+            self.layer.biases[self.index] = bias
+
+    @property
+    def connections(self):
+        """Connections *to* this neuron, viewing into the layer's weight matrix"""
+        return ConnectionList(self.layer, self.index)
+
     def get_name(self):
         return self.name
-    
+
+    def weighted_sum(self):
+        """Weighted sum of the connected neurons plus the bias
+
+        Returns:
+            float: Value before normalization
+        """
+        if self.layer is None or self.layer.weights is None:
+            return self.bias
+
+        inputs = [neuron.value for neuron in self.layer.previousLayer.neurons]
+        return float(np.dot(self.layer.weights[self.index], inputs)) + self.bias
+
     def activate(self, normalizationFunction):
         """Set the value of the neuron based off of its connections
 
         Args:
             normalizationFunction (function): Function to normalize with
         """
-        # calculate weighted sum
-        self.value = normalizationFunction(sum([
-            connection.neuronFrom.value * connection.weight
-            for connection in self.connections
-        ]) + self.bias)
+        self.value = normalizationFunction(self.weighted_sum())
 
         # if self.value < 0:
         #     self.value = 0
@@ -50,19 +89,62 @@ class Neuron:
 class IONeuron(Neuron):
     """Either input or output neurons
     """
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__(0, name=name)
 
 
 class Connection:
-    """The connection from one neuron in layer n to another neuron in layer (n+1)
-    Contains a weight and a target layer (for debugging)
+    """The connection from one neuron in layer n to another neuron in layer (n+1).
+    A view of one entry of the weight matrix of layer (n+1): (row, column) is
+     (index of the neuron it goes to, index of the neuron it comes from).
     """
-    def __init__(self, neuronFrom, weight, fromLayer):
-        self.neuronFrom = neuronFrom
-        self.weight = weight
-        self.fromLayer = fromLayer + 1
-        self.toLayer = fromLayer + 2
-    
+    __slots__ = ("layer", "row", "column")
+
+    def __init__(self, layer, row, column):
+        self.layer = layer
+        self.row = row
+        self.column = column
+
+    @property
+    def weight(self):
+        return float(self.layer.weights[self.row, self.column])
+
+    @weight.setter
+    def weight(self, weight):
+        self.layer.weights[self.row, self.column] = weight
+
+    @property
+    def neuronFrom(self):
+        return self.layer.previousLayer.neurons[self.column]
+
+    @property
+    def neuronTo(self):
+        return self.layer.neurons[self.row]
+
     def __str__(self):
-        return f"[{self.weight:<5}] {self.neuronTo.get_name()}[{self.toLayer}]"
\ No newline at end of file
+        return f"[{self.weight:<5}] {self.neuronFrom.get_name()} -> {self.neuronTo.get_name()}"
+
+
+class ConnectionList:
+    """Sequence of the connections to one neuron, created on access"""
+    __slots__ = ("layer", "row")
+
+    def __init__(self, layer, row):
+        self.layer = layer
+        self.row = row
+
+    def __len__(self):
+        if self.layer is None or self.layer.weights is None:
+            return 0
+        return self.layer.weights.shape[1]
+
+    def __getitem__(self, column):
+        if not -len(self) <= column < len(self):
+            raise IndexError("connection index out of range")
+        return Connection(self.layer, self.row, column % len(self))
+
+    def __iter__(self):
+        for column in range(len(self)):
+            yield Connection(self.layer, self.row, column)
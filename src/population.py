@@ -0,0 +1,218 @@
+import time
+import numpy as np
+import initializers
+from defaultFuncs import sigmoid
+from compiled import layerSlices, genomeLength
+from mutation import gaussianMutation, resetMutation
+
+class Population:
+    """P networks of the same shape, evaluated together.
+    The parameters of every network are stacked into one (P, genomeLength) array,
+     with each layer exposed as a (P, outputs, inputs) weight tensor
+     and a (P, outputs) bias array viewing into it.
+    A single forward pass runs every network on its own input vector.
+    Genomes can be stored as float32 to fit twice as many networks in memory.
+    """
+    def __init__(self, template, genomes, dtype=None):
+        """Construct a population from a template network and stacked parameters
+
+        Args:
+            template (Network): Network giving the shape and input/output names
+            genomes (numpy.ndarray): (P, genomeLength) array, one flat parameter array per network
+            dtype (numpy.dtype, optional): float64 or float32 storage.
+                Defaults to the type of genomes if it is a floating point type, else float64.
+        """
+        self.template = template
+        compiled = template.get_compiled()
+        self.shape = compiled.shape
+        self.inputNames = compiled.inputNames
+        self.outputNames = compiled.outputNames
+        self.compiled = compiled
+
+        genomes = np.asarray(genomes)
+        if dtype is None:
+            dtype = genomes.dtype if genomes.dtype in (np.float32, np.float64) else np.float64
+        self.genomes = np.ascontiguousarray(genomes, dtype=dtype)
+        if self.genomes.shape[1:] != (genomeLength(self.shape),):
+            raise ValueError(
+                f"Genomes of length {self.genomes.shape[1:]} do not fit a network of shape {self.shape}"
+            )
+        size = len(self.genomes)
+
+        self.weights = []
+        self.biases = []
+        for (weights, biases), inputs, outputs in zip(
+            layerSlices(self.shape), self.shape[:-1], self.shape[1:]
+        ):
+            self.weights.append(self.genomes[:, weights].reshape(size, outputs, inputs))
+            self.biases.append(self.genomes[:, biases])
+
+        # parameters that exist in the template's sparse layers, None if fully connected
+        self.mask = template.parameter_mask()
+
+        # one input vector per network
+        self.inputs = np.zeros((size, self.shape[0]), dtype=dtype)
+        self.outputs = np.zeros((size, self.shape[-1]), dtype=dtype)
+
+        # profiling.Profiler collecting timings and layer stats, None to skip profiling
+        self.profiler = None
+
+    @classmethod
+    def initialize(cls, template, size, initializer="uniform", rng=None, dtype=np.float64):
+        """Create a population with freshly initialized weights, without copying any networks.
+        Every layer's (size, outputs, inputs) weights are drawn in one call,
+         the biases are copied from the template.
+
+        Args:
+            template (Network): Network giving the shape and input/output names
+            size (int): Number of networks
+            initializer (string/float/function/list, optional): Weight initializer (see initializers.get),
+                or a list with one per layer after the input layer. Defaults to "uniform".
+            rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+            dtype (numpy.dtype, optional): float64 or float32 storage. Defaults to float64.
+
+        Returns:
+            Population: New population
+        """
+        population = cls(template, np.empty((size, len(template.params)), dtype=dtype))
+
+        layers = len(population.shape) - 1
+        if not isinstance(initializer, list):
+            initializer = [initializer] * layers
+        if len(initializer) != layers:
+            raise ValueError(f"Expected {layers} initializers, got {len(initializer)}")
+        rng = np.random.default_rng(rng)
+
+        for weights, biases, layer, layerInitializer in zip(
+            population.weights, population.biases, template.layers[1:], initializer
+        ):
+            weights[:] = initializers.get(layerInitializer)(weights.shape, rng)
+            biases[:] = layer.biases
+
+            if layer.mask is not None:
+                weights[:, ~layer.mask] = 0
+
+        return population
+
+    @classmethod
+    def from_networks(cls, networks):
+        """Stack the parameters of a list of same-shaped networks
+
+        Args:
+            networks (list[Network]): Networks with connections built
+
+        Returns:
+            Population: Population holding a copy of every network's parameters
+        """
+        return cls(networks[0], np.stack([network.get_parameters() for network in networks]))
+
+    def input_plan(self, names):
+        """Resolve input names to columns of the input buffer (see Network.input_plan)
+
+        Args:
+            names (iterable[string]): Input neuron names, in the order values will be given
+
+        Returns:
+            numpy.ndarray: Column index of each name
+        """
+        return self.template.input_plan(names)
+
+    def __len__(self):
+        return len(self.genomes)
+
+    def forward(self, X=None, normalizationFunction=sigmoid):
+        """Run every network on its own input vector
+
+        Args:
+            X (array-like, optional): (P, inputs) array. Defaults to the input buffer.
+            normalizationFunction (function, optional): Function to normalize outputs. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (P, outputs) output buffer
+        """
+        x = self.inputs if X is None else np.asarray(X, dtype=self.genomes.dtype)
+        if self.profiler is not None:
+            return self.__forward_profiled(x, normalizationFunction, self.profiler)
+
+        for weights, biases, function in zip(self.weights, self.biases, self.functions(normalizationFunction)):
+            x = np.matmul(weights, x[:, :, None])[:, :, 0]
+            x += biases
+            x = function(x, out=x)
+
+        self.outputs[:] = x
+        return self.outputs
+
+    def __forward_profiled(self, x, normalizationFunction, profiler):
+        start = time.perf_counter()
+
+        for layerIndex, (weights, biases, function) in enumerate(
+            zip(self.weights, self.biases, self.functions(normalizationFunction)), 1
+        ):
+            profiler.before_layer(self, layerIndex, x)
+            layerStart = time.perf_counter()
+
+            x = np.matmul(weights, x[:, :, None])[:, :, 0]
+            x += biases
+            x = function(x, out=x)
+
+            profiler.add_time(f"layer{layerIndex}", time.perf_counter() - layerStart)
+            profiler.after_layer(self, layerIndex, x)
+
+        self.outputs[:] = x
+        profiler.add_time("forward", time.perf_counter() - start)
+        return self.outputs
+
+    def functions(self, normalizationFunction=sigmoid):
+        # activation of each layer, as declared by the template's layers
+        return self.compiled.layer_functions(normalizationFunction)
+
+    def highest_output_indices(self, X=None, normalizationFunction=sigmoid):
+        """Index of the highest output of each network
+
+        Args:
+            X (array-like, optional): (P, inputs) array. Defaults to the input buffer.
+            normalizationFunction (function, optional): Function to normalize outputs. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (P,) array of output neuron indices
+        """
+        return self.forward(X, normalizationFunction).argmax(axis=1)
+
+    def mutate(self, chance, standardDeviation, rng=None):
+        """Mutate every network's biases and weights (see mutation.gaussianMutation)
+
+        Args:
+            chance (float): Mutation rate (0.0 to 1.0)
+            standardDeviation (float/list[float]): Standard deviation for gaussian number, or one per layer
+            rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+        """
+        if self.profiler is not None:
+            with self.profiler.timer("mutate"):
+                gaussianMutation(self.genomes, self.shape, chance, standardDeviation, rng, self.mask)
+            return
+
+        gaussianMutation(self.genomes, self.shape, chance, standardDeviation, rng, self.mask)
+
+    def reset_mutate(self, chance, rng=None, low=-1, high=1):
+        """Redraw random biases and weights of every network (see mutation.resetMutation)
+
+        Args:
+            chance (float): Reset rate (0.0 to 1.0)
+            rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+            low (float, optional): Lowest new value. Defaults to -1.
+            high (float, optional): Highest new value. Defaults to 1.
+        """
+        resetMutation(self.genomes, self.shape, chance, rng, low, high, self.mask)
+
+    def get_network(self, index):
+        """Build a standalone network from one member of the population
+
+        Args:
+            index (int): Index of the network
+
+        Returns:
+            Network: Copy of the template holding that member's parameters
+        """
+        network = self.template.clone()
+        network.set_parameters(self.genomes[index])
+        return network
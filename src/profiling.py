@@ -0,0 +1,136 @@
+"""Opt-in instrumentation of the hot paths.
+A Profiler is attached by setting the `profiler` attribute of a Network or Population
+(None by default, which skips all of it). It collects:
+ - timers: call count and total seconds, e.g. per layer of the forward pass
+ - counters: plain event counts
+ - layer stats: value range and how many values are saturated after each layer's activation
+and runs hooks before and after every layer of a forward pass.
+"""
+import json
+import time
+import contextlib
+import numpy as np
+
+class Profiler:
+    def __init__(self, saturation=(0.01, 0.99)):
+        """Construct an empty profiler
+
+        Args:
+            saturation (tuple[float, float], optional): Activated values at or outside (low, high)
+                count as saturated. Defaults to (0.01, 0.99), the flat ends of sigmoid.
+        """
+        self.low, self.high = saturation
+
+        # functions (owner, layerIndex, values) called around every layer of a forward pass
+        self.beforeLayer = []
+        self.afterLayer = []
+
+        self.reset()
+
+    def reset(self):
+        """Clear every timer, counter and layer stat (hooks are kept)"""
+        self.timers = {}
+        self.counters = {}
+        # layer index -> [values, saturated, sum, min, max]
+        self.layers = {}
+
+    def add_time(self, name, seconds):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += 1
+        timer[1] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Time a block of code
+
+        Args:
+            name (string): Timer to add to
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def before_layer(self, owner, layerIndex, values):
+        """Run the before-layer hooks
+
+        Args:
+            owner (Network/CompiledNetwork/Population): Network running the layer
+            layerIndex (int): Index of the layer, 1 is the first layer after the input layer
+            values (numpy.ndarray): Inputs of the layer
+        """
+        for hook in self.beforeLayer:
+            hook(owner, layerIndex, values)
+
+    def after_layer(self, owner, layerIndex, values):
+        """Record the activated values of a layer and run the after-layer hooks
+
+        Args:
+            owner (Network/CompiledNetwork/Population): Network running the layer
+            layerIndex (int): Index of the layer, 1 is the first layer after the input layer
+            values (numpy.ndarray): Activated values of the layer
+        """
+        stats = self.layers.get(layerIndex)
+        if stats is None:
+            stats = self.layers[layerIndex] = [0, 0, 0.0, float("inf"), float("-inf")]
+
+        # an empty batch (e.g. a population of 0) has no range
+        if values.size:
+            stats[0] += values.size
+            stats[1] += int(np.count_nonzero((values <= self.low) | (values >= self.high)))
+            stats[2] += float(values.sum())
+            stats[3] = min(stats[3], float(values.min()))
+            stats[4] = max(stats[4], float(values.max()))
+
+        for hook in self.afterLayer:
+            hook(owner, layerIndex, values)
+
+    def stats(self):
+        """Aggregated stats since the last reset
+
+        Returns:
+            dict: {"timers": {name: {"calls", "seconds", "mean"}}, "counters": {name: count},
+                   "layers": {index: {"values", "saturation", "mean", "min", "max"}}},
+                  layer stats are None for layers that only saw empty batches
+        """
+        return {
+            "timers": {
+                name: {"calls": calls, "seconds": seconds, "mean": seconds / calls}
+                for name, (calls, seconds) in self.timers.items()
+            },
+            "counters": dict(self.counters),
+            "layers": {
+                str(index): {
+                    "values": values,
+                    "saturation": saturated / values if values else None,
+                    "mean": total / values if values else None,
+                    "min": low if values else None,
+                    "max": high if values else None,
+                }
+                for index, (values, saturated, total, low, high) in sorted(self.layers.items())
+            },
+        }
+
+    def dump(self, file, reset=True, **fields):
+        """Append the stats as one JSON line, e.g. once per generation
+
+        Args:
+            file (string/file): Path or open text file to append to
+            reset (bool, optional): Start collecting from scratch afterwards. Defaults to True.
+            **fields: Extra fields for the line, e.g. generation=3
+        """
+        line = json.dumps({**fields, **self.stats()}) + "\n"
+        if isinstance(file, str):
+            with open(file, "a") as f:
+                f.write(line)
+        else:
+            file.write(line)
+
+        if reset:
+            self.reset()
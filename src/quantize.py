@@ -0,0 +1,285 @@
+"""Reduced-precision storage of network parameters.
+int8 quantization is symmetric with one scale per weight matrix and one per bias vector:
+ value ~= int8 * scale, where scale = max(|values|) / 127.
+"""
+import copy
+import time
+import numpy as np
+import activations
+from defaultFuncs import sigmoid
+from compiled import CompiledNetwork, layerSlices
+
+PRECISIONS = ("float64", "float32", "int8")
+
+def quantize(params, shape):
+    """Quantize flat parameter buffers to int8
+
+    Args:
+        params (numpy.ndarray): (genomeLength,) or (P, genomeLength) parameters
+        shape (tuple[int]): Number of neurons in each layer
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: int8 array shaped like params, and (..., 2 * layers)
+            float32 scales (weights then biases of each layer)
+    """
+    params = np.asarray(params)
+    blocks = [block for pair in layerSlices(shape) for block in pair]
+
+    quantized = np.empty(params.shape, dtype=np.int8)
+    scales = np.empty((*params.shape[:-1], len(blocks)), dtype=np.float32)
+
+    for index, block in enumerate(blocks):
+        values = params[..., block]
+        scale = np.abs(values).max(axis=-1, initial=0) / 127
+        # all-zero blocks keep a scale of 1 so nothing divides by 0
+        scale = np.where(scale > 0, scale, 1)
+        scales[..., index] = scale
+        quantized[..., block] = np.rint(values / scale[..., None])
+
+    return quantized, scales
+
+
+def dequantize(quantized, scales, shape, dtype=np.float64):
+    """Rebuild float parameters from quantize's output
+
+    Args:
+        quantized (numpy.ndarray): int8 parameters
+        scales (numpy.ndarray): Scales from quantize
+        shape (tuple[int]): Number of neurons in each layer
+        dtype (numpy.dtype, optional): Floating point type. Defaults to float64.
+
+    Returns:
+        numpy.ndarray: Parameters shaped like quantized
+    """
+    blocks = [block for pair in layerSlices(shape) for block in pair]
+    params = np.empty(quantized.shape, dtype=dtype)
+
+    for index, block in enumerate(blocks):
+        params[..., block] = quantized[..., block] * scales[..., index, None].astype(dtype)
+
+    return params
+
+
+class QuantizedNetwork(CompiledNetwork):
+    """Compiled form with every weight rounded to int8 with a scale per layer, for inference.
+    The int8 weights and scales are what gets stored (see quantize), and forward passes use
+     them dequantized to float32 once per gather(), so a pass runs at float32 speed with
+     int8-rounded parameters instead of converting every layer's weights on every pass.
+    Like the float32 compiled form, it is a copy: gather() requantizes the network's parameters.
+    """
+    def __init__(self, shape, inputNames, outputNames, params, activations=None):
+        """Quantize float parameters
+
+        Args:
+            shape (tuple[int]): Number of neurons in each layer
+            inputNames (list[string]): Names of the input neurons
+            outputNames (list[string]): Names of the output neurons
+            params (numpy.ndarray): Flat float parameter buffer
+            activations (list, optional): Activation of each layer after the input layer. Defaults to None.
+        """
+        self.shape = tuple(shape)
+        self.inputNames = list(inputNames)
+        self.outputNames = list(outputNames)
+        self.set_activations(activations)
+
+        # there is no float parameter buffer, see dequantized()
+        self.params = None
+        self.quantized = np.empty(len(params), dtype=np.int8)
+        self.scales = np.empty(2 * (len(self.shape) - 1), dtype=np.float32)
+        self.__view()
+        self.gather(params)
+
+        self.inputs = np.zeros(self.shape[0], dtype=np.float32)
+        self.values = [np.zeros(n, dtype=np.float32) for n in self.shape[1:]]
+        self.outputs = self.values[-1]
+
+    def __view(self):
+        self.weights = []
+        for (weights, _), inputs, outputs in zip(layerSlices(self.shape), self.shape[:-1], self.shape[1:]):
+            self.weights.append(self.quantized[weights].reshape(outputs, inputs))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["weights"], state["outputs"], state["floatWeights"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__view()
+        self.__dequantize()
+        self.outputs = self.values[-1]
+
+    @classmethod
+    def from_network(cls, network):
+        """Quantize the parameters of a network
+
+        Args:
+            network (Network): Network with connections built
+
+        Returns:
+            QuantizedNetwork: Quantized copy of the network's weights and biases
+        """
+        layers = network.layers
+        compiled = cls(
+            [len(layer.neurons) for layer in layers],
+            [neuron.name for neuron in layers[0].neurons],
+            [neuron.name for neuron in layers[-1].neurons],
+            network.params,
+            activations=[layer.activation for layer in layers[1:]],
+        )
+
+        compiled.inputs[:] = [neuron.value for neuron in layers[0].neurons]
+        return compiled
+
+    def clone(self, params=None):
+        """Copy with its own quantized parameters and buffers
+
+        Args:
+            params (numpy.ndarray, optional): Not used, the quantized parameters are always copied. Defaults to None.
+
+        Returns:
+            QuantizedNetwork: Copy
+        """
+        compiled = object.__new__(type(self))
+        compiled.__dict__.update(self.__dict__)
+        compiled.quantized = self.quantized.copy()
+        compiled.scales = self.scales.copy()
+        compiled.biases = [biases.copy() for biases in self.biases]
+        compiled.__view()
+        compiled.floatWeights = [weights.copy() for weights in self.floatWeights]
+
+        compiled.inputs = self.inputs.copy()
+        compiled.values = [values.copy() for values in self.values]
+        compiled.outputs = compiled.values[-1]
+        return compiled
+
+    @property
+    def precision(self):
+        return "int8"
+
+    def dequantized(self):
+        """Dequantized flat parameters
+
+        Returns:
+            numpy.ndarray: New float32 parameter buffer
+        """
+        return dequantize(self.quantized, self.scales, self.shape, np.float32)
+
+    def gather(self, params):
+        """Requantize from a float parameter buffer
+
+        Args:
+            params (numpy.ndarray): Flat parameter buffer
+        """
+        quantized, scales = quantize(params, self.shape)
+        self.quantized[:] = quantized
+        self.scales[:] = scales
+
+        self.__dequantize()
+
+    def __dequantize(self):
+        # float32 weights and biases used by forward passes
+        self.floatWeights = [weights * self.scales[2 * index] for index, weights in enumerate(self.weights)]
+        self.biases = [
+            self.quantized[biases] * self.scales[2 * index + 1]
+            for index, (_, biases) in enumerate(layerSlices(self.shape))
+        ]
+
+    def forward(self, normalizationFunction=sigmoid, profiler=None):
+        """Run the quantized network on its input buffer
+
+        Args:
+            normalizationFunction (function, optional): Function to normalize outputs of layers
+                without their own activation. Defaults to sigmoid.
+            profiler (profiling.Profiler, optional): Profiler to time every layer with. Defaults to None.
+
+        Returns:
+            numpy.ndarray: Output buffer
+        """
+        default = activations.get(normalizationFunction)
+        start = time.perf_counter() if profiler is not None else None
+        x = self.inputs
+
+        for layerIndex, (weights, biases, values, function) in enumerate(
+            zip(self.floatWeights, self.biases, self.values, self.functions), 1
+        ):
+            if profiler is not None:
+                profiler.before_layer(self, layerIndex, x)
+                layerStart = time.perf_counter()
+
+            np.dot(weights, x, out=values)
+            values += biases
+            x = (function or default)(values, out=values)
+
+            if profiler is not None:
+                profiler.add_time(f"layer{layerIndex}", time.perf_counter() - layerStart)
+                profiler.after_layer(self, layerIndex, x)
+
+        if profiler is not None:
+            profiler.add_time("forward", time.perf_counter() - start)
+        return self.outputs
+
+    def forward_batch(self, X, normalizationFunction=sigmoid):
+        """Run the quantized network on many input vectors at once.
+        The input and output buffers are left untouched.
+
+        Args:
+            X (array-like): (N, inputs) array, one input vector per row
+            normalizationFunction (function, optional): Function to normalize outputs of layers
+                without their own activation. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (N, outputs) array, one output vector per row
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.shape[0]:
+            raise ValueError(f"Expected an (N, {self.shape[0]}) array, got {X.shape}")
+
+        for weights, biases, function in zip(
+            self.floatWeights, self.biases, self.layer_functions(normalizationFunction)
+        ):
+            X = X @ weights.T
+            X += biases
+            X = function(X, out=X)
+
+        return X
+
+
+def accuracy(network, precision, X=None, samples=100, rng=None, normalizationFunction=sigmoid):
+    """Compare a reduced-precision compiled form against the full-precision Network.start
+
+    Args:
+        network (Network): Network with connections built (left untouched)
+        precision (string): One of PRECISIONS
+        X (array-like, optional): (N, inputs) inputs to compare on. Defaults to uniform numbers in [-1, 1].
+        samples (int, optional): Number of random inputs when X is not given. Defaults to 100.
+        rng (numpy.random.Generator/int, optional): Generator or seed for the random inputs. Defaults to None.
+        normalizationFunction (function, optional): Function given to Network.start. Defaults to sigmoid.
+
+    Returns:
+        dict: "maxError" and "meanError" (absolute output differences) and "agreement"
+              (fraction of inputs with the same highest output)
+    """
+    if X is None:
+        X = np.random.default_rng(rng).uniform(-1, 1, (samples, len(network.layers[0].neurons)))
+    X = np.asarray(X, dtype=float)
+
+    # a network compiled to a reduced precision would be compared against itself
+    reference = copy.deepcopy(network)
+    reference.decompile()
+    expected = []
+    for x in X:
+        reference.set_inputs(x.tolist())
+        reference.start(normalizationFunction)
+        expected.append([neuron.value for neuron in reference.get_outputs()])
+    expected = np.array(expected)
+
+    compiled = copy.deepcopy(network).compile(precision=precision).compiled
+    actual = compiled.forward_batch(X, normalizationFunction).astype(float)
+
+    error = np.abs(actual - expected)
+    return {
+        "maxError": float(error.max()),
+        "meanError": float(error.mean()),
+        "agreement": float(np.mean(actual.argmax(axis=1) == expected.argmax(axis=1))),
+    }
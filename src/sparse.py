@@ -0,0 +1,278 @@
+"""Sparse connectivity: connection masks, magnitude pruning and a sparse compiled form.
+A layer's mask is an (outputs, inputs) bool array, True where a connection exists.
+Absent connections keep a weight of 0 in the dense parameter buffer, so genomes keep
+their layout, and mutation skips them.
+"""
+import time
+import numpy as np
+import activations
+from defaultFuncs import sigmoid
+from compiled import CompiledNetwork, layerSlices
+
+def randomMask(shape, density, rng=None):
+    """Mask keeping a random fraction of the connections
+
+    Args:
+        shape (tuple[int, int]): (outputs, inputs)
+        density (float): Fraction of connections to keep (0.0 to 1.0)
+        rng (numpy.random.Generator/int, optional): Generator or seed. Defaults to None.
+
+    Returns:
+        numpy.ndarray: (outputs, inputs) bool mask
+    """
+    return np.random.default_rng(rng).random(shape) < density
+
+
+def magnitudeMask(weights, fraction=None, threshold=None, mask=None):
+    """Mask keeping the largest weights by magnitude
+
+    Args:
+        weights (numpy.ndarray): (outputs, inputs) weights
+        fraction (float, optional): Fraction of the present connections to remove (0.0 to 1.0). Defaults to None.
+        threshold (float, optional): Remove connections with |weight| <= threshold. Defaults to None.
+        mask (numpy.ndarray, optional): Current mask, absent connections stay absent. Defaults to None (all present).
+
+    Returns:
+        numpy.ndarray: (outputs, inputs) bool mask
+    """
+    if (fraction is None) == (threshold is None):
+        raise ValueError("Give either a fraction or a threshold to prune")
+
+    magnitude = np.abs(weights)
+    if mask is None:
+        mask = np.ones(weights.shape, dtype=bool)
+
+    if threshold is not None:
+        return mask & (magnitude > threshold)
+
+    # absent connections rank last, so only present ones are removed
+    magnitude[~mask] = np.inf
+    mask = mask.copy()
+    removed = int(round(fraction * np.count_nonzero(mask)))
+    if removed:
+        mask.flat[np.argpartition(magnitude, removed - 1, axis=None)[:removed]] = False
+    return mask
+
+
+def parameterMask(shape, masks):
+    """Flat mask over a parameter buffer, True for every present weight and every bias
+
+    Args:
+        shape (tuple[int]): Number of neurons in each layer
+        masks (list[numpy.ndarray]): Mask of each layer after the input layer, None for dense layers
+
+    Returns:
+        numpy.ndarray: (genomeLength,) bool mask, or None if every layer is dense
+    """
+    if all(mask is None for mask in masks):
+        return None
+
+    slices = layerSlices(shape)
+    flat = np.ones(slices[-1][1].stop, dtype=bool)
+    for (weights, _), mask in zip(slices, masks):
+        if mask is not None:
+            flat[weights] = mask.ravel()
+
+    return flat
+
+
+class SparseCompiledNetwork(CompiledNetwork):
+    """Compiled form storing only the present connections.
+    Each layer keeps its present weights in row order (CSR) with their column indices,
+     so a forward pass multiplies only those and sums them per row.
+    Unlike CompiledNetwork, the parameters are a compact copy (present weights and biases of
+     each layer), so memory and forward-pass time scale with the number of connections.
+    `positions` maps every compact parameter back to the dense parameter buffer.
+    """
+    def __init__(self, shape, inputNames, outputNames, params, masks, activations=None, dtype=None):
+        """Compile dense parameters into the sparse form
+
+        Args:
+            shape (tuple[int]): Number of neurons in each layer
+            inputNames (list[string]): Names of the input neurons
+            outputNames (list[string]): Names of the output neurons
+            params (numpy.ndarray): Dense flat parameter buffer
+            masks (list[numpy.ndarray]): Mask of each layer after the input layer, None for dense layers
+            activations (list, optional): Activation of each layer after the input layer. Defaults to None.
+            dtype (numpy.dtype, optional): Floating point type of the buffers. Defaults to the type of params.
+        """
+        self.shape = tuple(shape)
+        self.inputNames = list(inputNames)
+        self.outputNames = list(outputNames)
+        self.set_activations(activations)
+
+        positions = []
+        self.rows = []
+        self.columns = []
+        self.indptr = []
+        for (weights, biases), mask, inputs, outputs in zip(
+            layerSlices(self.shape), masks, self.shape[:-1], self.shape[1:]
+        ):
+            if mask is None:
+                mask = np.ones((outputs, inputs), dtype=bool)
+
+            rows, columns = np.nonzero(mask)
+            self.rows.append(rows.astype(np.intp))
+            self.columns.append(columns.astype(np.intp))
+            self.indptr.append(np.searchsorted(rows, np.arange(outputs + 1)))
+
+            positions.append(weights.start + rows * inputs + columns)
+            positions.append(np.arange(biases.start, biases.stop))
+
+        self.positions = np.concatenate(positions)
+        self.params = np.asarray(params)[self.positions].astype(dtype or params.dtype, copy=False)
+        self.__view()
+
+        self.inputs = np.zeros(self.shape[0], dtype=self.params.dtype)
+        self.values = [np.zeros(n, dtype=self.params.dtype) for n in self.shape[1:]]
+        self.outputs = self.values[-1]
+
+        # products of each layer's present weights and their inputs, plus a trailing 0
+        # so rows without connections still have a valid start index for np.add.reduceat
+        self.products = [np.zeros(len(rows) + 1, dtype=self.params.dtype) for rows in self.rows]
+        self.empty = [np.flatnonzero(indptr[:-1] == indptr[1:]) for indptr in self.indptr]
+
+    def __view(self):
+        self.weights = []
+        self.biases = []
+        offset = 0
+        for rows, outputs in zip(self.rows, self.shape[1:]):
+            self.weights.append(self.params[offset:offset + len(rows)])
+            offset += len(rows)
+            self.biases.append(self.params[offset:offset + outputs])
+            offset += outputs
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["weights"], state["biases"], state["outputs"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__view()
+        self.outputs = self.values[-1]
+
+    @classmethod
+    def from_network(cls, network, dtype=None):
+        """Compile a network, skipping the connections its layers' masks leave out
+
+        Args:
+            network (Network): Network with connections built
+            dtype (numpy.dtype, optional): Floating point type. Defaults to None (the network's own type).
+
+        Returns:
+            SparseCompiledNetwork: Compiled copy of the present weights and biases
+        """
+        layers = network.layers
+        compiled = cls(
+            [len(layer.neurons) for layer in layers],
+            [neuron.name for neuron in layers[0].neurons],
+            [neuron.name for neuron in layers[-1].neurons],
+            network.params,
+            [layer.mask for layer in layers[1:]],
+            activations=[layer.activation for layer in layers[1:]],
+            dtype=dtype,
+        )
+
+        compiled.inputs[:] = [neuron.value for neuron in layers[0].neurons]
+        return compiled
+
+    def clone(self, params=None):
+        """Copy with its own compact parameters and buffers, sharing the connection structure
+
+        Args:
+            params (numpy.ndarray, optional): Not used, the compact parameters are always copied. Defaults to None.
+
+        Returns:
+            SparseCompiledNetwork: Copy
+        """
+        compiled = object.__new__(type(self))
+        compiled.__dict__.update(self.__dict__)
+        compiled.params = self.params.copy()
+        compiled.__view()
+
+        compiled.inputs = self.inputs.copy()
+        compiled.values = [values.copy() for values in self.values]
+        compiled.outputs = compiled.values[-1]
+        compiled.products = [products.copy() for products in self.products]
+        return compiled
+
+    def gather(self, params):
+        """Refresh the compact parameters from a dense parameter buffer
+
+        Args:
+            params (numpy.ndarray): Dense flat parameter buffer
+        """
+        self.params[:] = params[self.positions]
+
+    @property
+    def connections(self):
+        """Number of present connections"""
+        return sum(len(rows) for rows in self.rows)
+
+    def forward(self, normalizationFunction=sigmoid, profiler=None):
+        """Run the compiled network on its input buffer
+
+        Args:
+            normalizationFunction (function, optional): Function to normalize outputs of layers
+                without their own activation. Defaults to sigmoid.
+            profiler (profiling.Profiler, optional): Profiler to time every layer with. Defaults to None.
+
+        Returns:
+            numpy.ndarray: Output buffer
+        """
+        default = activations.get(normalizationFunction)
+        start = time.perf_counter() if profiler is not None else None
+        x = self.inputs
+
+        for layerIndex, (weights, biases, columns, indptr, products, empty, values, function) in enumerate(zip(
+            self.weights, self.biases, self.columns, self.indptr, self.products, self.empty, self.values, self.functions
+        ), 1):
+            if profiler is not None:
+                profiler.before_layer(self, layerIndex, x)
+                layerStart = time.perf_counter()
+
+            # sum each row's products, rows without connections are zeroed afterwards
+            np.multiply(weights, x[columns], out=products[:-1])
+            np.add.reduceat(products, indptr[:-1], out=values)
+            values[empty] = 0
+            values += biases
+            x = (function or default)(values, out=values)
+
+            if profiler is not None:
+                profiler.add_time(f"layer{layerIndex}", time.perf_counter() - layerStart)
+                profiler.after_layer(self, layerIndex, x)
+
+        if profiler is not None:
+            profiler.add_time("forward", time.perf_counter() - start)
+        return self.outputs
+
+    def forward_batch(self, X, normalizationFunction=sigmoid):
+        """Run the compiled network on many input vectors at once.
+        The input and output buffers are left untouched.
+
+        Args:
+            X (array-like): (N, inputs) array, one input vector per row
+            normalizationFunction (function, optional): Function to normalize outputs of layers
+                without their own activation. Defaults to sigmoid.
+
+        Returns:
+            numpy.ndarray: (N, outputs) array, one output vector per row
+        """
+        X = np.asarray(X, dtype=self.params.dtype)
+        if X.ndim != 2 or X.shape[1] != self.shape[0]:
+            raise ValueError(f"Expected an (N, {self.shape[0]}) array, got {X.shape}")
+
+        for weights, biases, columns, indptr, empty, function in zip(
+            self.weights, self.biases, self.columns, self.indptr, self.empty, self.layer_functions(normalizationFunction)
+        ):
+            products = np.zeros((len(X), len(weights) + 1), dtype=X.dtype)
+            np.multiply(X[:, columns], weights, out=products[:, :-1])
+
+            X = np.add.reduceat(products, indptr[:-1], axis=1)
+            X[:, empty] = 0
+
+            X += biases
+            X = function(X, out=X)
+
+        return X
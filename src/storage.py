@@ -0,0 +1,269 @@
+import os
+import json
+import struct
+import numpy as np
+import activations
+from compiled import genomeLength
+from population import Population
+
+MAGIC = b"NNET"
+VERSION = 1
+
+# header: magic, version, parameter dtype code, number of layers
+HEADER = struct.Struct("<4sBcH")
+DTYPES = {b"f": np.float32, b"d": np.float64}
+
+def packNetwork(compiled, dtype=np.float64):
+    """Serialize a compiled network.
+    Layout (little-endian): header, neurons per layer (uint32 each),
+     length of the name block (uint32), input names, output names and the activation name
+     of each layer after the input layer (utf-8, newline separated, empty for the default),
+     zero padding to an 8 byte boundary, then every weight and bias as one contiguous
+     float block in CompiledNetwork order (aligned, so it can be viewed in place).
+
+    Args:
+        compiled (CompiledNetwork): Network to serialize
+        dtype (numpy.dtype, optional): float32 or float64. Defaults to np.float64.
+
+    Returns:
+        bytes: Serialized network
+    """
+    dtype = np.dtype(dtype)
+    code = {np.dtype(value): key for key, value in DTYPES.items()}.get(dtype)
+    if code is None:
+        raise ValueError(f"Cannot store parameters as {dtype}")
+
+    layerActivations = [activations.nameOf(activation) for activation in compiled.activations]
+    for activation, name in zip(compiled.activations, layerActivations):
+        if activation is not None and name is None:
+            raise ValueError(f"Cannot serialize unregistered activation {activation!r}")
+
+    names = "\n".join(
+        compiled.inputNames + compiled.outputNames + [name or "" for name in layerActivations]
+    ).encode("utf-8")
+    padding = -(HEADER.size + 4 * len(compiled.shape) + 4 + len(names)) % 8
+
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, code, len(compiled.shape)),
+        np.asarray(compiled.shape, dtype="<u4").tobytes(),
+        struct.pack("<I", len(names)),
+        names,
+        bytes(padding),
+        compiled.params.astype(dtype.newbyteorder("<"), copy=False).tobytes(),
+    ))
+
+
+def unpackNetwork(data):
+    """Read a network serialized by packNetwork.
+    The parameters view straight into `data` when it is a writable, 8 byte aligned float64 buffer.
+
+    Args:
+        data (bytes/bytearray/memoryview): Serialized network
+
+    Returns:
+        tuple: (shape, inputNames, outputNames, params, activations)
+    """
+    magic, version, code, layers = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a serialized network")
+    if version != VERSION:
+        raise ValueError(f"Unsupported network format version {version}")
+
+    offset = HEADER.size
+    shape = tuple(np.frombuffer(data, dtype="<u4", count=layers, offset=offset).tolist())
+    offset += 4 * layers
+
+    (namesLength,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    names = bytes(data[offset:offset + namesLength]).decode("utf-8").split("\n")
+    offset += namesLength
+    offset += -offset % 8
+
+    params = np.frombuffer(
+        data, dtype=np.dtype(DTYPES[code]).newbyteorder("<"), count=genomeLength(shape), offset=offset
+    )
+    if params.dtype != np.float64 or not params.flags.writeable or not params.flags.aligned:
+        params = params.astype(np.float64)
+
+    inputs, outputs = shape[0], shape[0] + shape[-1]
+    layerActivations = [name or None for name in names[outputs:]]
+
+    return shape, names[:inputs], names[inputs:outputs], params, layerActivations
+
+
+class PopulationStore:
+    """Population checkpoints in one memory-mapped file.
+    The file starts with a header and the serialized template network (see packNetwork),
+     followed by one fixed-size record per checkpointed generation:
+     generation number, numpy RNG state (JSON), (P,) fitness and (P, genomeLength) genomes.
+    Records are appended, so the file keeps the whole history, and reading one
+     maps it straight from disk without building any Network objects.
+    A partial record left at the end by an interrupted write is ignored, and overwritten by the next append.
+    """
+    MAGIC = b"NPOP"
+    VERSION = 1
+    # magic, version, genome dtype code, population size, genome length, template length
+    HEADER = struct.Struct("<4sBc2xQQQ")
+    RNG_SIZE = 256
+
+    def __init__(self, path):
+        """Open an existing store (see PopulationStore.create to make one)
+
+        Args:
+            path (string): Checkpoint file
+        """
+        self.path = path
+
+        with open(path, "rb") as f:
+            header = f.read(self.HEADER.size)
+            magic, version, code, size, length, templateLength = self.HEADER.unpack(header)
+            if magic != self.MAGIC:
+                raise ValueError(f"{path} is not a population checkpoint")
+            if version != self.VERSION:
+                raise ValueError(f"Unsupported checkpoint format version {version}")
+
+            self.templateBytes = f.read(templateLength)
+
+        self.size = size
+        self.genomeLength = length
+        self.dtype = np.dtype([
+            ("generation", "<i8"),
+            ("rng", f"S{self.RNG_SIZE}"),
+            ("fitness", "<f8", (size,)),
+            ("genomes", np.dtype(DTYPES[code]).newbyteorder("<"), (size, length)),
+        ])
+        # records start on an 8 byte boundary
+        self.offset = -(-(self.HEADER.size + templateLength) // 8) * 8
+        self.__records = None
+
+    @classmethod
+    def create(cls, path, template, size, dtype=np.float64):
+        """Create an empty store, overwriting any existing file
+
+        Args:
+            path (string): Checkpoint file
+            template (Network): Network giving the shape and names of every genome
+            size (int): Population size
+            dtype (numpy.dtype, optional): Genome precision, float32 or float64. Defaults to np.float64.
+
+        Returns:
+            PopulationStore: Empty store
+        """
+        dtype = np.dtype(dtype)
+        code = {np.dtype(value): key for key, value in DTYPES.items()}.get(dtype)
+        if code is None:
+            raise ValueError(f"Cannot store genomes as {dtype}")
+
+        compiled = template.get_compiled()
+        templateBytes = packNetwork(compiled)
+        header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, code, size, len(compiled.params), len(templateBytes))
+        padding = -(len(header) + len(templateBytes)) % 8
+
+        with open(path, "wb") as f:
+            f.write(header + templateBytes + bytes(padding))
+
+        return cls(path)
+
+    @property
+    def records(self):
+        """Memory-mapped array of every record"""
+        if self.__records is None:
+            count = (os.path.getsize(self.path) - self.offset) // self.dtype.itemsize
+            self.__records = np.memmap(
+                self.path, dtype=self.dtype, mode="r", offset=self.offset, shape=(count,)
+            ) if count else np.zeros(0, dtype=self.dtype)
+
+        return self.__records
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, generation, genomes, fitness, rng=None):
+        """Add a generation after the last complete record
+
+        Args:
+            generation (int): Generation number
+            genomes (numpy.ndarray): (P, genomeLength) genomes
+            fitness (numpy.ndarray): (P,) fitness of each genome
+            rng (numpy.random.Generator, optional): Generator to store the state of. Defaults to None.
+        """
+        if rng is not None and not isinstance(rng, np.random.Generator):
+            raise ValueError(f"Can only store the state of a numpy.random.Generator, got {rng!r}")
+
+        record = np.zeros(1, dtype=self.dtype)
+        record["generation"] = generation
+        record["fitness"] = fitness
+        record["genomes"] = genomes
+
+        if rng is not None:
+            state = json.dumps(rng.bit_generator.state).encode("utf-8")
+            if len(state) > self.RNG_SIZE:
+                raise ValueError(f"{rng.bit_generator.state['bit_generator']} state is too large to store")
+            record["rng"] = state
+
+        # write over any partial record an interrupted append left behind
+        slot = self.offset + len(self.records) * self.dtype.itemsize
+        self.__records = None
+        with open(self.path, "r+b") as f:
+            f.seek(slot)
+            f.write(record.tobytes())
+            f.truncate()
+
+    def generation(self, index=-1):
+        return int(self.records[index]["generation"])
+
+    def genomes(self, index=-1):
+        """Genomes of a checkpoint, mapped from disk (read only)"""
+        return self.records[index]["genomes"]
+
+    def fitness(self, index=-1):
+        """Fitness of a checkpoint, mapped from disk (read only)"""
+        return self.records[index]["fitness"]
+
+    def rng(self, index=-1):
+        """Rebuild the numpy generator stored with a checkpoint
+
+        Args:
+            index (int, optional): Checkpoint index. Defaults to the latest.
+
+        Returns:
+            numpy.random.Generator: Generator in the stored state, or None if none was stored
+        """
+        state = self.records[index]["rng"]
+        if not state:
+            return None
+
+        state = json.loads(state.decode("utf-8"))
+        bitGenerator = getattr(np.random, state["bit_generator"])()
+        bitGenerator.state = state
+        return np.random.Generator(bitGenerator)
+
+    def template(self):
+        """Load the template network (compiled)"""
+        # main imports this module
+        from main import Network
+        return Network.from_bytes(bytearray(self.templateBytes))
+
+    def population(self, index=-1, template=None):
+        """Copy a checkpoint into a Population
+
+        Args:
+            index (int, optional): Checkpoint index. Defaults to the latest.
+            template (Network, optional): Template network, with the same shape and input/output names
+                as the stored one. Defaults to the stored one.
+
+        Returns:
+            Population: Population holding a copy of the genomes
+        """
+        if template is not None:
+            # genomes of another network with the same length would be read without any error
+            expected = unpackNetwork(bytearray(self.templateBytes))[:3]
+            compiled = template.get_compiled()
+            actual = (compiled.shape, compiled.inputNames, compiled.outputNames)
+            if actual[0] != expected[0]:
+                raise ValueError(f"Template of shape {actual[0]} does not match the checkpointed shape {expected[0]}")
+            if actual != expected:
+                raise ValueError("Template input/output names do not match the checkpointed networks")
+
+        # copied in the stored precision
+        return Population(template or self.template(), np.array(self.genomes(index)))
@@ -0,0 +1,294 @@
+"""Streaming run telemetry: one record of stats per generation.
+Records go into a preallocated ring buffer (a structured array), and a background thread
+writes them out in bulk, so recording costs one row assignment and never waits on the disk.
+
+Output formats, picked from the file extension:
+ - .jsonl   one JSON object per record
+ - .csv     a header, then one row per record (score counts as score0, score1, ...)
+ - .bin     raw fixed-size records, with the dtype in <path>.dtype.json (see load)
+Appending to an existing .csv or .bin file needs the same columns (the same scoreBins).
+"""
+import os
+import csv
+import json
+import time
+import threading
+import numpy as np
+
+FORMATS = ("jsonl", "csv", "bin")
+
+# fitness percentiles recorded for every generation
+PERCENTILES = (10, 50, 90)
+
+# profiler timers (see profiling) counted as inference, the first one present is used
+# since a game's "start" timer includes the compiled network's "forward" timer
+INFERENCE_TIMERS = ("start", "forward")
+# profiler timers counted as simulation
+SIMULATION_TIMERS = ("inputs", "step")
+
+def recordType(scoreBins=0):
+    """Structured dtype of a record
+
+    Args:
+        scoreBins (int, optional): Number of score counts (scores 0 to scoreBins - 1, higher ones
+            counted in the last). Defaults to 0 (no score distribution).
+
+    Returns:
+        numpy.dtype: Record type
+    """
+    fields = [
+        ("generation", np.int64),
+        ("time", np.float64),
+        ("seconds", np.float64),
+        ("evaluations", np.int64),
+        ("evaluationsPerSecond", np.float64),
+        ("best", np.float64),
+        ("mean", np.float64),
+        ("std", np.float64),
+    ]
+    fields += [(f"p{percentile}", np.float64) for percentile in PERCENTILES]
+    fields += [("inferenceSeconds", np.float64), ("simulationSeconds", np.float64)]
+    if scoreBins:
+        fields.append(("scores", np.int64, (scoreBins,)))
+    return np.dtype(fields)
+
+
+def load(path):
+    """Read a .bin telemetry file
+
+    Args:
+        path (string): File written by Telemetry
+
+    Returns:
+        numpy.ndarray: Structured array of records, e.g. load(path)["best"] is the best fitness column
+    """
+    with open(path + ".dtype.json") as f:
+        dtype = np.dtype([tuple(field) for field in json.load(f)])
+    return np.fromfile(path, dtype=dtype)
+
+
+class Telemetry:
+    """Records per-generation stats and writes them from a background thread"""
+    def __init__(self, path, capacity=1024, flushEvery=None, scoreBins=0, format=None):
+        """Open a telemetry file for appending
+
+        Args:
+            path (string): File to append to
+            capacity (int, optional): Records held in the ring buffer. Defaults to 1024.
+            flushEvery (int, optional): Write once this many records are waiting. Defaults to capacity // 4.
+            scoreBins (int, optional): Number of score counts per record (see recordType). Defaults to 0.
+            format (string, optional): One of FORMATS. Defaults to the file extension.
+        """
+        format = format or os.path.splitext(path)[1].lstrip(".")
+        if format not in FORMATS:
+            raise ValueError(f"Unknown telemetry format {format!r}, expected one of {', '.join(FORMATS)}")
+
+        self.path = path
+        self.format = format
+        self.dtype = recordType(scoreBins)
+        self.scoreBins = scoreBins
+        self.capacity = capacity
+        self.flushEvery = flushEvery or max(1, capacity // 4)
+
+        self.buffer = np.zeros(capacity, dtype=self.dtype)
+        # records recorded, and records taken out of the buffer by the writer
+        self.recorded = 0
+        self.taken = 0
+        self.written = 0
+        self.flushing = False
+        self.closed = False
+        self.error = None
+        self.condition = threading.Condition()
+
+        self.__open()
+        self.thread = threading.Thread(target=self.__write_loop, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def __open(self):
+        # records of another layout (e.g. other scoreBins) would corrupt what is already written
+        names = self.dtype.names
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if self.format == "bin":
+            dtypePath = self.path + ".dtype.json"
+            if exists:
+                try:
+                    with open(dtypePath) as f:
+                        stored = np.dtype([tuple(field) for field in json.load(f)])
+                except FileNotFoundError:
+                    raise ValueError(f"{self.path} has no {dtypePath}, cannot check its record layout") from None
+                if stored != self.dtype:
+                    raise ValueError(f"{self.path} holds records of another layout (e.g. other scoreBins)")
+
+            self.file = open(self.path, "ab")
+            if not exists:
+                with open(dtypePath, "w") as f:
+                    json.dump(self.dtype.descr, f)
+            return
+
+        header = [name for name in names if name != "scores"]
+        header += [f"score{score}" for score in range(self.scoreBins)]
+        if exists and self.format == "csv":
+            with open(self.path, newline="") as f:
+                if next(csv.reader(f), None) != header:
+                    raise ValueError(f"{self.path} has other columns (e.g. other scoreBins)")
+
+        self.file = open(self.path, "a", newline="")
+        if self.format == "csv":
+            self.csv = csv.writer(self.file)
+            if not exists:
+                self.csv.writerow(header)
+
+    def record(self, **values):
+        """Record one generation's stats, taking the next row of the ring buffer.
+        Waits only if the writer has fallen a whole buffer behind.
+
+        Args:
+            **values: Fields of recordType, missing ones are 0
+        """
+        with self.condition:
+            if self.closed:
+                raise ValueError("Telemetry is closed")
+            while self.recorded - self.taken >= self.capacity:
+                self.condition.notify_all()
+                self.condition.wait()
+
+            index = self.recorded % self.capacity
+            self.buffer[index] = 0
+            row = self.buffer[index]
+            for name, value in values.items():
+                row[name] = value
+            self.recorded += 1
+
+            if self.recorded - self.taken >= self.flushEvery:
+                self.condition.notify_all()
+
+    def record_generation(self, generation, fitness, seconds, scores=None, evaluations=None, profiler=None):
+        """Record the stats of an evaluated generation
+
+        Args:
+            generation (int): Generation number
+            fitness (array-like): Fitness of every network
+            seconds (float): Wall time the generation took
+            scores (array-like, optional): Integer score of every network, counted into scoreBins. Defaults to None.
+            evaluations (int, optional): Evaluations run for the generation. Defaults to the number of networks.
+            profiler (profiling.Profiler, optional): Profiler to take the inference and simulation time from.
+                Defaults to None (recorded as NaN).
+        """
+        fitness = np.asarray(fitness, dtype=float)
+        evaluations = len(fitness) if evaluations is None else evaluations
+        values = {
+            "generation": generation,
+            "time": time.time(),
+            "seconds": seconds,
+            "evaluations": evaluations,
+            "evaluationsPerSecond": evaluations / seconds if seconds else 0.0,
+        }
+
+        # an empty generation has no fitness stats, they are recorded as NaN
+        if len(fitness):
+            values.update(best=fitness.max(), mean=fitness.mean(), std=fitness.std())
+            percentiles = np.percentile(fitness, PERCENTILES)
+        else:
+            values.update(best=np.nan, mean=np.nan, std=np.nan)
+            percentiles = [np.nan] * len(PERCENTILES)
+        for percentile, value in zip(PERCENTILES, percentiles):
+            values[f"p{percentile}"] = value
+
+        values["inferenceSeconds"] = values["simulationSeconds"] = np.nan
+        if profiler is not None:
+            timers = profiler.timers
+            inference = next((timers[name][1] for name in INFERENCE_TIMERS if name in timers), 0.0)
+            values["inferenceSeconds"] = inference
+            values["simulationSeconds"] = sum(timers[name][1] for name in SIMULATION_TIMERS if name in timers)
+
+        if self.scoreBins and scores is not None:
+            scores = np.clip(np.asarray(scores, dtype=np.int64), 0, self.scoreBins - 1)
+            values["scores"] = np.bincount(scores, minlength=self.scoreBins)
+
+        self.record(**values)
+
+    def __write_loop(self):
+        while True:
+            with self.condition:
+                while (
+                    self.recorded - self.taken < self.flushEvery
+                    and not self.flushing and not self.closed
+                ):
+                    self.condition.wait()
+
+                start, stop = self.taken, self.recorded
+                records = self.buffer.take(np.arange(start, stop) % self.capacity)
+                self.taken = stop
+                self.flushing = False
+                closing = self.closed
+                # the rows are free again
+                self.condition.notify_all()
+
+            try:
+                if len(records):
+                    self.__write(records)
+            except Exception as error:
+                self.error = error
+
+            with self.condition:
+                self.written = stop
+                self.condition.notify_all()
+
+            if closing:
+                return
+
+    def __write(self, records):
+        if self.format == "bin":
+            records.tofile(self.file)
+            self.file.flush()
+            return
+
+        names = self.dtype.names
+        # columns as plain Python values, score counts as one list per record
+        columns = [records[name].tolist() for name in names]
+        if self.format == "csv":
+            scores = columns.pop() if self.scoreBins else None
+            rows = [list(row) + (scores[i] if scores else []) for i, row in enumerate(zip(*columns))]
+            self.csv.writerows(rows)
+        else:
+            # NaN (e.g. no profiler) is written as null, keeping the lines strict JSON
+            self.file.write("".join(
+                json.dumps({
+                    name: None if value != value else value
+                    for name, value in zip(names, row)
+                }) + "\n"
+                for row in zip(*columns)
+            ))
+        self.file.flush()
+
+    def flush(self):
+        """Write every recorded generation now, and wait until it is written"""
+        with self.condition:
+            target = self.recorded
+            self.flushing = True
+            self.condition.notify_all()
+            while self.written < target and self.thread.is_alive():
+                self.condition.wait()
+
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """Write the remaining records and close the file"""
+        if self.closed:
+            return
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.file.close()
+
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,288 @@
+"""Minibatch gradient training of a Network.
+Gradients are computed for the whole flat parameter buffer at once (same layout as
+compiled.layerSlices), so optimizers update every weight and bias in one array operation
+and the trained parameters are the network's own.
+"""
+import numpy as np
+import activations
+from defaultFuncs import sigmoid
+from compiled import layerSlices
+
+def mse(prediction, target):
+    """Mean squared error over every output
+
+    Returns:
+        tuple[float, numpy.ndarray]: Loss and its gradient with respect to the prediction
+    """
+    difference = prediction - target
+    return float(np.mean(difference * difference)), difference * (2 / difference.size)
+
+
+# predictions are clipped away from 0 and 1 so the logarithms stay finite
+EPSILON = 1e-12
+
+def crossEntropy(prediction, target):
+    """Categorical cross entropy, for softmax outputs and one-hot (or probability) targets
+
+    Returns:
+        tuple[float, numpy.ndarray]: Loss and its gradient with respect to the prediction
+    """
+    prediction = np.clip(prediction, EPSILON, 1)
+    size = len(prediction)
+    return float(-np.sum(target * np.log(prediction)) / size), -target / prediction / size
+
+
+def binaryCrossEntropy(prediction, target):
+    """Cross entropy of independent 0/1 outputs, for sigmoid outputs
+
+    Returns:
+        tuple[float, numpy.ndarray]: Loss and its gradient with respect to the prediction
+    """
+    prediction = np.clip(prediction, EPSILON, 1 - EPSILON)
+    loss = -np.mean(target * np.log(prediction) + (1 - target) * np.log(1 - prediction))
+    return float(loss), (prediction - target) / (prediction * (1 - prediction) * prediction.size)
+
+
+LOSSES = {
+    "mse": mse,
+    "crossEntropy": crossEntropy,
+    "binaryCrossEntropy": binaryCrossEntropy,
+}
+
+
+class SGD:
+    """Stochastic gradient descent, with optional momentum"""
+    def __init__(self, learningRate=0.01, momentum=0.0):
+        self.learningRate = learningRate
+        self.momentum = momentum
+        self.velocity = None
+
+    def step(self, params, gradient):
+        """Update parameters in place
+
+        Args:
+            params (numpy.ndarray): Flat parameter buffer
+            gradient (numpy.ndarray): Gradient of the loss, same shape as params
+        """
+        if not self.momentum:
+            params -= self.learningRate * gradient
+            return
+
+        if self.velocity is None:
+            self.velocity = np.zeros_like(params)
+
+        self.velocity *= self.momentum
+        self.velocity -= self.learningRate * gradient
+        params += self.velocity
+
+
+class Adam:
+    """Adam: per-parameter step sizes from running averages of the gradient and its square"""
+    def __init__(self, learningRate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        self.learningRate = learningRate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.steps = 0
+        self.m = None
+        self.v = None
+
+    def step(self, params, gradient):
+        """Update parameters in place
+
+        Args:
+            params (numpy.ndarray): Flat parameter buffer
+            gradient (numpy.ndarray): Gradient of the loss, same shape as params
+        """
+        if self.m is None:
+            self.m = np.zeros_like(params)
+            self.v = np.zeros_like(params)
+
+        self.steps += 1
+        self.m *= self.beta1
+        self.m += (1 - self.beta1) * gradient
+        self.v *= self.beta2
+        self.v += (1 - self.beta2) * gradient * gradient
+
+        # bias-corrected step size
+        learningRate = self.learningRate * np.sqrt(1 - self.beta2 ** self.steps) / (1 - self.beta1 ** self.steps)
+        params -= learningRate * self.m / (np.sqrt(self.v) + self.epsilon)
+
+
+OPTIMIZERS = {
+    "sgd": SGD,
+    "adam": Adam,
+}
+
+
+def minibatches(X, y, batchSize=32, rng=None, shuffle=True):
+    """Split a dataset into (X, y) minibatches
+
+    Args:
+        X (array-like): (N, inputs) inputs
+        y (array-like): (N, outputs) targets
+        batchSize (int, optional): Rows per batch. Defaults to 32.
+        rng (numpy.random.Generator/int, optional): Generator or seed for shuffling. Defaults to None.
+        shuffle (bool, optional): Visit the rows in a random order. Defaults to True.
+
+    Yields:
+        tuple[numpy.ndarray, numpy.ndarray]: (X, y) batch
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    order = np.random.default_rng(rng).permutation(len(X)) if shuffle else np.arange(len(X))
+
+    for i in range(0, len(X), batchSize):
+        rows = order[i:i + batchSize]
+        yield X[rows], y[rows]
+
+
+class Trainer:
+    """Trains a network's weights and biases with backpropagation.
+    The network is updated in place, compiled or not, so it can be handed
+     to evolution (e.g. as a Population template) right after training.
+    """
+    def __init__(self, network, optimizer="adam", loss="mse", normalizationFunction=sigmoid):
+        """Construct a trainer
+
+        Args:
+            network (Network): Network with connections built
+            optimizer (string/object, optional): Name in OPTIMIZERS, or an object with step(params, gradient).
+                Defaults to "adam".
+            loss (string/function, optional): Name in LOSSES, or a function (prediction, target) -> (loss, gradient).
+                Defaults to "mse".
+            normalizationFunction (function, optional): Function for layers without their own activation,
+                as given to Network.start. Defaults to sigmoid.
+        """
+        if isinstance(optimizer, str):
+            if optimizer not in OPTIMIZERS:
+                raise ValueError(f"Unknown optimizer {optimizer!r}, expected one of {', '.join(OPTIMIZERS)}")
+            optimizer = OPTIMIZERS[optimizer]()
+        if isinstance(loss, str):
+            if loss not in LOSSES:
+                raise ValueError(f"Unknown loss {loss!r}, expected one of {', '.join(LOSSES)}")
+            loss = LOSSES[loss]
+
+        self.network = network
+        self.optimizer = optimizer
+        self.loss = loss
+        self.normalizationFunction = normalizationFunction
+
+    def layers(self):
+        # compiled views of the network's own parameter buffer
+        compiled = self.network.get_compiled()
+        functions = compiled.layer_functions(self.normalizationFunction)
+        gradients = [
+            activations.gradient(activation or self.normalizationFunction)
+            for activation in compiled.activations
+        ]
+        return compiled, functions, gradients
+
+    def gradient(self, X, y):
+        """Loss of a batch and its gradient for every parameter
+
+        Args:
+            X (array-like): (N, inputs) inputs
+            y (array-like): (N, outputs) targets
+
+        Returns:
+            tuple[float, numpy.ndarray]: Loss and flat gradient (same layout as the parameter buffer)
+        """
+        compiled, functions, gradients = self.layers()
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        # inputs, pre-activations and outputs of every layer
+        inputs, sums, outputs = [], [], []
+        x = X
+        for weights, biases, function in zip(compiled.weights, compiled.biases, functions):
+            inputs.append(x)
+            z = x @ weights.T
+            z += biases
+            sums.append(z)
+            x = function(z)
+            outputs.append(x)
+
+        loss, delta = self.loss(x, y)
+
+        flat = np.empty_like(compiled.params)
+        slices = layerSlices(compiled.shape)
+        for layerIndex in reversed(range(len(slices))):
+            delta = gradients[layerIndex](sums[layerIndex], outputs[layerIndex], delta)
+            weights, biases = slices[layerIndex]
+
+            flat[weights] = (delta.T @ inputs[layerIndex]).ravel()
+            flat[biases] = delta.sum(axis=0)
+
+            if layerIndex:
+                delta = delta @ compiled.weights[layerIndex]
+
+        return loss, flat
+
+    def train_batch(self, X, y):
+        """Take one optimizer step on a batch
+
+        Args:
+            X (array-like): (N, inputs) inputs
+            y (array-like): (N, outputs) targets
+
+        Returns:
+            float: Loss of the batch before the step
+        """
+        loss, gradient = self.gradient(X, y)
+
+        # connections removed from sparse layers stay at 0
+        mask = self.network.parameter_mask()
+        if mask is not None:
+            gradient[~mask] = 0
+
+        self.optimizer.step(self.network.params, gradient)
+        if mask is not None:
+            # momentum and running averages from before a connection was pruned would still move it
+            self.network.params[~mask] = 0
+        self.network.update_compiled()
+        return loss
+
+    def fit(self, batches, epochs=1, callback=None):
+        """Train for some epochs
+
+        Args:
+            batches (function/iterable): Function returning an iterable of (X, y) batches for each epoch
+                (e.g. a generator function), or an iterable to reuse every epoch (e.g. a list).
+                A one-shot iterator, such as a generator object, can only be given for a single epoch.
+            epochs (int, optional): Number of passes. Defaults to 1.
+            callback (function, optional): Called with (epoch, mean loss) after each epoch. Defaults to None.
+
+        Returns:
+            list[float]: Mean batch loss of each epoch
+        """
+        if epochs > 1 and not callable(batches) and iter(batches) is batches:
+            raise ValueError(
+                "An iterator of batches is used up after one epoch, "
+                "pass a function returning the batches (e.g. lambda: minibatches(X, y)) instead"
+            )
+
+        history = []
+        for epoch in range(epochs):
+            losses = [self.train_batch(X, y) for X, y in (batches() if callable(batches) else batches)]
+            if not losses:
+                raise ValueError("No batches to train on")
+
+            history.append(sum(losses) / len(losses))
+            if callback is not None:
+                callback(epoch, history[-1])
+
+        return history
+
+    def evaluate(self, X, y):
+        """Loss on a dataset, without training
+
+        Args:
+            X (array-like): (N, inputs) inputs
+            y (array-like): (N, outputs) targets
+
+        Returns:
+            float: Loss
+        """
+        prediction = self.network.get_compiled().forward_batch(X, self.normalizationFunction)
+        return self.loss(prediction, np.asarray(y, dtype=float))[0]
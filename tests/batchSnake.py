@@ -0,0 +1,189 @@
+import numpy as np
+from snake import GRID_SIZE, MAX_DISTANCE, getSensor
+
+# index of the opposite direction, in DIRECTIONS order (up, down, left, right)
+OPPOSITE = np.array([1, 0, 3, 2])
+# (x, y) step of each direction
+STEPS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)])
+# direction input, matching Game.get_inputs
+DIRECTION_INPUTS = np.array([1, -1/3, -1, 1/3])
+
+class BatchSnakeEnv:
+    """N snake games stored as NumPy arrays and stepped together.
+    Follows the rules of Game: turning into itself or running into the body ends a game,
+     food gives 1000 fitness and 1.5x the moves left, and a game stops at a score of 10.
+
+    Instead of ageing every body cell each move, each game counts its moves (`ticks`),
+     and every cell stores the tick at which it stops being body (`expiry`).
+    A cell is body while its expiry is greater than its game's tick count,
+     so a move costs O(1) per game regardless of grid size.
+    """
+    def __init__(self, n, size=GRID_SIZE, seed=None, autoReset=True, sensor=None):
+        """Construct N games
+
+        Args:
+            n (int): Number of games
+            size (int, optional): Width/height of the grid. Defaults to GRID_SIZE.
+            seed (int/numpy.random.Generator, optional): Seed for positions and food. Defaults to None.
+            autoReset (bool, optional): Start a new game as soon as one finishes. Defaults to True.
+            sensor (RaySensor, optional): Sensor for the ray inputs. Defaults to the one Game uses.
+        """
+        self.n = n
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.autoReset = autoReset
+        self.sensor = sensor or getSensor(size)
+        self.maxDistance = MAX_DISTANCE * size / GRID_SIZE
+
+        self.expiry = np.zeros((n, size * size), dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.head = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.movesAvailable = np.zeros(n)
+        self.fitness = np.zeros(n)
+        self.done = np.zeros(n, dtype=bool)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start new games
+
+        Args:
+            mask (numpy.ndarray, optional): (N,) bool array of games to reset. Defaults to all games.
+
+        Returns:
+            numpy.ndarray: (N, 6 + len(sensor)) observations
+        """
+        self.start_games(np.arange(self.n) if mask is None else np.flatnonzero(mask))
+        return self.observe()
+
+    def start_games(self, games):
+        """Put some games back to their starting state
+
+        Args:
+            games (numpy.ndarray): Indices of games
+        """
+        self.expiry[games] = 0
+        self.ticks[games] = 0
+        self.head[games] = self.rng.integers(0, self.size * self.size, len(games))
+        self.direction[games] = 0
+        self.length[games] = 4
+        self.score[games] = 0
+        self.movesAvailable[games] = self.size * 2
+        self.fitness[games] = 0
+        self.done[games] = False
+        self.place_food(games)
+
+    def place_food(self, games):
+        """Move the food of some games to a random empty cell
+
+        Args:
+            games (numpy.ndarray): Indices of games
+        """
+        if len(games) == 0:
+            return
+
+        # random score per cell, occupied cells can never be picked
+        scores = self.rng.random((len(games), self.size * self.size))
+        scores[self.expiry[games] > self.ticks[games, None]] = -1
+        scores[np.arange(len(games)), self.head[games]] = -1
+
+        self.food[games] = scores.argmax(axis=1)
+
+    def observe(self):
+        """Network inputs of every game, in the same order as Game.get_inputs
+
+        Returns:
+            numpy.ndarray: (N, 6 + len(sensor)) observations
+        """
+        headY, headX = np.divmod(self.head, self.size)
+        foodY, foodX = np.divmod(self.food, self.size)
+
+        cells = self.sensor.table[self.head]
+        body = np.take_along_axis(self.expiry, cells, axis=1) > self.ticks[:, None]
+        food = cells == self.food[:, None]
+
+        observations = np.empty((self.n, 6 + cells.shape[1]))
+        observations[:, 0] = 2 * headX / self.size - 1
+        observations[:, 1] = 2 * headY / self.size - 1
+        observations[:, 2] = 2 * foodX / self.size - 1
+        observations[:, 3] = 2 * foodY / self.size - 1
+        observations[:, 4] = DIRECTION_INPUTS[self.direction]
+        observations[:, 5] = 2 * np.hypot(headX - foodX, headY - foodY) / self.maxDistance - 1
+        observations[:, 6:] = food.astype(float) - body
+
+        return observations
+
+    def step(self, actions):
+        """Make one move in every game that is still running
+
+        Args:
+            actions (numpy.ndarray): (N,) indices into DIRECTIONS
+
+        Returns:
+            tuple: (observations, fitness, done) where fitness holds the final
+                   fitness of each game that finished on this move
+        """
+        actions = np.asarray(actions)
+        active = ~self.done
+
+        self.movesAvailable[active] -= 1
+        self.fitness[active] += 1
+
+        # turning into itself ends the game
+        turned = active & (actions == OPPOSITE[self.direction])
+        moving = np.flatnonzero(active & ~turned)
+        self.direction[moving] = actions[moving]
+
+        # age the body and replace the head with body
+        self.ticks[moving] += 1
+        self.expiry[moving, self.head[moving]] = self.ticks[moving] + self.length[moving] + 1
+
+        # move the head
+        y, x = np.divmod(self.head[moving], self.size)
+        step = STEPS[self.direction[moving]]
+        x = (x + step[:, 0]) % self.size
+        y = (y + step[:, 1]) % self.size
+        self.head[moving] = y * self.size + x
+
+        collided = self.expiry[moving, self.head[moving]] > self.ticks[moving]
+
+        ate = moving[~collided & (self.head[moving] == self.food[moving])]
+        self.score[ate] += 1
+        self.length[ate] += 1
+        self.movesAvailable[ate] *= 1.5
+        self.fitness[ate] += 1000
+        self.place_food(ate)
+
+        finished = turned.copy()
+        finished[moving[collided]] = True
+        finished |= active & ((self.score >= 10) | (self.movesAvailable < 1))
+        self.done |= finished
+
+        fitness = np.where(finished, self.fitness, 0)
+        if self.autoReset and finished.any():
+            self.start_games(np.flatnonzero(finished))
+
+        return self.observe(), fitness, finished
+
+    def run(self, population):
+        """Play one game per network of a population, without resetting
+
+        Args:
+            population (Population): Population with one network per game
+
+        Returns:
+            numpy.ndarray: (N,) fitness of each game
+        """
+        autoReset = self.autoReset
+        self.autoReset = False
+
+        observations = self.reset()
+        while not self.done.all():
+            observations, _, _ = self.step(population.highest_output_indices(observations))
+
+        self.autoReset = autoReset
+        return self.fitness.copy()
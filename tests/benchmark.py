@@ -0,0 +1,296 @@
+"""Offline benchmarks of the hot paths: forward passes, mutation, construction and the snake game.
+Every benchmark uses fixed seeds and reports the median time per operation of a few repeats,
+ along with their spread (see measure).
+
+    python benchmark.py                     run, compare against this machine's baseline and fail on regressions
+    python benchmark.py --save              run and store the results as this machine's baseline
+    python benchmark.py --output out.json   also write the results to a file
+
+Timings depend on the machine, so baselines are stored per host (benchmark-<host>.json, not committed),
+ and the first run on a machine has to be made with --save.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+sys.path.insert(0, "../src")
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+from population import Population
+import snake
+from batchSnake import BatchSnakeEnv
+
+BASELINE = f"benchmark-{platform.node() or 'local'}.json"
+# a benchmark regresses when it is this much slower than the baseline, at least
+TOLERANCE = 0.25
+# and at least this many times its relative spread (the noisier of the run and the baseline)
+NOISE = 2
+
+# (name, shape, population size) of the networks to benchmark, the second is the snake network's shape
+SHAPES = (
+    ("tiny", (4, 8, 2), 200),
+    ("snake", (38, 24, 16, 4), 200),
+    ("wide", (256, 256, 64), 200),
+    ("large", (1000, 1000, 10), 10),
+)
+POPULATION = 200
+
+BENCHMARKS = {}
+
+# seconds in each throughput period
+PERIODS = {"s": 1, "min": 60}
+
+def benchmark(name, unit, per="s"):
+    """Register a benchmark.
+    The function sets everything up and returns (run, operations): run() is timed,
+     and does `operations` units of work per call.
+
+    Args:
+        name (string): Name in the results
+        unit (string): Unit of work, for the printed throughput
+        per (string, optional): Period of the printed throughput, "s" or "min". Defaults to "s".
+    """
+    def register(function):
+        BENCHMARKS[name] = (function, unit, per)
+        return function
+
+    return register
+
+
+def measure(run, operations, repeats=7, minimum=0.2):
+    """Median time per operation of a few repeats, and how much the repeats spread
+
+    Args:
+        run (function): Function to time
+        operations (int): Operations done by one call
+        repeats (int, optional): Number of repeats. Defaults to 7.
+        minimum (float, optional): Seconds each repeat lasts at least. Defaults to 0.2.
+
+    Returns:
+        tuple[float, float]: Seconds per operation, and the range of the repeats relative to it
+    """
+    # calls per repeat, so short benchmarks are not dominated by timer resolution
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    calls = max(1, int(minimum / max(elapsed, 1e-9)))
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        times.append((time.perf_counter() - start) / calls)
+
+    median = statistics.median(times)
+    return median / operations, (max(times) - min(times)) / median
+
+
+def seed():
+    random.seed(0)
+    np.random.seed(0)
+
+
+def makeNetwork(shape, **kwargs):
+    network = Network([IONeuron(f"input{i}") for i in range(shape[0])])
+    for size in shape[1:-1]:
+        network.add_layer(Layer([Neuron(0) for _ in range(size)]))
+    network.add_layer(Layer([IONeuron(f"output{i}") for i in range(shape[-1])]))
+    network.build_connections(**kwargs)
+    return network
+
+
+def networkBenchmarks(name, shape, size):
+    @benchmark(f"start.graph.{name}", "passes")
+    def graphForward():
+        seed()
+        network = makeNetwork(shape, initializer="uniform", rng=0)
+        network.set_inputs(np.random.uniform(-1, 1, shape[0]).tolist())
+        return network.start, 1
+
+    @benchmark(f"start.compiled.{name}", "passes")
+    def compiledForward():
+        seed()
+        network = makeNetwork(shape, initializer="uniform", rng=0).compile()
+        network.set_inputs(np.random.uniform(-1, 1, shape[0]).tolist())
+        return network.start, 1
+
+    @benchmark(f"forward.population.{name}", "passes")
+    def populationForward():
+        seed()
+        population = Population.initialize(makeNetwork(shape, initializer="uniform", rng=0), size, rng=0)
+        X = np.random.uniform(-1, 1, (size, shape[0]))
+        return (lambda: population.forward(X)), size
+
+    @benchmark(f"mutate.compiled.{name}", "parameters")
+    def compiledMutate():
+        network = makeNetwork(shape, initializer="uniform", rng=0).compile()
+        rng = np.random.default_rng(0)
+        return (lambda: network.mutate(0.1, 0.5, rng)), len(network.params)
+
+    @benchmark(f"mutate.population.{name}", "parameters")
+    def populationMutate():
+        population = Population.initialize(makeNetwork(shape, initializer="uniform", rng=0), size, rng=0)
+        rng = np.random.default_rng(0)
+        return (lambda: population.mutate(0.1, 0.5, rng)), population.genomes.size
+
+    @benchmark(f"build.strengthFunction.{name}", "networks")
+    def buildPerWeight():
+        seed()
+        return (lambda: makeNetwork(shape)), 1
+
+    @benchmark(f"build.initializer.{name}", "networks")
+    def buildInitializer():
+        return (lambda: makeNetwork(shape, initializer="xavier", rng=0)), 1
+
+
+for name, shape, size in SHAPES:
+    networkBenchmarks(name, shape, size)
+
+
+@benchmark("mutate.graph.snake", "parameters")
+def graphMutate():
+    seed()
+    network = makeNetwork(SHAPES[1][1], initializer="uniform", rng=0)
+    return (lambda: network.mutate(0.1, 0.5)), len(network.params)
+
+
+@benchmark("snake.game", "steps")
+def gameSteps():
+    # snake.nn's weights are not seeded, and game lengths (so steps/s) depend on them
+    network = snake.nn.clone()
+    network.set_parameters(np.random.default_rng(0).uniform(-1, 1, len(network.params)))
+    network.compile()
+    games = 20
+
+    def run():
+        for i in range(games):
+            snake.evaluateNetwork(network, i)
+
+    steps = 0
+    for i in range(games):
+        random.seed(i)
+        game = snake.Game(network)
+        game.run()
+        steps += game.movesMade
+    return run, steps
+
+
+@benchmark("snake.batch", "steps")
+def batchSteps():
+    population = Population.initialize(snake.nn, POPULATION, rng=0)
+    env = BatchSnakeEnv(POPULATION, seed=0)
+    observations = env.reset()
+
+    def run():
+        nonlocal observations
+        observations, _, _ = env.step(population.highest_output_indices(observations))
+
+    return run, POPULATION
+
+
+@benchmark("snake.generation", "generations", per="min")
+def generation():
+    def run():
+        seed()
+        rng = np.random.default_rng(0)
+        population = Population.initialize(snake.nn, POPULATION, rng=rng)
+        snake.doGeneration(population, rng)
+
+    return run, 1
+
+
+def runBenchmarks(names=None):
+    """Run benchmarks
+
+    Args:
+        names (list[string], optional): Prefixes of the benchmarks to run. Defaults to all benchmarks.
+
+    Returns:
+        dict: name -> {"seconds": median seconds per operation, "spread": relative range of the repeats,
+              "unit": unit of work}
+    """
+    results = {}
+    for name, (function, unit, per) in BENCHMARKS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+
+        run, operations = function()
+        seconds, spread = measure(run, operations)
+        results[name] = {"seconds": seconds, "spread": spread, "unit": unit}
+        print(f"{name:<36} {PERIODS[per] / seconds:>14,.1f} {unit}/{per}  (spread {spread:.0%})")
+
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE, noise=NOISE):
+    """Find benchmarks slower than their baseline by more than their noise
+
+    Args:
+        results (dict): Results of runBenchmarks
+        baseline (dict): Stored results
+        tolerance (float, optional): Smallest slowdown counted (0.25 is 25% slower). Defaults to TOLERANCE.
+        noise (float, optional): Smallest slowdown counted, in multiples of the larger relative spread
+            of the run and the baseline. Defaults to NOISE.
+
+    Returns:
+        list[tuple[string, float, float]]: (name, slowdown, allowed slowdown) of every regression
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        slowdown = result["seconds"] / baseline[name]["seconds"] - 1
+        # baselines saved before spreads were stored count as noiseless
+        allowed = max(tolerance, noise * max(result["spread"], baseline[name].get("spread", 0)))
+        if slowdown > allowed:
+            regressions.append((name, slowdown, allowed))
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the network and snake hot paths")
+    parser.add_argument("names", nargs="*", help="prefixes of the benchmarks to run (default: all)")
+    parser.add_argument("--baseline", default=BASELINE, help=f"baseline results of this machine (default: {BASELINE})")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help=f"smallest slowdown counted (default: {TOLERANCE})")
+    parser.add_argument("--noise", type=float, default=NOISE,
+                        help=f"smallest slowdown counted, in multiples of the relative spread (default: {NOISE})")
+    args = parser.parse_args()
+
+    results = runBenchmarks(args.names)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=4)
+        sys.exit(0)
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, run with --save first to create this machine's baseline")
+        sys.exit(2)
+
+    regressions = compare(results, baseline, args.tolerance, args.noise)
+    if regressions:
+        # a slowdown from a burst of load elsewhere does not last, so only count ones measured twice
+        print("Measuring the regressions again")
+        names = [name for name, _, _ in regressions]
+        rerun = runBenchmarks(names)
+        regressions = compare({name: rerun[name] for name in names}, baseline, args.tolerance, args.noise)
+
+    for name, slowdown, allowed in regressions:
+        print(f"REGRESSION {name}: {slowdown:.0%} slower than the baseline (noise allows {allowed:.0%})")
+
+    sys.exit(1 if regressions else 0)
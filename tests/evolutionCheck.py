@@ -0,0 +1,189 @@
+"""Check of parallel evaluation: GenerationRunner must give the same fitness for every worker count
+and chunk size, and with a FitnessCache must skip genomes it has seen with the same seed
+(including duplicates within one generation), evict the least recently used results, and never
+change a fitness.
+SteadyStateRunner, one child at a time, must match breeding and replacing by hand: each child
+replaces the least fit member if at least as fit, with P evaluations per generation of seeds.
+
+    python evolutionCheck.py     exits with 1 on any mismatch
+"""
+import sys
+sys.path.insert(0, "../src")
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+from evolution import GenerationRunner, FitnessCache, SteadyStateRunner
+from genetic import GeneticAlgorithm
+
+SHAPE = (6, 8, 3)
+SIZE = 24
+# genomes evaluated in this process, to count the evaluations a cache saves
+evaluated = []
+
+def makeNetwork():
+    network = Network([IONeuron(f"input{i}") for i in range(SHAPE[0])])
+    network.add_layer(Layer([Neuron(0) for _ in range(SHAPE[1])], "tanh"))
+    network.add_layer(Layer([IONeuron(f"output{i}") for i in range(SHAPE[2])]))
+    network.build_connections(initializer="uniform", rng=0)
+    return network
+
+
+def evaluate(network, seed):
+    """Deterministic fitness of a network given the seed"""
+    evaluated.append(seed)
+    X = np.random.default_rng(seed).uniform(-1, 1, (8, SHAPE[0]))
+    return float(network.get_compiled().forward_batch(X).sum())
+
+
+def generations(runner, genomes, count=3):
+    return np.array([runner.evaluate(genomes + generation) for generation in range(count)])
+
+
+def checkWorkers(rng):
+    failures = 0
+    template = makeNetwork()
+    genomes = rng.uniform(-1, 1, (SIZE, len(template.params)))
+
+    with GenerationRunner(template, evaluate, workers=1, seed=3) as runner:
+        expected = generations(runner, genomes)
+
+    for workers, chunkSize in ((2, None), (2, 1), (3, 5)):
+        with GenerationRunner(template, evaluate, workers=workers, chunkSize=chunkSize, seed=3) as runner:
+            fitness = generations(runner, genomes)
+        if not np.array_equal(fitness, expected):
+            print(f"FAIL {workers} workers, chunks of {chunkSize}: fitness differs from 1 worker")
+            failures += 1
+
+    return failures
+
+
+def checkCache(rng):
+    failures = 0
+    template = makeNetwork()
+    genomes = rng.uniform(-1, 1, (SIZE, len(template.params)))
+    # a third of the generation are copies, as elites and unmutated children are
+    genomes[SIZE * 2 // 3:] = genomes[:SIZE // 3]
+    unique = SIZE * 2 // 3
+
+    with GenerationRunner(template, evaluate, workers=1, seed=3, fixedSeed=True) as runner:
+        expected = runner.evaluate(genomes)
+
+    cache = FitnessCache()
+    with GenerationRunner(template, evaluate, workers=1, seed=3, fixedSeed=True, cache=cache) as runner:
+        evaluated.clear()
+        first = runner.evaluate(genomes)
+        if len(evaluated) != unique or len(cache) != unique:
+            print(f"FAIL cache: {len(evaluated)} evaluations for {unique} distinct genomes")
+            failures += 1
+
+        evaluated.clear()
+        second = runner.evaluate(genomes)
+        if evaluated or cache.hits != SIZE or cache.misses != SIZE:
+            print(f"FAIL cache: {len(evaluated)} evaluations and {cache.hits} hits for a repeated generation")
+            failures += 1
+
+        # a genome differing in one gene is not a hit
+        changed = genomes[:1].copy()
+        changed[0, 0] = np.nextafter(changed[0, 0], np.inf)
+        evaluated.clear()
+        runner.evaluate(changed)
+        if len(evaluated) != 1:
+            print("FAIL cache: a changed genome was not evaluated")
+            failures += 1
+
+    if not (np.array_equal(first, expected) and np.array_equal(second, expected)):
+        print("FAIL cache: cached fitness differs from evaluated fitness")
+        failures += 1
+
+    # the same genome with another seed is another result
+    if FitnessCache.key(genomes[0], 1) == FitnessCache.key(genomes[0], 2):
+        print("FAIL cache: keys ignore the seed")
+        failures += 1
+    if FitnessCache.key(genomes[0], 1) == FitnessCache.key(genomes[0].astype(np.float32), 1):
+        print("FAIL cache: keys ignore the dtype")
+        failures += 1
+
+    # least recently used results go first
+    cache = FitnessCache(size=2)
+    keys = [FitnessCache.key(genome, 0) for genome in genomes[:3]]
+    cache.put(keys[0], 0.0)
+    cache.put(keys[1], 1.0)
+    cache.get(keys[0])
+    cache.put(keys[2], 2.0)
+    if len(cache) != 2 or cache.get(keys[1]) is not None or cache.get(keys[0]) != 0.0:
+        print("FAIL cache: evicted the wrong result")
+        failures += 1
+
+    return failures
+
+
+def steadyState(template, genomes, evaluations, workers, cache=None):
+    """Evolved genomes and fitness, the SteadyStateRunner, and the evaluations the callback saw"""
+    genomes = genomes.copy()
+    with GenerationRunner(template, evaluate, workers=workers, seed=3, fixedSeed=cache is not None, cache=cache) as runner:
+        fitness = runner.evaluate(genomes)
+        # one child at a time, so the order of results does not depend on the workers
+        steady = SteadyStateRunner(runner, GeneticAlgorithm(SHAPE, rng=5), inFlight=1)
+        calls = []
+        steady.run(genomes, fitness, evaluations, lambda *args: calls.append(args[0]))
+    return genomes, fitness, steady, calls
+
+
+def checkSteadyState(rng, evaluations=100):
+    failures = 0
+    template = makeNetwork()
+    genomes = rng.uniform(-1, 1, (SIZE, len(template.params)))
+
+    # by hand: the runner evaluated the first generation, children use the following ones
+    expectedGenomes = genomes.copy()
+    with GenerationRunner(template, evaluate, workers=1, seed=3) as runner:
+        expectedFitness = runner.evaluate(expectedGenomes)
+    algorithm = GeneticAlgorithm(SHAPE, rng=5)
+    network = makeNetwork()
+    replacements = 0
+    for evaluation in range(evaluations):
+        child = algorithm.offspring(expectedGenomes, expectedFitness, 1)
+        network.set_parameters(child[0])
+        childFitness = evaluate(network, runner.seeds(SIZE, 1 + evaluation // SIZE)[evaluation % SIZE])
+        worst = np.argmin(expectedFitness)
+        if childFitness >= expectedFitness[worst]:
+            expectedGenomes[worst] = child[0]
+            expectedFitness[worst] = childFitness
+            replacements += 1
+
+    for workers in (1, 2):
+        name = f"steady state, {workers} workers"
+        evolved, fitness, steady, calls = steadyState(template, genomes, evaluations, workers)
+        if not (np.array_equal(evolved, expectedGenomes) and np.array_equal(fitness, expectedFitness)):
+            print(f"FAIL {name}: population differs from replacing by hand")
+            failures += 1
+        if steady.evaluations != evaluations or steady.replacements != replacements:
+            print(f"FAIL {name}: {steady.evaluations} evaluations and {steady.replacements} replacements, "
+                  f"expected {evaluations} and {replacements}")
+            failures += 1
+        if calls != list(range(SIZE, evaluations + 1, SIZE)):
+            print(f"FAIL {name}: callback after evaluations {calls}")
+            failures += 1
+
+    # with a fixed seed every fitness can be checked against its genome, cached or not
+    cache = FitnessCache()
+    evolved, fitness, steady, _ = steadyState(template, genomes, evaluations, 1, cache)
+    with GenerationRunner(template, evaluate, workers=1, seed=3, fixedSeed=True) as runner:
+        seed = runner.seeds(1)[0]
+    for genome, genomeFitness in zip(evolved, fitness):
+        network.set_parameters(genome)
+        if evaluate(network, seed) != genomeFitness:
+            print("FAIL steady state with a cache: fitness does not match its genome")
+            failures += 1
+            break
+    if cache.hits + cache.misses != SIZE + evaluations:
+        print(f"FAIL steady state with a cache: {cache.hits + cache.misses} lookups for {SIZE + evaluations} evaluations")
+        failures += 1
+
+    return failures
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failures = checkWorkers(rng) + checkCache(rng) + checkSteadyState(rng)
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)
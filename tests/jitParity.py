@@ -0,0 +1,93 @@
+"""Parity check of the JIT kernels against the NumPy paths.
+Without numba the kernels run as plain Python, which checks the same code numba compiles;
+with numba the compiled kernels are also checked against the plain Python ones.
+
+    python jitParity.py     exits with 1 on any mismatch
+"""
+import sys
+import random
+sys.path.insert(0, "../src")
+import numpy as np
+import activations
+import jit
+from compiled import CompiledNetwork, genomeLength
+from jit import JitCompiledNetwork
+import snake
+
+# forward passes only differ in the order of the sums
+TOLERANCE = 1e-12
+
+SHAPES = ((4, 8, 2), (38, 24, 16, 4), (10, 1, 3))
+
+def checkForward(rng, passes=20):
+    failures = 0
+    for shape in SHAPES:
+        for activation in jit.ACTIVATION_CODES:
+            params = rng.uniform(-2, 2, genomeLength(shape))
+            layerActivations = [None] * (len(shape) - 2) + [activation]
+            reference = CompiledNetwork(shape, range(shape[0]), range(shape[-1]), params.copy(), layerActivations)
+            compiled = JitCompiledNetwork(shape, range(shape[0]), range(shape[-1]), params.copy(), layerActivations)
+
+            for _ in range(passes):
+                reference.inputs[:] = compiled.inputs[:] = rng.uniform(-1, 1, shape[0])
+                expected = reference.forward(activations.tanh).copy()
+                actual = compiled.forward(activations.tanh)
+
+                if not np.allclose(actual, expected, rtol=TOLERANCE, atol=TOLERANCE):
+                    print(f"FAIL forward {shape} {activation.__name__}: {actual} != {expected}")
+                    failures += 1
+                    break
+
+                if jit.AVAILABLE:
+                    values = np.zeros_like(compiled.flatValues)
+                    codes = compiled.codes(activations.tanh)
+                    jit.denseForward.py_func(compiled.params, compiled.shapeArray, codes, compiled.inputs, values)
+                    if not np.array_equal(values, compiled.flatValues):
+                        print(f"FAIL compiled forward {shape} {activation.__name__} differs from plain Python")
+                        failures += 1
+                        break
+
+    return failures
+
+
+def playGame(seed, kernels, steps=300):
+    """Play a game with random moves, returning the inputs and head of every step"""
+    snake.JIT_AVAILABLE = kernels
+    random.seed(seed)
+    game = snake.Game(None)
+    directions = random.Random(seed)
+
+    trace = []
+    while game.running() and len(trace) < steps:
+        trace.append((game.get_inputs(), list(game.headPos)))
+        if not game.step(directions.choice(snake.DIRECTIONS)):
+            break
+
+    return trace
+
+
+def checkSnake(games=50):
+    available = snake.JIT_AVAILABLE
+    failures = 0
+    try:
+        for seed in range(games):
+            expected = playGame(seed, False)
+            actual = playGame(seed, True)
+
+            same = len(actual) == len(expected) and all(
+                np.array_equal(a, e) and aHead == eHead for (a, aHead), (e, eHead) in zip(actual, expected)
+            )
+            if not same:
+                print(f"FAIL snake game {seed}: kernel inputs or moves differ")
+                failures += 1
+    finally:
+        snake.JIT_AVAILABLE = available
+
+    return failures
+
+
+if __name__ == "__main__":
+    print(f"numba {'installed, checking compiled kernels' if jit.AVAILABLE else 'not installed, checking plain Python kernels'}")
+    failures = checkForward(np.random.default_rng(0)) + checkSnake()
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)
@@ -1,6 +1,6 @@
 import sys
 sys.path.insert(0, "../src")
-from main import Layer, Network, Neuron, Connection, IONeuron
+from main import Layer, Network, Neuron, IONeuron
 
 inputNeurons = [
     IONeuron("inp1"),
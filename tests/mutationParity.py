@@ -0,0 +1,108 @@
+"""Parity check of Network.mutate across compiled forms and seeding.
+The same generator must give the same parameters whether the network is uncompiled or
+ compiled (dense, sparse, float32), random.seed must make mutation without a generator repeatable,
+ pruned connections must stay at 0, and the fraction and size of changes must match chance and
+ standardDeviation.
+
+    python mutationParity.py     exits with 1 on any mismatch
+"""
+import sys
+import random
+sys.path.insert(0, "../src")
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+
+SHAPE = (38, 24, 16, 4)
+# (sparse, precision) of the compiled forms, None for uncompiled
+FORMS = (None, (False, "float64"), (True, "float64"), (False, "float32"), (True, "float32"))
+
+def makeNetwork(seed):
+    network = Network([IONeuron(f"input{i}") for i in range(SHAPE[0])])
+    for size in SHAPE[1:-1]:
+        network.add_layer(Layer([Neuron(0) for _ in range(size)]))
+    network.add_layer(Layer([IONeuron(f"output{i}") for i in range(SHAPE[-1])]))
+    network.build_connections(initializer="uniform", rng=seed)
+    network.prune(0.3)
+    return network
+
+
+def mutated(form, seed, chance=0.2, standardDeviation=0.5):
+    network = makeNetwork(0)
+    if form is not None:
+        sparse, precision = form
+        network.compile(sparse, precision)
+    network.mutate(chance, standardDeviation, seed)
+    return network
+
+
+def checkForms():
+    failures = 0
+    reference = mutated(None, 1)
+    mask = reference.parameter_mask()
+
+    for form in FORMS[1:]:
+        network = mutated(form, 1)
+        if not np.array_equal(network.params, reference.params):
+            print(f"FAIL compiled {form}: parameters differ from the uncompiled network's")
+            failures += 1
+
+        # the compiled copy is refreshed, so it matches a fresh dense form of the parameters
+        X = np.random.default_rng(0).uniform(-1, 1, (10, SHAPE[0]))
+        expected = network.get_compiled().forward_batch(X)
+        if not np.allclose(network.compiled.forward_batch(X), expected, rtol=1e-5, atol=1e-5):
+            print(f"FAIL compiled {form}: compiled form not refreshed after mutating")
+            failures += 1
+
+    if np.abs(reference.params[~mask]).max() != 0:
+        print("FAIL pruned connections mutated")
+        failures += 1
+
+    return failures
+
+
+def checkSeeding():
+    failures = 0
+    runs = []
+    for seed in (5, 5, 6):
+        random.seed(seed)
+        network = makeNetwork(0)
+        network.mutate(0.2, 0.5)
+        runs.append(network.params)
+
+    if not np.array_equal(runs[0], runs[1]):
+        print("FAIL random.seed does not make mutation repeatable")
+        failures += 1
+    if np.array_equal(runs[0], runs[2]):
+        print("FAIL different random seeds give the same mutation")
+        failures += 1
+
+    return failures
+
+
+def checkStatistics(chance=0.3, standardDeviation=0.5):
+    changes = []
+    for seed in range(20):
+        network = makeNetwork(0)
+        mask = network.parameter_mask()
+        before = network.params.copy()
+        network.mutate(chance, standardDeviation, seed)
+        changes.append((network.params - before)[mask])
+
+    changes = np.concatenate(changes)
+    changed = changes[changes != 0]
+    failures = 0
+    if abs(len(changed) / len(changes) - chance) > 0.01:
+        print(f"FAIL {len(changed) / len(changes):.3f} of the parameters changed, expected {chance}")
+        failures += 1
+    if abs(changed.std() - standardDeviation) > 0.03:
+        print(f"FAIL changes have a standard deviation of {changed.std():.3f}, expected {standardDeviation}")
+        failures += 1
+
+    return failures
+
+
+if __name__ == "__main__":
+    # both ways of picking the mutated genes (see mutation.SPARSE_CHANCE)
+    failures = checkForms() + checkSeeding() + checkStatistics(0.3) + checkStatistics(0.05)
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,148 @@
+"""Round-trip check of network serialization: to_bytes/from_bytes and save/load,
+in float64 (exact) and float32 (parameters rounded to float32), with per-layer activations,
+and of PopulationStore checkpoints, including one resumed after a partly written record.
+
+    python roundTrip.py     exits with 1 on any mismatch
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, "../src")
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+from storage import PopulationStore
+
+# (hidden layer sizes and activations, output activation) of the networks to check
+NETWORKS = (
+    (((8, None),), None),
+    (((24, "tanh"), (16, "relu")), "softmax"),
+    (((5, "leakyRelu"),), "fastSigmoid"),
+)
+INPUTS = 6
+OUTPUTS = 3
+
+def makeNetwork(hidden, outputActivation, rng):
+    network = Network([IONeuron(f"input{i}") for i in range(INPUTS)])
+    for size, activation in hidden:
+        network.add_layer(Layer([Neuron(0) for _ in range(size)], activation))
+    network.add_layer(Layer([IONeuron(f"output{i}") for i in range(OUTPUTS)], outputActivation))
+    network.build_connections(initializer="uniform", rng=rng)
+    network.set_parameters(rng.uniform(-2, 2, len(network.params)))
+    return network
+
+
+def outputs(network, X):
+    return network.compile().forward_batch(X)
+
+
+def check(name, network, loaded, dtype, X):
+    expected = network.params.astype(dtype).astype(float)
+    if not np.array_equal(loaded.params, expected):
+        return f"{name}: parameters differ"
+
+    original, copy = network.get_compiled(), loaded.get_compiled()
+    if original.shape != copy.shape or original.inputNames != copy.inputNames or original.outputNames != copy.outputNames:
+        return f"{name}: shape or names differ"
+    if original.activations != copy.activations:
+        return f"{name}: activations {copy.activations} != {original.activations}"
+
+    tolerance = 0 if dtype == np.float64 else 1e-5
+    if not np.allclose(outputs(loaded, X), outputs(network, X), rtol=tolerance, atol=tolerance):
+        return f"{name}: outputs differ"
+    return None
+
+
+def checkNetworks(rng):
+    failures = 0
+    directory = tempfile.mkdtemp()
+    for index, (hidden, outputActivation) in enumerate(NETWORKS):
+        network = makeNetwork(hidden, outputActivation, rng)
+        X = rng.uniform(-1, 1, (20, INPUTS))
+
+        for dtype in (np.float64, np.float32):
+            path = os.path.join(directory, f"network{index}.net")
+            network.save(path, dtype)
+
+            loaded = {
+                "bytes": Network.from_bytes(network.to_bytes(dtype)),
+                "bytearray": Network.from_bytes(bytearray(network.to_bytes(dtype))),
+                "file": Network.load(path),
+            }
+            for how, copy in loaded.items():
+                difference = check(f"network {index} {np.dtype(dtype).name} {how}", network, copy, dtype, X)
+                if difference is not None:
+                    print(f"FAIL {difference}")
+                    failures += 1
+
+            os.remove(path)
+
+    os.rmdir(directory)
+    return failures
+
+
+def checkStore(rng, size=6, generations=3):
+    failures = 0
+    template = makeNetwork(*NETWORKS[1], rng)
+    # hidden layers swapped
+    other = makeNetwork(((16, "tanh"), (24, "relu")), "softmax", rng)
+    path = os.path.join(tempfile.mkdtemp(), "population.pop")
+
+    for dtype in (np.float64, np.float32):
+        name = f"store {np.dtype(dtype).name}"
+        store = PopulationStore.create(path, template, size, dtype)
+        history = []
+        for generation in range(generations):
+            genomes = rng.uniform(-1, 1, (size, len(template.params)))
+            fitness = rng.uniform(0, 100, size)
+            state = np.random.default_rng(generation)
+            store.append(generation, genomes, fitness, state)
+            history.append((genomes.astype(dtype), fitness, state.bit_generator.state))
+
+        # an interrupted append leaves part of a record behind, the next one replaces it
+        with open(path, "ab") as f:
+            f.write(bytes(store.dtype.itemsize // 2))
+        store = PopulationStore(path)
+        if len(store) != generations:
+            print(f"FAIL {name}: partial record counted")
+            failures += 1
+        genomes = rng.uniform(-1, 1, (size, len(template.params)))
+        store.append(generations, genomes, np.zeros(size))
+        history.append((genomes.astype(dtype), np.zeros(size), None))
+
+        store = PopulationStore(path)
+        if os.path.getsize(path) != store.offset + len(history) * store.dtype.itemsize:
+            print(f"FAIL {name}: file size")
+            failures += 1
+        for index, (genomes, fitness, state) in enumerate(history):
+            stored = store.rng(index)
+            same = (
+                store.generation(index) == index and np.array_equal(store.genomes(index), genomes)
+                and np.array_equal(store.fitness(index), fitness)
+                and (stored.bit_generator.state == state if state is not None else stored is None)
+            )
+            if not same:
+                print(f"FAIL {name}: record {index} differs")
+                failures += 1
+
+        population = store.population(template=template)
+        if population.genomes.dtype != dtype or not np.array_equal(population.genomes, history[-1][0]):
+            print(f"FAIL {name}: population genomes differ")
+            failures += 1
+
+        try:
+            store.population(template=other)
+            print(f"FAIL {name}: loaded into a template of another shape")
+            failures += 1
+        except ValueError:
+            pass
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    return failures
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failures = checkNetworks(rng) + checkStore(rng)
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)
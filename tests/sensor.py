@@ -0,0 +1,89 @@
+import numpy as np
+
+# (x, y) step and name of each ray direction, in network input order.
+# The first 4 look straight, the next 4 diagonally, the last 8 along knight moves.
+RAY_DIRECTIONS = (
+    ((0, -1), "up"),
+    ((0, 1), "down"),
+    ((-1, 0), "left"),
+    ((1, 0), "right"),
+    ((1, -1), "upright"),
+    ((1, 1), "downright"),
+    ((-1, 1), "downleft"),
+    ((-1, -1), "upleft"),
+    ((1, -2), "upupright"),
+    ((2, -1), "uprightright"),
+    ((2, 1), "downrightright"),
+    ((1, 2), "downdownright"),
+    ((-1, 2), "downdownleft"),
+    ((-2, 1), "downleftleft"),
+    ((-2, -1), "upleftleft"),
+    ((-1, -2), "upupleft"),
+)
+
+
+class RaySensor:
+    """Looks along rays going out from the snake's head.
+    For every head position, the wrapped flat index of every ray cell is computed once,
+     so reading the sensor is a single gather from a flat grid array.
+    """
+    def __init__(self, size, rayLength=4, directions=8):
+        """Construct a sensor for a grid
+
+        Args:
+            size (int): Width/height of the grid
+            rayLength (int, optional): Cells looked at along each ray. Defaults to 4.
+            directions (int, optional): Number of rays (4, 8 or 16). Defaults to 8.
+        """
+        if directions not in (4, 8, 16):
+            raise ValueError(f"directions must be 4, 8 or 16, not {directions}")
+
+        self.size = size
+        self.rayLength = rayLength
+        rays = RAY_DIRECTIONS[:directions]
+
+        # input names, e.g. up1, up2, up3, up4, down1, ...
+        self.names = tuple(
+            f"{name}{distance}"
+            for _, name in rays
+            for distance in range(1, rayLength + 1)
+        )
+
+        offsets = np.array([
+            (dx * distance, dy * distance)
+            for (dx, dy), _ in rays
+            for distance in range(1, rayLength + 1)
+        ])
+        y, x = np.divmod(np.arange(size * size), size)
+        rayX = (x[:, None] + offsets[:, 0]) % size
+        rayY = (y[:, None] + offsets[:, 1]) % size
+
+        # (size * size, len(names)) flat cell indices for each head position
+        self.table = rayY * size + rayX
+
+    def __len__(self):
+        return len(self.names)
+
+    def read(self, cells, head):
+        """Gather the ray cells for one head position
+
+        Args:
+            cells (numpy.ndarray): Flat (size * size,) grid array
+            head (int): Flat index of the head (y * size + x)
+
+        Returns:
+            numpy.ndarray: Value of every ray cell
+        """
+        return cells[self.table[head]]
+
+    def read_batch(self, cells, heads):
+        """Gather the ray cells for many grids at once
+
+        Args:
+            cells (numpy.ndarray): (N, size * size) grid arrays
+            heads (numpy.ndarray): (N,) flat head indices
+
+        Returns:
+            numpy.ndarray: (N, len(names)) value of every ray cell
+        """
+        return np.take_along_axis(cells, self.table[heads], axis=1)
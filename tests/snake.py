@@ -1,15 +1,59 @@
+import os
 import math
+import time
 import random
-import copy
 import sys
+from collections import deque
 sys.path.insert(0, "../src")
-from main import Layer, Network, Neuron, Connection, IONeuron
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+from population import Population
+from genetic import GeneticAlgorithm
+from evolution import GenerationRunner, FitnessCache, SteadyStateRunner
+from storage import PopulationStore
+from sensor import RaySensor
+from profiling import Profiler
+from telemetry import Telemetry
+from jit import jit, AVAILABLE as JIT_AVAILABLE
 
 GRID_SIZE = 30
 MAX_LIFE  = 10
 
 MAX_DISTANCE = math.sqrt(2 * (GRID_SIZE ** 2))
 
+# order of the output neurons
+DIRECTIONS = ("up", "down", "left", "right")
+
+# 4 cells up/down/left/right and along all diagonals
+SENSOR = RaySensor(GRID_SIZE, rayLength=4, directions=8)
+
+# order of the input neurons
+FEATURE_NAMES = ("headX", "headY", "foodX", "foodY", "direction", "foodDistance")
+INPUT_NAMES = FEATURE_NAMES + SENSOR.names
+
+# cell values
+EMPTY = 0
+HEAD = 1
+BODY = 2
+FOOD = 3
+
+# network input and display character for each cell value
+CELL_INPUTS = np.array([0, 0, -1, 1], dtype=float)
+CELL_CHARACTERS = ("-", "■", "□", "◊")
+
+# index of each direction in DIRECTIONS, and its direction input (see Game.get_inputs), for the kernels
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+DIRECTION_INPUTS = np.array([1, -1/3, -1, 1/3])
+
+# sensors for other board sizes, built on first use
+SENSORS = {GRID_SIZE: SENSOR}
+
+def getSensor(size):
+    if size not in SENSORS:
+        SENSORS[size] = RaySensor(size, SENSOR.rayLength, len(SENSOR.names) // SENSOR.rayLength)
+    return SENSORS[size]
+
+
 def normalize(n, min_, max_):
     """Normalize n between a range.
 
@@ -24,160 +68,267 @@ def normalize(n, min_, max_):
     return 2 * ((n - min_) / (max_ - min_)) - 1
 
 
-class Cell:
-    """Possible values for each cell:
+@jit
+def encodeInputs(headX, headY, foodX, foodY, direction, size, maxDistance, cells, rays, cellInputs, out):
+    """Game.get_inputs as a kernel: the features, then the value of every ray cell
+
+    Args:
+        direction (int): Index of the direction in DIRECTIONS
+        cells (numpy.ndarray): Flat board values
+        rays (numpy.ndarray): Flat index of every ray cell (the sensor's row for the head)
+        cellInputs (numpy.ndarray): Input for each cell value
+        out (numpy.ndarray): Inputs, in the order of Game.inputNames
+    """
+    out[0] = 2 * (headX / size) - 1
+    out[1] = 2 * (headY / size) - 1
+    out[2] = 2 * (foodX / size) - 1
+    out[3] = 2 * (foodY / size) - 1
+    out[4] = DIRECTION_INPUTS[direction]
+    out[5] = 2 * (math.sqrt((headX - foodX) ** 2 + (headY - foodY) ** 2) / maxDistance) - 1
+
+    for i in range(len(rays)):
+        out[6 + i] = cellInputs[cells[rays[i]]]
+
+
+@jit
+def moveHead(x, y, direction, size):
+    """Game.move_head as a kernel
+
+    Args:
+        direction (int): Index of the direction in DIRECTIONS
+
+    Returns:
+        tuple[int, int]: New (x, y), wrapped around the board
+    """
+    if direction == 1:
+        y += 1
+    elif direction == 0:
+        y -= 1
+    elif direction == 2:
+        x -= 1
+    elif direction == 3:
+        x += 1
+
+    if x > size - 1:
+        x = 0
+    elif x < 0:
+        x = size - 1
+    if y > size - 1:
+        y = 0
+    elif y < 0:
+        y = size - 1
+
+    return x, y
+
+
+class Board:
+    """Snake board stored as one bytearray, with a cell value per position (y * size + x):
     0   Empty cell
     1   Snake head
     2   Snake body
     3   Food cell
 
-    Any value below 0:  Lifetime of snake body
-                        Increments by 1 until it hits 0
+    The body is a deque of (position, expiry) pairs (tail first): each move counts a tick,
+     and a body cell stops being body at its expiry tick, so a move only touches
+     the cells at the head and the tail instead of the whole board.
+    Empty cells are kept in a list (with each cell's position in it),
+     so food can be placed on a random empty cell straight away.
     """
-    def __init__(self):
-        self.__value = 0
-        self.__life = 0
-    
-    def get_val(self):
-        return self.__value
-    
-    def get_life(self):
-        return self.__life if self.__value == 2 else None
-
-    def get_name(self):
-        if self.__value == 0:
-            return "empty"
-        elif self.__value == 1:
-            return "head"
-        elif self.__value == 2:
-            return "body"
-        elif self.__value == 3:
-            return "food"
-
-    def set_val(self, val):
-        # Do not use for body
-        self.__value = val
-
-    def set_body(self, life):
-        self.__value = 2
-        self.__life = life
-
-    def update(self):
-        if self.__value == 2:
-            if self.__life <= 0:
-                self.__value = 0
-            else:
-                self.__life -= 1
-
-
-class Grid:
     def __init__(self, size):
-        # gen empty grid
-        self.__grid = []
-
-        for i in range(size):
-            row = []
-            for cell in range(size):
-                row.append(Cell())
-            self.__grid.append(row)
-    
-    def get_pos(self, coords):
-        # get cell at coords
-        return self.__grid[coords[1]][coords[0]]
-    
-    def update(self):
-        for row in self.__grid:
-            for cell in row:
-                cell.update()
-    
+        self.size = size
+        self.cells = bytearray(size * size)
+        # numpy view sharing memory with the bytearray, for the sensor
+        self.values = np.frombuffer(self.cells, dtype=np.uint8)
+        self.body = deque()
+        self.ticks = 0
+
+        self.__free = list(range(size * size))
+        self.__freeIndex = list(range(size * size))
+
+    def index(self, coords):
+        # flat index of [x, y]
+        return coords[1] * self.size + coords[0]
+
+    def get(self, index):
+        return self.cells[index]
+
+    def set(self, index, value):
+        if self.cells[index] == value:
+            return
+
+        if value == EMPTY:
+            self.__freeIndex[index] = len(self.__free)
+            self.__free.append(index)
+        elif self.cells[index] == EMPTY:
+            # swap the last empty cell into this one's place
+            position = self.__freeIndex[index]
+            last = self.__free.pop()
+            if last != index:
+                self.__free[position] = last
+                self.__freeIndex[last] = position
+
+        self.cells[index] = value
+
+    def add_body(self, index, length):
+        """Age the body by one move, then turn a cell into body.
+        A cell placed with length L stays body for the next L moves and is emptied on
+         the move after, so after eating the body grows L + 1 moves later
+         (the same lifetime as BatchSnakeEnv's expiry ticks).
+
+        Args:
+            index (int): Flat index of the new body cell
+            length (int): Length of the snake when the cell is placed
+        """
+        self.ticks += 1
+        # expiries only grow along the deque, since the length never shrinks
+        while self.body and self.body[0][1] <= self.ticks:
+            self.set(self.body.popleft()[0], EMPTY)
+
+        self.set(index, BODY)
+        self.body.append((index, self.ticks + length + 1))
+
+    def random_empty(self):
+        """Pick a random empty cell
+
+        Returns:
+            int: Flat index of the cell, or None if the board is full
+        """
+        if not self.__free:
+            return None
+        return self.__free[random.randrange(len(self.__free))]
+
     def __str__(self):
         rows = []
-        for row in self.__grid:
-            rows.append(
-                " ".join(map(self.__dispCell, row))
-            )
-        
+        for y in range(self.size):
+            rows.append(" ".join(
+                CELL_CHARACTERS[value]
+                for value in self.cells[y * self.size:(y + 1) * self.size]
+            ))
+
         return "\n".join(rows)
-    
-    def __dispCell(self, cell):
-        if cell.get_val() == 0:
-            return "-"
-        elif cell.get_val()  == 1:
-            return "■"
-        elif cell.get_val()  == 2:
-            return "□"
-        elif cell.get_val()  == 3:
-            return "◊"
 
 
 class Game:
-    def __init__(self, nn):
-        self.grid = Grid(GRID_SIZE)
+    def __init__(self, nn, size=GRID_SIZE):
+        self.size = size
+        self.board = Board(size)
+        self.sensor = getSensor(size)
+        self.maxDistance = math.sqrt(2 * (size ** 2))
 
         # player
         self.headPos = [
-            random.randint(0, GRID_SIZE - 1),
-            random.randint(0, GRID_SIZE - 1),
+            random.randint(0, size - 1),
+            random.randint(0, size - 1),
         ]
+        self.board.set(self.board.index(self.headPos), HEAD)
         self.direction = "up"
         self.length = 4
         self.score = 0
 
         # ai
-        self.movesAvailable = GRID_SIZE * 2
+        self.movesAvailable = size * 2
         self.movesMade = 0
         self.neuralNetwork = nn
+        # names of the values from get_inputs, resolved to the network's input slots once
+        self.inputNames = FEATURE_NAMES + self.sensor.names
+        self.inputPlan = None if nn is None else nn.input_plan(self.inputNames)
+        # profile the game loop along with the network
+        self.profiler = None if nn is None else nn.profiler
         # fitness = 1000(score) + 1(movesMade)
         self.fitness = 0
 
         self.moveFood()
     
     def run(self):
+        if self.profiler is not None:
+            return self.run_profiled(self.profiler)
 
-        while (self.score < 10) and not (self.movesAvailable < 1):
-            # make a move
-            self.movesAvailable -= 1
-            self.fitness += 1
+        while self.running():
             self.set_inputs()
-
             self.neuralNetwork.start()
-            if not self.setDirection(self.neuralNetwork.get_highest_output()[0]):
-                # print("Turned into itself")
-                break
-            
+
             # for output in self.neuralNetwork.get_outputs():
             #     print(f"{output.name:<8}: {round(output.value, 4):<8}" + '|' * round(40 * output.value))
 
-            self.grid.update()
-            
-            # replace head with body
-            self.grid.get_pos(self.headPos).set_body(self.length)
-
-            # place head
-            self.move_head()
-            self.grid.get_pos(self.headPos).set_val(1)
-
-            # if head touches food
-            if self.headPos == self.foodPos:
-                # print("Touched food")
-                self.score += 1
-                self.length += 1
-                self.movesAvailable *= 1.5
-                self.fitness += 1000
-                self.moveFood()
-            
-            # if head touches body
-            if self.grid.get_pos(self.headPos).get_name() == "body":
-                # print("Ran into body")
+            if not self.step(self.neuralNetwork.get_highest_output()[0]):
                 break
+        
+        return self.fitness
+
+    def run_profiled(self, profiler):
+        """run(), timing input encoding, the network and moves"""
+        profiler.count("games")
 
-            # print(f"Fitness {self.fitness}")
-            # print(f"Head {self.headPos}   Food {self.foodPos}   Score {self.score}   Moves {self.movesMade} ({self.movesAvailable} left)")
-            # print(str(self.grid) + "\n\n")
-            # time.sleep(0.2)
+        while self.running():
+            start = time.perf_counter()
+            self.set_inputs()
+            profiler.add_time("inputs", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            self.neuralNetwork.start()
+            profiler.add_time("start", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            moved = self.step(self.neuralNetwork.get_highest_output()[0])
+            profiler.add_time("step", time.perf_counter() - start)
+
+            if not moved:
+                break
         
+        profiler.count("steps", self.movesMade)
         return self.fitness
 
+    def running(self):
+        return (self.score < 10) and not (self.movesAvailable < 1)
+
+    def step(self, newDir):
+        """Make a single move
+
+        Args:
+            newDir (string): Direction chosen by the network
+
+        Returns:
+            bool: False if the game ended on this move
+        """
+        # make a move
+        self.movesAvailable -= 1
+        self.movesMade += 1
+        self.fitness += 1
+
+        if not self.setDirection(newDir):
+            # print("Turned into itself")
+            return False
+
+        # age the body and replace head with body
+        self.board.add_body(self.board.index(self.headPos), self.length)
+
+        # place head
+        self.move_head()
+        head = self.board.index(self.headPos)
+
+        # if head touches body (checked before the head overwrites the cell)
+        if self.board.get(head) == BODY:
+            # print("Ran into body")
+            return False
+
+        self.board.set(head, HEAD)
+
+        # if head touches food
+        if self.headPos == self.foodPos:
+            # print("Touched food")
+            self.score += 1
+            self.length += 1
+            self.movesAvailable *= 1.5
+            self.fitness += 1000
+            self.moveFood()
+
+        # print(f"Fitness {self.fitness}")
+        # print(f"Head {self.headPos}   Food {self.foodPos}   Score {self.score}   Moves {self.movesMade} ({self.movesAvailable} left)")
+        # print(str(self.board) + "\n\n")
+        # time.sleep(0.2)
+
+        return True
+
     def setDirection(self, newDir):
         combo = [newDir, self.direction]
         if "up" in combo and "down" in combo:
@@ -190,20 +341,15 @@ class Game:
 
     def moveFood(self):
         # dont spawn food in body/head
-        self.foodPos = None
-
-        while True:
-            self.foodPos = [
-                random.randint(0, GRID_SIZE - 1),
-                random.randint(0, GRID_SIZE - 1),
-            ]
-
-            if self.grid.get_pos(self.foodPos).get_val() == 0:
-                break
-
-        self.grid.get_pos(self.foodPos).set_val(3)
+        food = self.board.random_empty()
+        self.foodPos = [food % self.size, food // self.size]
+        self.board.set(food, FOOD)
     
     def move_head(self):
+        if JIT_AVAILABLE:
+            self.headPos[:] = moveHead(self.headPos[0], self.headPos[1], DIRECTION_CODES[self.direction], self.size)
+            return
+
         # move in direction
         if self.direction == "down":
             self.headPos[1] += 1
@@ -214,8 +360,8 @@ class Game:
         elif self.direction == "right":
             self.headPos[0] += 1
         
-        self.headPos[0] = self.wrap(self.headPos[0], GRID_SIZE - 1)
-        self.headPos[1] = self.wrap(self.headPos[1], GRID_SIZE - 1)
+        self.headPos[0] = self.wrap(self.headPos[0], self.size - 1)
+        self.headPos[1] = self.wrap(self.headPos[1], self.size - 1)
     
 
     def wrap(self, val, max):
@@ -227,10 +373,22 @@ class Game:
         return val
     
     def set_inputs(self):
-        headx = normalize(self.headPos[0], 0, 30)
-        heady = normalize(self.headPos[1], 0, 30)
-        foodx = normalize(self.foodPos[0], 0, 30)
-        foody = normalize(self.foodPos[1], 0, 30)
+        self.neuralNetwork.set_planned_inputs(self.inputPlan, self.get_inputs())
+
+    def get_inputs(self):
+        if JIT_AVAILABLE:
+            inputs = np.empty(len(self.inputNames))
+            encodeInputs(
+                self.headPos[0], self.headPos[1], self.foodPos[0], self.foodPos[1],
+                DIRECTION_CODES[self.direction], self.size, self.maxDistance,
+                self.board.values, self.sensor.table[self.board.index(self.headPos)], CELL_INPUTS, inputs,
+            )
+            return inputs
+
+        headx = normalize(self.headPos[0], 0, self.size)
+        heady = normalize(self.headPos[1], 0, self.size)
+        foodx = normalize(self.foodPos[0], 0, self.size)
+        foody = normalize(self.foodPos[1], 0, self.size)
 
         if self.direction == "up":
             direction = 1
@@ -244,65 +402,15 @@ class Game:
         foodDistance = normalize(math.sqrt(
             (self.headPos[0] - self.foodPos[0])**2 + (self.headPos[1] - self.foodPos[1])**2
             ),
-            0, MAX_DISTANCE
+            0, self.maxDistance
         )
         
-        self.neuralNetwork.set_inputs((
-            headx,
-            heady,
-            foodx,
-            foody,
-            direction,
-            self.cell_to_input(self.get_relative(0, -1)),  # up1
-			self.cell_to_input(self.get_relative(0, -2)),  # up2
-			self.cell_to_input(self.get_relative(0, -3)),  # up3
-			self.cell_to_input(self.get_relative(0, -4)),  # up4
-			self.cell_to_input(self.get_relative(0, 1)),  # down1
-			self.cell_to_input(self.get_relative(0, 2)),  # down2
-			self.cell_to_input(self.get_relative(0, 3)),  # down3
-			self.cell_to_input(self.get_relative(0, 4)),  # down4
-			self.cell_to_input(self.get_relative(-1, 0)),  # left1
-			self.cell_to_input(self.get_relative(-2, 0)),  # left2
-			self.cell_to_input(self.get_relative(-3, 0)),  # left3
-			self.cell_to_input(self.get_relative(-4, 0)),  # left4
-			self.cell_to_input(self.get_relative(1, 0)),  # right1
-			self.cell_to_input(self.get_relative(2, 0)),  # right2
-			self.cell_to_input(self.get_relative(3, 0)),  # right3
-			self.cell_to_input(self.get_relative(4, 0)),  # right4
-			self.cell_to_input(self.get_relative(1, -1)),  # upright1
-			self.cell_to_input(self.get_relative(2, -2)),  # upright2
-			self.cell_to_input(self.get_relative(3, -3)),  # upright3
-			self.cell_to_input(self.get_relative(4, -4)),  # upright4
-			self.cell_to_input(self.get_relative(1, 1)),  # downright1
-			self.cell_to_input(self.get_relative(2, 2)),  # downright2
-			self.cell_to_input(self.get_relative(3, 3)),  # downright3
-			self.cell_to_input(self.get_relative(4, 4)),  # downright4
-			self.cell_to_input(self.get_relative(-1, 1)),  # downleft1
-			self.cell_to_input(self.get_relative(-2, 2)),  # downleft2
-			self.cell_to_input(self.get_relative(-3, 3)),  # downleft3
-			self.cell_to_input(self.get_relative(-4, 4)),  # downleft4
-			self.cell_to_input(self.get_relative(-1, -1)),  # upleft1
-			self.cell_to_input(self.get_relative(-2, -2)),  # upleft2
-			self.cell_to_input(self.get_relative(-3, -3)),  # upleft3
-			self.cell_to_input(self.get_relative(-4, -4)),  # upleft4
-        ))
-    
-    def get_relative(self, x, y):
-        return self.grid.get_pos((
-            self.wrap(self.headPos[0] + x, 29),
-            self.wrap(self.headPos[1] + y, 29),
-        ))
-    
-    def cell_to_input(self, cell):
-        val = cell.get_val()
+        # in the order of self.inputNames
+        inputs = np.empty(len(self.inputNames))
+        inputs[:6] = (headx, heady, foodx, foody, direction, foodDistance)
+        inputs[6:] = CELL_INPUTS[self.sensor.read(self.board.values, self.board.index(self.headPos))]
 
-        if val == 2:
-            return -1
-        elif val == 0:
-            return 0
-        elif val == 3:
-            return 1
-         
+        return inputs
 
 
 def genNeurons(n):
@@ -344,46 +452,7 @@ Outputs:
 """
 
 # inputlayer
-nn = Network((
-    IONeuron("headX"),
-    IONeuron("headY"),
-    IONeuron("foodX"),
-    IONeuron("foodY"),
-    IONeuron("direction"),
-    IONeuron("foodDistance"),
-    IONeuron("up1"),
-	IONeuron("up2"),
-	IONeuron("up3"),
-	IONeuron("up4"),
-	IONeuron("down1"),
-	IONeuron("down2"),
-	IONeuron("down3"),
-	IONeuron("down4"),
-	IONeuron("left1"),
-	IONeuron("left2"),
-	IONeuron("left3"),
-	IONeuron("left4"),
-	IONeuron("right1"),
-	IONeuron("right2"),
-	IONeuron("right3"),
-	IONeuron("right4"),
-	IONeuron("upright1"),
-	IONeuron("upright2"),
-	IONeuron("upright3"),
-	IONeuron("upright4"),
-	IONeuron("downright1"),
-	IONeuron("downright2"),
-	IONeuron("downright3"),
-	IONeuron("downright4"),
-	IONeuron("downleft1"),
-	IONeuron("downleft2"),
-	IONeuron("downleft3"),
-	IONeuron("downleft4"),
-	IONeuron("upleft1"),
-	IONeuron("upleft2"),
-	IONeuron("upleft3"),
-	IONeuron("upleft4"),
-))
+nn = Network([IONeuron(name) for name in INPUT_NAMES])
 
 # hidden layer
 nn.add_layer(
@@ -409,41 +478,203 @@ nn.add_layer(
 nn.build_connections()
 
 
-def getTop(li, perc):
-    """Get the top perc% performing networks.
+def evaluatePopulation(population):
+    """Play one game per network, with every game moving in lockstep.
+    Each tick runs a single batched forward pass over the whole population.
 
     Args:
-        li (list<Network>): List of networks
-        perc (float): Top percentage threshold (0 - 1)
+        population (Population): Networks to evaluate
 
     Returns:
-        list<Network>: Top performing networks
+        numpy.ndarray: Fitness of each network
     """
-    return li[len(li) - int(len(li) * perc):]
+    games = [Game(None) for _ in range(len(population))]
+    active = [i for i, game in enumerate(games) if game.running()]
+    plan = population.input_plan(games[0].inputNames)
+    profiler = population.profiler
 
+    while active:
+        if profiler is not None:
+            start = time.perf_counter()
 
-def doGeneration(population):
-    # run all games
-    results = []
+        for i in active:
+            population.inputs[i, plan] = games[i].get_inputs()
+
+        if profiler is not None:
+            profiler.add_time("inputs", time.perf_counter() - start)
+
+        choices = population.highest_output_indices().tolist()
 
-    for p in population:
-        game = Game(p)
-        fitness = g.run()
-        results.append((game, fitness))
+        if profiler is not None:
+            start = time.perf_counter()
+
+        active = [
+            i for i in active
+            if games[i].step(DIRECTIONS[choices[i]]) and games[i].running()
+        ]
+
+        if profiler is not None:
+            profiler.add_time("step", time.perf_counter() - start)
     
-    # identify top performing
-    results = sorted(results, key=lambda x: x[1])
-    topPerforming = getTop(results, 0.1)
+    if profiler is not None:
+        profiler.count("games", len(games))
+        profiler.count("steps", sum(game.movesMade for game in games))
+
+    return np.array([game.fitness for game in games], dtype=float)
+
+
+def evaluateNetwork(network, seed):
+    """Play one seeded game (fitness function for GenerationRunner)
 
-    # get new population
-    newPopulation = 
+    Args:
+        network (Network): Compiled network to play with
+        seed (int): Seed for the game's random numbers
 
-networks = []
+    Returns:
+        int: Fitness
+    """
+    random.seed(seed)
+    return Game(network).run()
 
-while len(networks) < 200:
-    nn.mutate(0.9, 0.5)
 
-    g = Game(nn)
-    r = g.run()
+def geneticAlgorithm(shape, rng=None):
+    """Breeding settings: the two best networks are kept, every other one is
+    a uniform crossover of two tournament winners, then mutated
 
-    networks.append((nn, r))
\ No newline at end of file
+    Args:
+        shape (tuple[int]): Number of neurons in each layer
+        rng (numpy.random.Generator/int, optional): Generator or seed for selection and mutation. Defaults to None.
+
+    Returns:
+        GeneticAlgorithm: Algorithm to breed with
+    """
+    return GeneticAlgorithm(
+        shape, elitism=2, selection="tournament", crossover="uniform",
+        mutationRate=0.1, mutationStrength=0.5, rng=rng,
+    )
+
+
+def breed(population, fitness, rng=None):
+    """Breed the next population
+
+    Args:
+        population (Population): Evaluated population
+        fitness (numpy.ndarray): Fitness of each network
+        rng (numpy.random.Generator/int, optional): Generator or seed for selection and mutation. Defaults to None.
+
+    Returns:
+        Population: Next population
+    """
+    return geneticAlgorithm(population.shape, rng).breed(population, fitness)
+
+
+def doGeneration(population, rng=None, runner=None, store=None, generation=0):
+    """Evaluate a population and breed the next one from its top performing networks
+
+    Args:
+        population (Population): Current population
+        rng (numpy.random.Generator/int, optional): Generator or seed for mutation. Defaults to None.
+            A seed is turned into a generator first, so the checkpoint stores the state breeding starts from.
+        runner (GenerationRunner, optional): Runner to evaluate with in parallel. Defaults to lockstep evaluation in this process.
+        store (PopulationStore, optional): Store to checkpoint the evaluated population to. Defaults to None.
+        generation (int, optional): Generation number for the checkpoint. Defaults to 0.
+
+    Returns:
+        tuple[Population, numpy.ndarray]: Next population and the fitness of the current one
+    """
+    rng = np.random.default_rng(rng)
+
+    # run all games
+    if runner is not None:
+        fitness = runner.evaluate(population.genomes)
+    else:
+        fitness = evaluatePopulation(population)
+    
+    # checkpoint before breeding, so resuming breeds the same next population
+    if store is not None:
+        store.append(generation, population.genomes, fitness, rng)
+
+    return breed(population, fitness, rng), fitness
+
+
+CHECKPOINT = "snake.pop"
+
+if __name__ == "__main__":
+    if os.path.exists(CHECKPOINT):
+        # resume from the last checkpointed generation
+        store = PopulationStore(CHECKPOINT)
+        rng = store.rng()
+        start = store.generation() + 1
+        try:
+            population = store.population(template=nn)
+        except ValueError as error:
+            sys.exit(f"{error}: {CHECKPOINT} is from another snake network, delete it to start over")
+        population = breed(population, store.fitness(), rng)
+    else:
+        # fresh weights for every network, and mutated biases so they differ too
+        rng = np.random.default_rng(0)
+        population = Population.initialize(nn, 200, "uniform", rng)
+        population.mutate(0.9, 0.5, rng)
+        store = PopulationStore.create(CHECKPOINT, nn, len(population))
+        start = 0
+
+    # SNAKE_PROFILE=stats.jsonl appends profiling stats for every generation,
+    # evaluating in lockstep in this process since stats are not collected from workers
+    profile = os.environ.get("SNAKE_PROFILE")
+    if profile:
+        population.profiler = Profiler()
+
+    # SNAKE_CACHE=10000 plays every network on the same seeded game, caching up to that many
+    # results so networks carried over unchanged (e.g. the elites) are not replayed
+    cacheSize = int(os.environ.get("SNAKE_CACHE", 0))
+    cache = FitnessCache(cacheSize) if cacheSize else None
+
+    # SNAKE_TELEMETRY=run.jsonl (or .csv, .bin) records every generation's stats from a background thread,
+    # with the distribution of scores 0 to 10
+    telemetryPath = os.environ.get("SNAKE_TELEMETRY")
+    telemetry = Telemetry(telemetryPath, scoreBins=11) if telemetryPath else None
+
+    with GenerationRunner(nn, evaluateNetwork, workers=os.cpu_count(), seed=0, fixedSeed=cache is not None, cache=cache,
+                          backend="numba") as runner:
+        runner.generation = start
+
+        # SNAKE_STEADY=1 evolves steady-state: each finished game's network is replaced right away
+        # by a new child, so workers never wait for the slowest game of a generation
+        if os.environ.get("SNAKE_STEADY"):
+            steady = SteadyStateRunner(runner, geneticAlgorithm(population.shape, rng), mask=population.mask)
+
+            # run time at the previous report
+            reported = {"seconds": 0.0}
+
+            def report(evaluations, genomes, fitness):
+                generation = start + evaluations // len(genomes) - 1
+                print(f"Generation {generation}: best {fitness.max()}, mean {fitness.mean()}, "
+                      f"{steady.throughput:.0f} evaluations/s")
+                store.append(generation, genomes, fitness, rng)
+
+                if telemetry is not None:
+                    telemetry.record_generation(
+                        generation, fitness, steady.seconds - reported["seconds"], scores=fitness // 1000
+                    )
+                reported["seconds"] = steady.seconds
+
+            steady.run(population.genomes, runner.evaluate(population.genomes), (100 - start) * len(population), report)
+        else:
+            for generation in range(start, 100):
+                started = time.perf_counter()
+                population, fitness = doGeneration(population, rng, None if profile else runner, store, generation)
+                print(f"Generation {generation}: best {fitness.max()}, mean {fitness.mean()}")
+
+                if telemetry is not None:
+                    telemetry.record_generation(
+                        generation, fitness, time.perf_counter() - started,
+                        scores=fitness // 1000, profiler=population.profiler,
+                    )
+                if cache is not None:
+                    print(f"  fitness cache: {cache.hitRate:.1%} hits, {len(cache)} results")
+
+                if profile:
+                    population.profiler.dump(profile, generation=generation, best=fitness.max(), mean=fitness.mean())
+
+    if telemetry is not None:
+        telemetry.close()
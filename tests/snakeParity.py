@@ -0,0 +1,97 @@
+"""Parity check of BatchSnakeEnv against Game.
+Both play the same seeded games: the Game is put on the environment's head and food,
+ both get the same moves (mostly towards the food, so games eat and grow), and every tick
+ the scores, fitness, finished flags, body cells and observations are compared.
+Food is placed by each with its own random numbers, so the Game's food is moved to the environment's.
+
+    python snakeParity.py     exits with 1 on any mismatch
+"""
+import sys
+import random
+sys.path.insert(0, "../src")
+import numpy as np
+from snake import Game, DIRECTIONS, EMPTY, HEAD, FOOD, BODY
+from batchSnake import BatchSnakeEnv, OPPOSITE
+
+# chance of a random move instead of one towards the food
+WANDER = 0.2
+
+def moveFood(game, food):
+    board = game.board
+    if board.get(board.index(game.foodPos)) == FOOD:
+        board.set(board.index(game.foodPos), EMPTY)
+    game.foodPos = [food % game.size, food // game.size]
+    board.set(food, FOOD)
+
+
+def startGame(env):
+    """Game in the starting state of the environment's only game"""
+    game = Game(None, env.size)
+    board = game.board
+    board.set(board.index(game.headPos), EMPTY)
+    head = int(env.head[0])
+    game.headPos = [head % game.size, head // game.size]
+    board.set(head, HEAD)
+    moveFood(game, int(env.food[0]))
+    return game
+
+
+def chooseMove(game, rng):
+    """Index into DIRECTIONS, towards the food unless wandering"""
+    headX, headY = game.headPos
+    foodX, foodY = game.foodPos
+    moves = [0 if foodY < headY else 1 if foodY > headY else None, 2 if foodX < headX else 3 if foodX > headX else None]
+    current = DIRECTIONS.index(game.direction)
+    moves = [move for move in moves if move is not None and move != OPPOSITE[current]]
+    if not moves or rng.random() < WANDER:
+        return int(rng.integers(len(DIRECTIONS)))
+    return moves[rng.integers(len(moves))]
+
+
+def playGame(seed):
+    """Play one game in both, returning the first difference or None"""
+    random.seed(seed)
+    env = BatchSnakeEnv(1, seed=seed, autoReset=False)
+    game = startGame(env)
+    rng = np.random.default_rng(seed)
+
+    tick = 0
+    while not env.done[0]:
+        move = chooseMove(game, rng)
+        running = game.step(DIRECTIONS[move]) and game.running()
+        observations, _, _ = env.step(np.array([move]))
+        tick += 1
+
+        if running == env.done[0]:
+            return f"tick {tick}: game {'running' if running else 'finished'}, environment not"
+        if game.score != env.score[0] or game.fitness != env.fitness[0]:
+            return f"tick {tick}: score/fitness {game.score}/{game.fitness} != {env.score[0]}/{env.fitness[0]}"
+        if not running:
+            break
+
+        if game.foodPos != [int(env.food[0]) % game.size, int(env.food[0]) // game.size]:
+            moveFood(game, int(env.food[0]))
+
+        body = np.flatnonzero(game.board.values == BODY)
+        expected = np.flatnonzero(env.expiry[0] > env.ticks[0])
+        if not np.array_equal(body, expected):
+            return f"tick {tick}: body cells {body.tolist()} != {expected.tolist()}"
+        if game.board.index(game.headPos) != env.head[0]:
+            return f"tick {tick}: head {game.board.index(game.headPos)} != {env.head[0]}"
+        if not np.allclose(game.get_inputs(), observations[0]):
+            return f"tick {tick}: observations differ"
+
+    return None
+
+
+if __name__ == "__main__":
+    games = 300
+    failures = 0
+    for seed in range(games):
+        difference = playGame(seed)
+        if difference is not None:
+            print(f"FAIL game {seed}: {difference}")
+            failures += 1
+
+    print("OK" if not failures else f"{failures} failures of {games} games")
+    sys.exit(1 if failures else 0)
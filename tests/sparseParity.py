@@ -0,0 +1,123 @@
+"""Parity check of the sparse compiled form against the dense one.
+Networks pruned by fraction and threshold (down to neurons left without connections), and
+built with random densities, must give the same outputs sparse and dense, in float64 and float32,
+one input at a time and batched, after mutating and after training. Pruned weights must stay at 0.
+
+    python sparseParity.py     exits with 1 on any mismatch
+"""
+import sys
+sys.path.insert(0, "../src")
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+from sparse import SparseCompiledNetwork
+from training import Trainer
+
+INPUTS = 12
+OUTPUTS = 4
+# (hidden layer sizes, activations and densities, output activation, prune arguments)
+NETWORKS = (
+    (((16, None, None),), None, {"fraction": 0.5}),
+    (((24, "tanh", None), (16, "relu", None)), "softmax", {"fraction": 0.9}),
+    (((20, "leakyRelu", 0.3), (10, None, 0.5)), "tanh", None),
+    # most connections go, some neurons keep only their bias
+    (((8, "tanh", None),), None, {"threshold": 0.9}),
+)
+TOLERANCE = {"float64": 1e-12, "float32": 1e-5}
+
+def makeNetwork(hidden, outputActivation, prune, rng):
+    network = Network([IONeuron(f"input{i}") for i in range(INPUTS)])
+    for size, activation, density in hidden:
+        network.add_layer(Layer([Neuron(0) for _ in range(size)], activation, density))
+    network.add_layer(Layer([IONeuron(f"output{i}") for i in range(OUTPUTS)], outputActivation))
+    network.build_connections(initializer="uniform", rng=rng)
+    if prune is not None:
+        network.prune(**prune)
+    return network
+
+
+def compare(name, network, X):
+    """Sparse and dense outputs of a network for X, returning the failure count"""
+    failures = 0
+    expected = network.compile().forward_batch(X)
+    network.set_inputs(X[0])
+    network.start()
+    single = [neuron.value for neuron in network.get_outputs()]
+
+    for precision, tolerance in TOLERANCE.items():
+        network.compile(True, precision)
+        batched = network.compiled.forward_batch(X)
+        network.set_inputs(X[0])
+        network.start()
+        if not np.allclose(batched, expected, rtol=tolerance, atol=tolerance):
+            print(f"FAIL {name} {precision}: batched outputs differ, by up to {np.abs(batched - expected).max():.2e}")
+            failures += 1
+        if not np.allclose([neuron.value for neuron in network.get_outputs()], single, rtol=tolerance, atol=tolerance):
+            print(f"FAIL {name} {precision}: single outputs differ")
+            failures += 1
+
+    network.compile()
+    return failures
+
+
+def checkPruned(name, network):
+    mask = network.parameter_mask()
+    if mask is not None and np.abs(network.params[~mask]).max() != 0:
+        print(f"FAIL {name}: pruned weights are not 0")
+        return 1
+    return 0
+
+
+def checkRefreshed(name, network, X):
+    """The sparse form the network was changed under must match a fresh dense form"""
+    stored = network.compiled.forward_batch(X)
+    expected = network.get_compiled().forward_batch(X)
+    if not np.allclose(stored, expected, rtol=TOLERANCE["float64"], atol=TOLERANCE["float64"]):
+        print(f"FAIL {name}: sparse form not refreshed")
+        return 1
+    return 0
+
+
+def checkNetworks(rng):
+    failures = 0
+    for index, (hidden, outputActivation, prune) in enumerate(NETWORKS):
+        network = makeNetwork(hidden, outputActivation, prune, rng)
+        X = rng.uniform(-1, 1, (32, INPUTS))
+        name = f"network {index}"
+
+        network.compile(True)
+        shape = network.compiled.shape
+        connections = sum(
+            shape[i] * shape[i + 1] if mask is None else int(mask.sum()) for i, mask in enumerate(network.masks())
+        )
+        if network.compiled.connections != connections:
+            print(f"FAIL {name}: {network.compiled.connections} connections stored, {connections} present")
+            failures += 1
+
+        failures += compare(name, network, X)
+
+        network.compile(True)
+        network.mutate(0.3, 0.5, rng)
+        failures += checkPruned(f"{name} mutated", network)
+        failures += checkRefreshed(f"{name} mutated", network, X)
+        failures += compare(f"{name} mutated", network, X)
+
+        network.compile(True)
+        trainer = Trainer(network, optimizer="adam", loss="mse")
+        y = rng.uniform(-1, 1, (len(X), OUTPUTS))
+        for _ in range(20):
+            trainer.train_batch(X, y)
+        failures += checkPruned(f"{name} trained", network)
+        if not isinstance(network.compiled, SparseCompiledNetwork):
+            print(f"FAIL {name}: training replaced the sparse compiled form")
+            failures += 1
+        failures += checkRefreshed(f"{name} trained", network, X)
+        failures += compare(f"{name} trained", network, X)
+
+    return failures
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failures = checkNetworks(rng)
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,154 @@
+"""Round-trip check of Telemetry: seeded generations recorded through a small ring buffer
+(so the writer wraps around it many times) must read back exactly from .jsonl, .csv and .bin,
+with and without score counts, including generations without fitness or a profiler (NaN),
+and appending to an existing file must continue it, or refuse one with other columns.
+
+    python telemetryCheck.py     exits with 1 on any mismatch
+"""
+import os
+import csv
+import sys
+import json
+import time
+import tempfile
+sys.path.insert(0, "../src")
+import numpy as np
+import telemetry
+from telemetry import Telemetry, FORMATS
+from profiling import Profiler
+
+SCORE_BINS = (0, 4)
+
+def makeGenerations(rng, start, count, scoreBins):
+    """Arguments of record_generation for some generations"""
+    generations = []
+    for generation in range(start, start + count):
+        size = 0 if generation % 7 == 3 else int(rng.integers(1, 50))
+        profiler = None
+        if generation % 2:
+            profiler = Profiler()
+            profiler.add_time("forward", float(rng.random()))
+            profiler.add_time("step", float(rng.random()))
+            profiler.add_time("inputs", float(rng.random()))
+        generations.append(dict(
+            generation=generation,
+            fitness=rng.normal(100, 30, size),
+            seconds=float(rng.random()) if generation % 5 else 0.0,
+            scores=rng.integers(0, scoreBins + 2, size) if scoreBins else None,
+            profiler=profiler,
+        ))
+    return generations
+
+
+def expectedRecords(generations, scoreBins):
+    """Records as Telemetry should write them, computed directly"""
+    records = np.zeros(len(generations), dtype=telemetry.recordType(scoreBins))
+    for record, arguments in zip(records, generations):
+        fitness = arguments["fitness"]
+        record["generation"] = arguments["generation"]
+        record["seconds"] = arguments["seconds"]
+        record["evaluations"] = len(fitness)
+        record["evaluationsPerSecond"] = len(fitness) / arguments["seconds"] if arguments["seconds"] else 0.0
+        for name, function in (("best", np.max), ("mean", np.mean), ("std", np.std)):
+            record[name] = function(fitness) if len(fitness) else np.nan
+        for percentile in telemetry.PERCENTILES:
+            record[f"p{percentile}"] = np.percentile(fitness, percentile) if len(fitness) else np.nan
+
+        profiler = arguments["profiler"]
+        if profiler is None:
+            record["inferenceSeconds"] = record["simulationSeconds"] = np.nan
+        else:
+            record["inferenceSeconds"] = profiler.timers["forward"][1]
+            record["simulationSeconds"] = profiler.timers["inputs"][1] + profiler.timers["step"][1]
+        if scoreBins:
+            record["scores"] = np.bincount(np.minimum(arguments["scores"], scoreBins - 1), minlength=scoreBins)
+    return records
+
+
+def read(path, format, scoreBins):
+    """Records of a telemetry file, as a structured array"""
+    dtype = telemetry.recordType(scoreBins)
+    if format == "bin":
+        return telemetry.load(path)
+
+    with open(path, newline="") as f:
+        if format == "csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f]
+
+    records = np.zeros(len(rows), dtype=dtype)
+    for record, row in zip(records, rows):
+        for name in dtype.names:
+            if name == "scores":
+                record[name] = [int(row[f"score{score}"]) for score in range(scoreBins)] if format == "csv" else row[name]
+            else:
+                value = row[name]
+                record[name] = np.nan if value is None else float(value)
+    return records
+
+
+def same(records, expected):
+    if len(records) != len(expected):
+        return f"{len(records)} records, expected {len(expected)}"
+    for name in expected.dtype.names:
+        if name == "time":
+            continue
+        if not np.array_equal(records[name], expected[name], equal_nan=expected[name].dtype.kind == "f"):
+            return f"{name} differs"
+    return None
+
+
+def checkFormats(rng, capacity=8, flushEvery=3):
+    failures = 0
+    directory = tempfile.mkdtemp()
+    for format in FORMATS:
+        for scoreBins in SCORE_BINS:
+            name = f"{format} with {scoreBins} score bins"
+            path = os.path.join(directory, f"run{scoreBins}.{format}")
+            generations = makeGenerations(rng, 0, 40, scoreBins)
+            before = time.time()
+            with Telemetry(path, capacity, flushEvery, scoreBins) as recorder:
+                for arguments in generations[:30]:
+                    recorder.record_generation(**arguments)
+                recorder.flush()
+                difference = same(read(path, format, scoreBins), expectedRecords(generations[:30], scoreBins))
+                if difference is not None:
+                    print(f"FAIL {name}: after flush, {difference}")
+                    failures += 1
+
+            # reopened, the new records follow the old ones
+            with Telemetry(path, capacity, flushEvery, scoreBins) as recorder:
+                for arguments in generations[30:]:
+                    recorder.record_generation(**arguments)
+            records = read(path, format, scoreBins)
+            difference = same(records, expectedRecords(generations, scoreBins))
+            if difference is not None:
+                print(f"FAIL {name}: {difference}")
+                failures += 1
+            if not (before <= records["time"]).all():
+                print(f"FAIL {name}: times before the run")
+                failures += 1
+
+            # another record layout cannot be appended to .csv or .bin
+            if format != "jsonl":
+                try:
+                    Telemetry(path, capacity, flushEvery, scoreBins + 3).close()
+                    print(f"FAIL {name}: appended records with other columns")
+                    failures += 1
+                except ValueError:
+                    pass
+
+            os.remove(path)
+            if format == "bin":
+                os.remove(path + ".dtype.json")
+
+    os.rmdir(directory)
+    return failures
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failures = checkFormats(rng)
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,112 @@
+"""Check of Trainer: backpropagated gradients against central finite differences for every
+loss and activation, and fit reducing the loss of a seeded dataset for each optimizer.
+
+    python trainingCheck.py     exits with 1 on any mismatch
+"""
+import sys
+sys.path.insert(0, "../src")
+import numpy as np
+from main import Layer, Network, Neuron, IONeuron
+from training import Trainer, SGD, Adam, minibatches
+
+# (hidden layer activations, output activation, loss) of the networks to check
+NETWORKS = (
+    ((None, None), None, "mse"),
+    (("tanh", "relu"), "tanh", "mse"),
+    (("leakyRelu",), "fastSigmoid", "mse"),
+    (("tanh",), "sigmoid", "binaryCrossEntropy"),
+    (("relu", "tanh"), "softmax", "crossEntropy"),
+)
+INPUTS = 5
+HIDDEN = 7
+OUTPUTS = 3
+# step of the finite differences and largest difference allowed from the backpropagated gradient
+STEP = 1e-5
+TOLERANCE = 2e-10
+
+def makeNetwork(hidden, outputActivation, rng):
+    network = Network([IONeuron(f"input{i}") for i in range(INPUTS)])
+    for activation in hidden:
+        network.add_layer(Layer([Neuron(0) for _ in range(HIDDEN)], activation))
+    network.add_layer(Layer([IONeuron(f"output{i}") for i in range(OUTPUTS)], outputActivation))
+    network.build_connections(initializer="uniform", rng=rng)
+    return network
+
+
+def makeData(loss, rng, rows=16):
+    X = rng.uniform(-1, 1, (rows, INPUTS))
+    if loss == "crossEntropy":
+        y = np.eye(OUTPUTS)[rng.integers(OUTPUTS, size=rows)]
+    elif loss == "binaryCrossEntropy":
+        y = rng.integers(2, size=(rows, OUTPUTS)).astype(float)
+    else:
+        y = rng.uniform(-1, 1, (rows, OUTPUTS))
+    return X, y
+
+
+def checkGradients(rng):
+    failures = 0
+    for hidden, outputActivation, loss in NETWORKS:
+        name = f"{'/'.join(map(str, hidden))} -> {outputActivation} ({loss})"
+        network = makeNetwork(hidden, outputActivation, rng)
+        trainer = Trainer(network, loss=loss)
+        X, y = makeData(loss, rng)
+        params = network.params
+
+        _, gradient = trainer.gradient(X, y)
+        expected = np.empty_like(gradient)
+        for index in range(len(params)):
+            value = params[index]
+            params[index] = value + STEP
+            above = trainer.evaluate(X, y)
+            params[index] = value - STEP
+            below = trainer.evaluate(X, y)
+            params[index] = value
+            expected[index] = (above - below) / (2 * STEP)
+
+        difference = np.abs(gradient - expected).max()
+        if difference > TOLERANCE:
+            print(f"FAIL {name}: gradient differs from finite differences by {difference:.2e}")
+            failures += 1
+
+    return failures
+
+
+def checkFit(rng, epochs=30):
+    failures = 0
+    for name, optimizer in (("sgd", SGD(0.05, momentum=0.9)), ("adam", Adam(0.01))):
+        hidden, outputActivation, loss = NETWORKS[1]
+        network = makeNetwork(hidden, outputActivation, rng)
+        compiled = network.compile()
+        trainer = Trainer(network, optimizer=optimizer, loss=loss)
+        # a target the network can learn
+        X = rng.uniform(-1, 1, (64, INPUTS))
+        y = np.tanh(X[:, :OUTPUTS] - X[:, OUTPUTS:].sum(axis=1, keepdims=True) / 2)
+
+        before = trainer.evaluate(X, y)
+        history = trainer.fit(lambda: minibatches(X, y, 16, rng), epochs)
+        after = trainer.evaluate(X, y)
+        if len(history) != epochs or not after < before / 2:
+            print(f"FAIL fit with {name}: loss {before:.4f} -> {after:.4f} after {len(history)} epochs")
+            failures += 1
+
+        # trained in place, so the compiled form already has the new parameters
+        if not np.array_equal(compiled.forward_batch(X), network.compile().forward_batch(X)):
+            print(f"FAIL fit with {name}: compiled network not updated")
+            failures += 1
+
+    try:
+        trainer.fit(minibatches(X, y), epochs=2)
+        print("FAIL fit accepted a generator for several epochs")
+        failures += 1
+    except ValueError:
+        pass
+
+    return failures
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failures = checkGradients(rng) + checkFit(rng)
+    print("OK" if not failures else f"{failures} failures")
+    sys.exit(1 if failures else 0)